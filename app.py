@@ -1,9 +1,10 @@
 from dotenv import load_dotenv
 from flask import Flask, render_template, request
 from src.data_processing.data_processor import DataProcessor
-from src.database.db_handler import DBHandler
+from src.database.storage import create_storage
 from src.utils.config_loader import load_config
-from src.ml.weather_predictor import WeatherPredictor
+from src.ml.batch_predictor import BatchPredictor
+from src.ml.model_registry import ModelRegistry
 from src.utils.logger import logger  # Add logger import
 from src.api.weather_api import WeatherAPI
 from datetime import datetime, timedelta
@@ -15,8 +16,18 @@ load_dotenv()  # Load environment variables from .env file
 app = Flask(__name__)
 
 config = load_config()
-db_handler = DBHandler(config['database'])
+db_handler = create_storage(config['database'])
 data_processor = DataProcessor()
+# Fields needed to draw the historical charts
+CHART_FIELDS = {'_id': 0, 'timestamp': 1, 'temperature': 1, 'humidity': 1, 'wind_speed': 1}
+
+# Shared client so the HTTP connection pool and response cache survive across requests
+weather_api = WeatherAPI(config['api_key'], config.get('api'))
+# Models are trained by train_models.py; the registry loads them once and reloads them when their files change
+ml_settings = config.get('ml', {})
+model_registry = ModelRegistry(ml_settings.get('model_dir', 'models'), ml_settings.get('max_models', 32))
+# Predicted curves of every city, recomputed only when a city's latest reading or model changes
+batch_predictor = BatchPredictor(model_registry, ml_settings.get('horizon_hours', 48))
 
 def prepare_city_data(city_data):
     """Prepare city data with consistent timestamp and default values"""
@@ -57,16 +68,18 @@ def prepare_city_data(city_data):
 @app.route('/')
 def dashboard():
     try:
-        cities = db_handler.get_cities()
+        # Newest reading of every city in one query instead of one query per city
+        latest_readings = db_handler.get_latest_for_all_cities()
+        cities = list(latest_readings)
         latest_data = {}
         predictions = {}
         prediction_errors = {}
+        prediction_curves = batch_predictor.curves(latest_readings)
         
         # Fetch AQI data for each city - only if we have cities
         aqi_data = {}
         if cities:
             try:
-                weather_api = WeatherAPI(config['api_key'])
                 aqi_data = weather_api.get_air_quality_data(cities)
             except Exception as e:
                 logger.error(f"Error fetching AQI data: {str(e)}")
@@ -75,41 +88,17 @@ def dashboard():
         for city in cities:
             try:
                 # Get the latest data for this city
-                city_data_list = db_handler.get_recent_weather_data(city, limit=1)
-                city_data = prepare_city_data(city_data_list[0] if city_data_list else None)
+                city_data = prepare_city_data(latest_readings.get(city))
                 latest_data[city] = city_data
                 
-                # Try to get historical data for prediction
-                historical_data = db_handler.get_historical_weather_data(city, days=7)
-                
-                # Only try predictions if we have enough data
-                if len(historical_data) >= 8:  # Need at least 8 data points for meaningful prediction
-                    predictor = WeatherPredictor(city)
-                    
-                    try:
-                        try:
-                            predictor.load_model()
-                        except FileNotFoundError:
-                            logger.info(f"No model found for {city}, training now...")
-                            predictor.train_model(historical_data)
-                        
-                        next_day = datetime.now() + timedelta(days=1)
-                        prediction = predictor.predict(
-                            next_day.hour,
-                            next_day.weekday(),
-                            next_day.month,
-                            city_data.get('humidity', 50),
-                            city_data.get('wind_speed', 0),
-                            city_data.get('weather_condition', 'Clear')
-                        )
-                        predictions[city] = round(prediction, 1)
-                    except Exception as e:
-                        logger.error(f"Prediction error for {city}: {str(e)}")
-                        predictions[city] = "N/A"
+                # Models are trained in the background; cities without one yet show no prediction
+                if city in prediction_curves:
+                    prediction = BatchPredictor.at(prediction_curves[city], 24)
+                    predictions[city] = prediction if prediction is not None else "N/A"
                 else:
-                    logger.warning(f"Not enough data for {city} prediction: {len(historical_data)} records")
                     predictions[city] = "N/A"
-                    prediction_errors[city] = "Insufficient data"
+                    if model_registry.get(city) is None:
+                        prediction_errors[city] = "Model not trained yet"
             except Exception as e:
                 logger.error(f"Error processing data for {city}: {str(e)}")
                 latest_data[city] = prepare_city_data(None)
@@ -119,6 +108,7 @@ def dashboard():
                               latest_data=latest_data, 
                               predictions=predictions, 
                               prediction_errors=prediction_errors,
+                              prediction_chart=BatchPredictor.chart_data(prediction_curves),
                               aqi_data=aqi_data,
                               datetime=datetime)
     except Exception as e:
@@ -132,27 +122,30 @@ def historical_data(city):
         days = int(request.args.get('days', 7))  # Default to 7 days
         start_date = datetime.now() - timedelta(days=days)
         
-        # Get historical data
-        historical_data = db_handler.get_historical_weather_data(city, days=days)
-        
-        # Log diagnostic info
-        logger.info(f"Historical data request for {city} over {days} days - found {len(historical_data)} records")
-        if len(historical_data) == 0:
-            logger.warning(f"No historical data found for {city}")
+        # Stream historical data so the full result set is never held in memory
+        historical_data = db_handler.get_historical_weather_data(city, days=days, projection=CHART_FIELDS,
+                                                                 stream=True)
         
         # Process data for chart
         dates = []
         temps = []
         humidity = []
         wind = []
+        data_count = 0
         
         for record in historical_data:
+            data_count += 1
             if 'timestamp' in record:
                 dates.append(record['timestamp'].strftime('%Y-%m-%d %H:%M'))
                 temps.append(record.get('temperature', 0))
                 humidity.append(record.get('humidity', 0))
                 wind.append(record.get('wind_speed', 0))
         
+        # Log diagnostic info
+        logger.info(f"Historical data request for {city} over {days} days - found {data_count} records")
+        if data_count == 0:
+            logger.warning(f"No historical data found for {city}")
+        
         return render_template('historical.html',
                               city=city,
                               dates=dates,
@@ -160,7 +153,7 @@ def historical_data(city):
                               humidity=humidity,
                               wind=wind,
                               days=days,
-                              data_count=len(historical_data))
+                              data_count=data_count)
     except Exception as e:
         logger.error(f"Historical data error: {str(e)}")
         logger.error(traceback.format_exc())
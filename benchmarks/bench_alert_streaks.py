@@ -0,0 +1,95 @@
+"""Time the alert check that completes a streak, against the streak length.
+
+The previous AlertManager kept every timestamp of a breach streak in a per-city
+list and rescanned the whole list once it reached consecutive_updates, so a
+long sustained condition (e.g. a day's worth of updates) made the completing
+check O(streak length) per city and held the whole streak in memory. The
+rule engine keeps one counter per (rule, city). Both are primed with streaks
+one update short of consecutive_updates and then checked with the breaching
+reading that fires them.
+
+Usage:
+    python benchmarks/bench_alert_streaks.py [--cities 100] [--lengths 10 100 1000 10000] [--cycles 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.alerts.alert_manager import AlertManager
+
+UPDATE = timedelta(minutes=5)
+
+
+class ListHistory:
+    """The former per-city timestamp-list check, reduced to the high temperature rule"""
+
+    def __init__(self, consecutive_updates):
+        self.consecutive_updates = consecutive_updates
+        self.alert_history = {}
+
+    def check_thresholds(self, weather_data):
+        alerts = []
+        for data in weather_data:
+            history = self.alert_history.setdefault(data['city'], [])
+            if data['temperature'] > 35:
+                history.append(data['timestamp'])
+                if len(history) >= self.consecutive_updates and self._check_consecutive(history):
+                    alerts.append(data)
+                    history.clear()
+            else:
+                history.clear()
+        return alerts
+
+    def _check_consecutive(self, timestamps):
+        for i in range(1, len(timestamps)):
+            if timestamps[i] - timestamps[i - 1] > timedelta(minutes=10):
+                return False
+        return True
+
+
+def readings(cities, timestamp):
+    return [{'city': city, 'temperature': 40.0, 'feels_like': 40.0, 'humidity': 50.0, 'wind_speed': 3.0,
+             'weather_condition': 'Clear', 'timestamp': timestamp} for city in cities]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=100)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--cycles', type=int, default=5)
+    args = parser.parse_args()
+    cities = [f"City{i}" for i in range(args.cities)]
+    thresholds = {'high_temperature': 35, 'low_temperature': 10}
+
+    print(f"{'streak':>7} {'list ms/check':>14} {'counter ms/check':>17}")
+    for length in args.lengths:
+        start = datetime(2026, 10, 18) + UPDATE * length
+        history = [start - UPDATE * i for i in range(length - 1, 0, -1)]
+        legacy = ListHistory(length)
+        manager = AlertManager(dict(thresholds, consecutive_updates=length))
+        manager.check_thresholds(readings(cities, start - UPDATE))
+
+        list_time = counter_time = 0.0
+        for cycle in range(args.cycles):
+            timestamp = start + UPDATE * cycle
+            legacy.alert_history = {city: [t + UPDATE * cycle for t in history] for city in cities}
+            manager.rule_engine._streaks[:] = length - 1
+            batch = readings(cities, timestamp)
+
+            begin = time.perf_counter()
+            assert len(legacy.check_thresholds(batch)) == len(cities)
+            list_time += time.perf_counter() - begin
+            begin = time.perf_counter()
+            assert len(manager.check_thresholds(batch)) == len(cities)
+            counter_time += time.perf_counter() - begin
+
+        print(f"{length:>7} {list_time / args.cycles * 1000:>14.2f} {counter_time / args.cycles * 1000:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
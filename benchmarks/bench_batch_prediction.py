@@ -0,0 +1,82 @@
+"""Time predicted temperature curves for many cities, point by point versus batched.
+
+Trains one model per city into a temporary directory, then scores every
+city's next --horizons hours once with one WeatherPredictor.predict call per
+point and once with a single predict_many call per city (BatchPredictor),
+and finally times a cached BatchPredictor lookup.
+
+Usage:
+    python benchmarks/bench_batch_prediction.py [--cities 6] [--horizons 24 120] [--trees 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from sklearn.ensemble import RandomForestRegressor
+from src.ml.batch_predictor import BatchPredictor
+from src.ml.model_registry import ModelRegistry
+from src.ml.weather_predictor import FEATURE_COLUMNS, WeatherPredictor
+
+
+def train(model_dir, city, trees):
+    start = datetime(2026, 10, 1)
+    data = [{'timestamp': start + timedelta(minutes=5 * i), 'temperature': 20 + (i * 7919) % 150 / 10,
+             'humidity': 40 + i % 50, 'wind_speed': (i % 80) / 10,
+             'weather_condition': ('Clear', 'Clouds', 'Rain')[i % 3]} for i in range(2016)]
+    predictor = WeatherPredictor(city, model_dir)
+    df = predictor.prepare_data(data)
+    predictor.model = RandomForestRegressor(n_estimators=trees, random_state=42)
+    predictor.model.fit(df[FEATURE_COLUMNS], df['temperature'])
+    predictor.save_model()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=6)
+    parser.add_argument('--horizons', type=int, nargs='+', default=[24, 120])
+    parser.add_argument('--trees', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        cities = [f"City{i}" for i in range(args.cities)]
+        for city in cities:
+            train(model_dir, city, args.trees)
+        registry = ModelRegistry(model_dir)
+        base = datetime(2026, 10, 18, 9, 40)
+        latest = {city: {'city': city, 'humidity': 55, 'wind_speed': 3.0, 'weather_condition': 'Clear',
+                         'timestamp': base} for city in cities}
+        for city in cities:
+            registry.get(city)
+
+        print(f"{'cities':>6} {'horizons':>9} {'per point ms':>13} {'batched ms':>11} {'cached ms':>10}")
+        for horizons in args.horizons:
+            batch_predictor = BatchPredictor(registry, horizons)
+            times, _ = batch_predictor.time_features(base)
+
+            start = time.perf_counter()
+            for city in cities:
+                predictor = registry.get(city)
+                for t in times:
+                    predictor.predict(t.hour, t.weekday(), t.month, 55, 3.0, 'Clear')
+            per_point = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch_predictor.curves(latest)
+            batched = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch_predictor.curves(latest)
+            cached = time.perf_counter() - start
+
+            print(f"{args.cities:>6} {horizons:>9} {per_point * 1000:>13.1f} {batched * 1000:>11.1f} "
+                  f"{cached * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
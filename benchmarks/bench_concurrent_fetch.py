@@ -0,0 +1,93 @@
+"""Benchmark WeatherAPI cycle time against a local stub HTTP server.
+
+Compares the sequential fetch path with the concurrent one for an increasing
+number of cities. The stub adds a fixed latency to every response so the
+numbers reflect network wait rather than JSON parsing.
+
+Usage:
+    python benchmarks/bench_concurrent_fetch.py [--latency 0.05] [--workers 16]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.api.weather_api import WeatherAPI
+from src.utils.logger import logger
+
+
+def make_handler(latency):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Buffer headers and body into one segment to avoid Nagle/delayed-ACK stalls
+        wbufsize = -1
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps({
+                "id": 1,
+                "coord": {"lat": 0.0, "lon": 0.0},
+                "weather": [{"main": "Clear"}],
+                "main": {"temp": 25.0, "feels_like": 26.0, "humidity": 60},
+                "wind": {"speed": 3.5},
+                "dt": int(time.time())
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def run_cycle(base_url, cities, max_in_flight):
+    api = WeatherAPI('bench', {
+        'max_in_flight': max_in_flight,
+        'rate_limit': {'requests_per_second': None}
+    })
+    api.BASE_URL = base_url
+    start = time.perf_counter()
+    results = api.get_weather_data(cities)
+    elapsed = time.perf_counter() - start
+    assert [r['city'] for r in results] == cities, "results out of order"
+    stats = api.connection_stats()
+    api.close()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='stub response latency in seconds')
+    parser.add_argument('--workers', type=int, default=16, help='max in-flight requests for concurrent mode')
+    parser.add_argument('--counts', type=int, nargs='+', default=[6, 50, 200, 500])
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/data/2.5/"
+
+    print(f"{'cities':>8} {'sequential (s)':>16} {'concurrent (s)':>16} {'speedup':>9} {'opened':>8} {'reused':>8}")
+    for count in args.counts:
+        cities = [f"City{i}" for i in range(count)]
+        sequential, _ = run_cycle(base_url, cities, 1)
+        concurrent, stats = run_cycle(base_url, cities, args.workers)
+        print(f"{count:>8} {sequential:>16.3f} {concurrent:>16.3f} {sequential / concurrent:>8.1f}x "
+              f"{stats['connections_opened']:>8} {stats['connections_reused']:>8}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Compare the dict-based DataProcessor with the columnar (pandas) one.
+
+Both processors handle the same synthetic batch: raw readings for --cities
+cities, one every 5 minutes. The dict path runs process() and then
+calculate_daily_summary() on the dicts; the columnar path builds the frame
+once, materializes the dicts the storage layer needs and summarizes per
+(city, day) straight from the frame. The forecast path is measured with 40
+three-hourly forecasts per city.
+
+Usage:
+    python benchmarks/bench_data_processor.py [--sizes 1000 100000 1000000] [--cities 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.data_processing.data_processor import ColumnarDataProcessor, DataProcessor
+
+CONDITIONS = ['Clear', 'Clouds', 'Rain', 'Haze', 'Mist']
+
+
+def generate_raw(size, cities):
+    start = 1697800000
+    return [{
+        'city': cities[i % len(cities)],
+        'temp': round(random.uniform(15, 40), 2),
+        'feels_like': round(random.uniform(15, 42), 2),
+        'humidity': random.randint(20, 95),
+        'wind_speed': round(random.uniform(0, 12), 2),
+        'main': random.choice(CONDITIONS),
+        'dt': start + 300 * (i // len(cities))
+    } for i in range(size)]
+
+
+def generate_forecast(cities):
+    start = 1697800000
+    return {city: [{
+        'dt': start + 10800 * i,
+        'temp': round(random.uniform(15, 40), 2),
+        'humidity': random.randint(20, 95),
+        'wind_speed': round(random.uniform(0, 12), 2),
+        'main': random.choice(CONDITIONS)
+    } for i in range(40)] for city in cities}
+
+
+def time_ingest(processor, raw):
+    """Return (seconds to build the stored dicts, seconds to summarize)"""
+    start = time.perf_counter()
+    if isinstance(processor, ColumnarDataProcessor):
+        batch = processor.to_frame(raw)
+        processor.to_records(batch)
+    else:
+        batch = processor.process(raw)
+    processed = time.perf_counter()
+    processor.calculate_daily_summary(batch)
+    return processed - start, time.perf_counter() - processed
+
+
+def time_forecast(processor, forecast):
+    start = time.perf_counter()
+    processor.summarize_forecast(processor.process_forecast(forecast))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--cities', type=int, default=50)
+    args = parser.parse_args()
+    random.seed(42)
+
+    cities = [f"City{i}" for i in range(args.cities)]
+    processors = [('dict', DataProcessor()), ('columnar', ColumnarDataProcessor())]
+
+    print(f"{'readings':>9} {'path':>9} {'process s':>10} {'summary s':>10} {'total s':>8} "
+          f"{'summary speedup':>16} {'total speedup':>14}")
+    for size in args.sizes:
+        raw = generate_raw(size, cities)
+        baseline = None
+        for name, processor in processors:
+            process_seconds, summary_seconds = time_ingest(processor, raw)
+            total_seconds = process_seconds + summary_seconds
+            baseline = baseline or (summary_seconds, total_seconds)
+            print(f"{size:>9} {name:>9} {process_seconds:>10.3f} {summary_seconds:>10.3f} {total_seconds:>8.3f} "
+                  f"{baseline[0] / summary_seconds:>15.1f}x {baseline[1] / total_seconds:>13.1f}x")
+
+    forecast = generate_forecast(cities)
+    print(f"\nForecast summary for {args.cities} cities x 40 forecasts")
+    for name, processor in processors:
+        print(f"{name:>9} {time_forecast(processor, forecast) * 1000:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
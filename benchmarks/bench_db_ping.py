@@ -0,0 +1,81 @@
+"""Micro-benchmark DBHandler throughput with and without a ping before every operation.
+
+Runs against mongomock by default, or against a real server with --uri
+(e.g. mongodb://localhost:27017/weather_bench). The "before" numbers
+re-create the old behaviour of pinging the server ahead of each call.
+
+Usage:
+    python benchmarks/bench_db_ping.py [--uri mongodb://localhost:27017/weather_bench] [--ops 2000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.database.db_handler import DBHandler
+from src.utils.logger import logger
+
+
+class PingingDBHandler(DBHandler):
+    """DBHandler that pings before every operation, like the previous health check"""
+
+    def _execute(self, operation, retry=True):
+        self.client.admin.command('ping')
+        return super()._execute(operation, retry)
+
+
+def measure(handler, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        if i % 2:
+            handler.get_recent_weather_data('Bench', limit=1)
+        else:
+            handler.store_weather_data([{
+                'city': 'Bench',
+                'temperature': 25.0,
+                'timestamp': datetime.utcnow() + timedelta(seconds=i)
+            }])
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uri', help='MongoDB URI of a local mongod (defaults to mongomock)')
+    parser.add_argument('--ops', type=int, default=2000)
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    config = {'host': 'localhost', 'port': 27017, 'name': 'weather_bench'}
+    if args.uri:
+        os.environ['MONGODB_URI'] = args.uri
+        patcher = None
+    else:
+        import mongomock
+        patcher = patch('src.database.db_handler.MongoClient', mongomock.MongoClient)
+        patcher.start()
+
+    results = {}
+    for label, handler_class in (('ping per op (before)', PingingDBHandler), ('lazy health (after)', DBHandler)):
+        handler = handler_class(config)
+        handler.weather_collection.delete_many({'city': 'Bench'})
+        results[label] = measure(handler, args.ops)
+        handler.weather_collection.delete_many({'city': 'Bench'})
+        handler.close()
+
+    backend = args.uri or 'mongomock'
+    print(f"Backend: {backend}, {args.ops} mixed insert/read operations")
+    for label, ops_per_sec in results.items():
+        print(f"{label:>22}: {ops_per_sec:10.0f} ops/sec")
+
+    if patcher:
+        patcher.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Time one dashboard prediction with and without the model registry, by model size.
+
+For each forest size a model is trained into a temporary directory, then a
+prediction is timed the way the dashboard used to do it (construct a
+WeatherPredictor and joblib.load its model) and through ModelRegistry.get;
+the last column is the registry lookup alone, without the forest's predict.
+
+Usage:
+    python benchmarks/bench_model_registry.py [--trees 10 100 500] [--requests 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from sklearn.ensemble import RandomForestRegressor
+from src.ml.model_registry import ModelRegistry
+from src.ml.weather_predictor import WeatherPredictor
+
+
+def train(model_dir, trees):
+    start = datetime(2026, 10, 1)
+    data = [{'timestamp': start + timedelta(minutes=5 * i), 'temperature': 20 + (i * 7919) % 150 / 10,
+             'humidity': 40 + i % 50, 'wind_speed': (i % 80) / 10,
+             'weather_condition': ('Clear', 'Clouds', 'Rain')[i % 3]} for i in range(2016)]
+    predictor = WeatherPredictor('Delhi', model_dir)
+    df = predictor.prepare_data(data)
+    predictor.model = RandomForestRegressor(n_estimators=trees, random_state=42)
+    predictor.model.fit(df[['hour', 'day_of_week', 'month', 'humidity', 'wind_speed', 'weather_condition']],
+                        df['temperature'])
+    predictor.save_model()
+    return os.path.getsize(predictor.model_path)
+
+
+def time_requests(get_predictor, requests, predict=True):
+    start = time.perf_counter()
+    for _ in range(requests):
+        predictor = get_predictor()
+        if predict:
+            predictor.predict(12, 3, 10, 55, 2.5, 'Clear')
+    return (time.perf_counter() - start) / requests * 1000
+
+
+def load_per_request(model_dir):
+    predictor = WeatherPredictor('Delhi', model_dir)
+    predictor.load_model()
+    return predictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trees', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+
+    print(f"{'trees':>6} {'model MB':>9} {'load/request ms':>16} {'registry ms':>12} {'lookup ms':>10}")
+    for trees in args.trees:
+        with tempfile.TemporaryDirectory() as model_dir:
+            size = train(model_dir, trees)
+            registry = ModelRegistry(model_dir)
+            registry.get('Delhi')
+            print(f"{trees:>6} {size / 2 ** 20:>9.1f} "
+                  f"{time_requests(lambda: load_per_request(model_dir), args.requests):>16.1f} "
+                  f"{time_requests(lambda: registry.get('Delhi'), args.requests):>12.1f} "
+                  f"{time_requests(lambda: registry.get('Delhi'), args.requests, predict=False):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
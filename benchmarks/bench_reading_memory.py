@@ -0,0 +1,83 @@
+"""Measure the memory held by processed readings in each representation.
+
+Compares the processed dicts returned by DataProcessor.process, a list of
+slotted Reading objects, and a packed ReadingBatch, all built from the same
+raw readings (--cities cities, one reading every 5 minutes). Memory is the
+tracemalloc delta while the processed readings are alive, reported per 1M readings.
+
+Usage:
+    python benchmarks/bench_reading_memory.py [--readings 1000000] [--cities 50]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.data_processing.data_processor import DataProcessor
+from src.data_processing.reading import Reading
+
+CONDITIONS = ['Clear', 'Clouds', 'Rain', 'Haze', 'Mist']
+
+
+def generate_raw(size, cities):
+    start = 1697800000
+    return [{
+        'city': cities[i % len(cities)],
+        'temp': round(random.uniform(15, 40), 2),
+        'feels_like': round(random.uniform(15, 42), 2),
+        'humidity': random.randint(20, 95),
+        'wind_speed': round(random.uniform(0, 12), 2),
+        'main': random.choice(CONDITIONS),
+        'dt': start + 300 * (i // len(cities))
+    } for i in range(size)]
+
+
+def measure(build, raw):
+    """Return (bytes held by the result, build seconds); timing is taken without tracemalloc"""
+    gc.collect()
+    start = time.perf_counter()
+    result = build(raw)
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    result = build(raw)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readings', type=int, default=1000000)
+    parser.add_argument('--cities', type=int, default=50)
+    args = parser.parse_args()
+    random.seed(42)
+
+    cities = [f"City{i}" for i in range(args.cities)]
+    raw = generate_raw(args.readings, cities)
+    processor = DataProcessor()
+    representations = [
+        ('dicts', processor.process),
+        ('Reading objects', lambda data: [Reading.from_raw(item) for item in data]),
+        ('ReadingBatch', processor.process_batch)
+    ]
+
+    scale = 1000000 / args.readings
+    print(f"{args.readings} readings, {args.cities} cities")
+    print(f"{'representation':>16} {'MB per 1M':>10} {'bytes/reading':>14} {'build s':>8}")
+    for name, build in representations:
+        size, elapsed = measure(build, raw)
+        print(f"{name:>16} {size * scale / 1e6:>10.1f} {size / args.readings:>14.1f} {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
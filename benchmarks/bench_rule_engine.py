@@ -0,0 +1,82 @@
+"""Time one alert check of many rules over many cities.
+
+Builds --rules comparison, rate-of-change and sustained rules with thresholds
+near the edges of each reading field's range and evaluates them against --cities readings per cycle, the
+way AlertManager.check_thresholds does every update.
+
+Usage:
+    python benchmarks/bench_rule_engine.py [--rules 1000 5000] [--cities 1000 5000] [--cycles 5] [--suppression]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.alerts.rule_engine import AlertRule, RuleEngine
+from src.data_processing.reading import ReadingBatch
+
+FIELDS = {'temperature': (10, 45), 'feels_like': (10, 48), 'humidity': (20, 100), 'wind_speed': (0, 20)}
+
+
+def make_rules(count):
+    rules = []
+    for i in range(count):
+        field = random.choice(list(FIELDS))
+        low, high = FIELDS[field]
+        # Thresholds sit in the outer few percent of each field's range, so alerts stay rare
+        margin = (high - low) * random.uniform(0, 0.05)
+        if i % 4 == 0:
+            rules.append(AlertRule(f'rule{i}', field, '>', (high - low) * 0.9, condition='rate_of_change'))
+        elif i % 2:
+            rules.append(AlertRule(f'rule{i}', field, '>', high - margin, sustained=random.randint(1, 4)))
+        else:
+            rules.append(AlertRule(f'rule{i}', field, '<', low + margin, sustained=random.randint(1, 4)))
+    return rules
+
+
+def make_batch(cities, timestamp):
+    return ReadingBatch({
+        'city': city,
+        'temperature': random.uniform(*FIELDS['temperature']),
+        'feels_like': random.uniform(*FIELDS['feels_like']),
+        'humidity': random.uniform(*FIELDS['humidity']),
+        'wind_speed': random.uniform(*FIELDS['wind_speed']),
+        'weather_condition': 'Clear',
+        'timestamp': timestamp
+    } for city in cities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--cities', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--suppression', action='store_true', help='enable the alert suppression index')
+    args = parser.parse_args()
+    random.seed(42)
+
+    print(f"{'rules':>6} {'cities':>7} {'ms/check':>9} {'alerts/check':>13}")
+    for rule_count in args.rules:
+        rules = make_rules(rule_count)
+        for city_count in args.cities:
+            engine = RuleEngine(rules, suppression={'enabled': args.suppression})
+            cities = [f"City{i}" for i in range(city_count)]
+            start_time = datetime(2026, 10, 18)
+            elapsed = 0.0
+            alerts = 0
+            for cycle in range(args.cycles):
+                batch = make_batch(cities, start_time + timedelta(minutes=5 * cycle))
+                start = time.perf_counter()
+                alerts += len(engine.evaluate(batch))
+                elapsed += time.perf_counter() - start
+            print(f"{rule_count:>6} {city_count:>7} {elapsed / args.cycles * 1000:>9.1f} "
+                  f"{alerts // args.cycles:>13}")
+
+
+if __name__ == '__main__':
+    main()
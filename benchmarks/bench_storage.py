@@ -0,0 +1,112 @@
+"""Compare ingest and 7/30-day query throughput across storage backends.
+
+Backends: the embedded SQLite engine, MongoDB through mongomock, and a real
+MongoDB server when --mongo-uri is given. Each backend ingests the same
+synthetic readings (one every 5 minutes per city over 30 days) in cycle-sized
+batches and then runs 7-day and 30-day historical queries for every city.
+
+Usage:
+    python benchmarks/bench_storage.py [--cities 6] [--days 30] [--mongo-uri mongodb://localhost:27017/weather_bench]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.database.storage import create_storage
+from src.utils.logger import logger
+
+CHART_FIELDS = {'_id': 0, 'timestamp': 1, 'temperature': 1, 'humidity': 1, 'wind_speed': 1}
+
+
+def generate_cycles(cities, days):
+    """Yield one batch of readings per 5-minute cycle, newest cycle last"""
+    now = datetime.utcnow()
+    cycles = days * 24 * 12
+    for i in range(cycles, 0, -1):
+        timestamp = now - timedelta(minutes=5 * i)
+        yield [{
+            'city': city,
+            'temperature': round(random.uniform(15, 40), 2),
+            'feels_like': round(random.uniform(15, 42), 2),
+            'humidity': random.randint(20, 95),
+            'wind_speed': round(random.uniform(0, 12), 2),
+            'weather_condition': random.choice(['Clear', 'Clouds', 'Rain', 'Haze']),
+            'timestamp': timestamp
+        } for city in cities]
+
+
+def run_backend(name, make_handler, cities, days):
+    handler = make_handler()
+    readings = 0
+    start = time.perf_counter()
+    for batch in generate_cycles(cities, days):
+        handler.store_weather_data(batch)
+        readings += len(batch)
+    ingest_seconds = time.perf_counter() - start
+
+    results = {'backend': name, 'ingest': readings / ingest_seconds}
+    for window in (7, 30):
+        start = time.perf_counter()
+        rows = 0
+        for city in cities:
+            rows += sum(1 for _ in handler.get_historical_weather_data(
+                city, days=window, projection=CHART_FIELDS, stream=True))
+        elapsed = time.perf_counter() - start
+        results[f'{window}d'] = len(cities) / elapsed
+        results[f'{window}d_rows'] = rows
+    handler.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=6)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--mongo-uri', help='benchmark a real MongoDB server as well')
+    parser.add_argument('--skip-mongomock', action='store_true')
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+    random.seed(42)
+
+    cities = [f"City{i}" for i in range(args.cities)]
+    tmp_dir = tempfile.TemporaryDirectory()
+    backends = [('sqlite', lambda: create_storage({'type': 'sqlite', 'path': os.path.join(tmp_dir.name, 'bench.db')}))]
+
+    if not args.skip_mongomock:
+        import mongomock
+
+        def make_mongomock():
+            with patch('src.database.db_handler.MongoClient', mongomock.MongoClient):
+                return create_storage({'type': 'mongodb', 'host': 'localhost', 'port': 27017, 'name': 'bench'})
+        backends.append(('mongomock', make_mongomock))
+
+    if args.mongo_uri:
+        def make_mongodb():
+            os.environ['MONGODB_URI'] = args.mongo_uri
+            handler = create_storage({'type': 'mongodb', 'name': 'weather_bench'})
+            handler.weather_collection.drop()
+            handler.latest_collection.drop()
+            return handler
+        backends.append(('mongodb', make_mongodb))
+
+    print(f"{args.cities} cities x {args.days} days, one reading per city every 5 minutes")
+    print(f"{'backend':>10} {'ingest rows/s':>14} {'7d queries/s':>13} {'30d queries/s':>14} {'30d rows':>9}")
+    for name, make_handler in backends:
+        result = run_backend(name, make_handler, cities, args.days)
+        print(f"{result['backend']:>10} {result['ingest']:>14.0f} {result['7d']:>13.1f} "
+              f"{result['30d']:>14.1f} {result['30d_rows']:>9}")
+
+    tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -71,9 +71,10 @@ def generate_static_files():
         
         # Try to connect to database and get data
         try:
-            from src.database.db_handler import DBHandler
-            db_handler = DBHandler(config['database'])
-            cities = db_handler.get_cities()
+            from src.database.storage import create_storage
+            db_handler = create_storage(config['database'])
+            latest_readings = db_handler.get_latest_for_all_cities()
+            cities = list(latest_readings)
             print(f"Successfully connected to database and found {len(cities)} cities")
         except Exception as e:
             print(f"Warning: Error connecting to database: {e}")
@@ -81,6 +82,7 @@ def generate_static_files():
             cities = config['cities']
             print(f"Using cities from config: {', '.join(cities)}")
             db_handler = None
+            latest_readings = {}
         
         # Generate a simple index.html if we can't properly connect to the database
         if not db_handler or not cities:
@@ -149,16 +151,31 @@ def generate_static_files():
         predictions = {}
         prediction_errors = {}
         aqi_data = {}
+
+        # Predicted curves from the trained models, one batched model call per city
+        prediction_curves = {}
+        try:
+            from src.ml.batch_predictor import BatchPredictor
+            from src.ml.model_registry import ModelRegistry
+            ml_settings = config.get('ml', {})
+            registry = ModelRegistry(ml_settings.get('model_dir', 'models'))
+            batch_predictor = BatchPredictor(registry, ml_settings.get('horizon_hours', 48))
+            prediction_curves = batch_predictor.curves(latest_readings)
+            print(f"Predicted temperature curves for {len(prediction_curves)} cities")
+        except Exception as e:
+            print(f"Warning: Error predicting temperatures: {e}")
         
         for city in cities:
             try:
                 # Get recent data
-                city_data_list = db_handler.get_recent_weather_data(city, limit=1) if db_handler else []
-                city_data = prepare_city_data(city_data_list[0] if city_data_list else None)
+                city_data = prepare_city_data(latest_readings.get(city))
                 latest_data[city] = city_data
                 
-                # Use placeholder predictions
-                predictions[city] = "See dashboard for live predictions"
+                if city in prediction_curves:
+                    prediction = BatchPredictor.at(prediction_curves[city], 24)
+                    predictions[city] = prediction if prediction is not None else "N/A"
+                else:
+                    predictions[city] = "See dashboard for live predictions"
             except Exception as e:
                 print(f"Warning: Error processing data for {city}: {e}")
                 latest_data[city] = prepare_city_data(None)
@@ -171,6 +188,7 @@ def generate_static_files():
                 latest_data=latest_data,
                 predictions=predictions,
                 prediction_errors=prediction_errors,
+                prediction_chart=BatchPredictor.chart_data(prediction_curves) if prediction_curves else None,
                 aqi_data=aqi_data,
                 datetime=datetime
             )
@@ -211,15 +229,21 @@ def generate_static_files():
                 city_dir = os.path.join('build', 'historical', city)
                 os.makedirs(city_dir, exist_ok=True)
                 
-                # Get minimal historical data
-                historical_data = db_handler.get_historical_weather_data(city, days=7) if db_handler else []
+                # Stream only the fields the chart needs
+                historical_data = db_handler.get_historical_weather_data(
+                    city, days=7,
+                    projection={'_id': 0, 'timestamp': 1, 'temperature': 1, 'humidity': 1, 'wind_speed': 1},
+                    stream=True
+                ) if db_handler else []
                 
                 dates = []
                 temps = []
                 humidity = []
                 wind = []
+                data_count = 0
                 
                 for record in historical_data:
+                    data_count += 1
                     if 'timestamp' in record:
                         dates.append(record['timestamp'].strftime('%Y-%m-%d %H:%M'))
                         temps.append(record.get('temperature', 0))
@@ -235,7 +259,7 @@ def generate_static_files():
                     humidity=json.dumps(humidity),
                     wind=json.dumps(wind),
                     days=7,
-                    data_count=len(historical_data)
+                    data_count=data_count
                 )
                 
                 with open(os.path.join(city_dir, 'index.html'), 'w', encoding='utf-8') as f:
@@ -1,14 +1,20 @@
+import asyncio
 import os
 import sys
+import threading
 import time
+from datetime import datetime, timedelta
 
 # Add the project root directory to the Python path
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
 from src.api.weather_api import WeatherAPI
-from src.data_processing.data_processor import DataProcessor
-from src.database.db_handler import DBHandler
+from src.data_processing.aggregator import StreamingAggregator
+from src.data_processing.data_processor import ColumnarDataProcessor, DataProcessor
+from src.database.storage import create_storage
+from src.database.write_buffer import WriteBehindBuffer
+from src.pipeline.async_pipeline import AsyncIngestPipeline, create_async_writer
 from src.alerts.alert_manager import AlertManager
 from src.visualization.visualizer import Visualizer
 from src.utils.logger import logger
@@ -17,45 +23,142 @@ from src.utils.config_loader import load_config
 def main():
     config = load_config()
     
-    weather_api = WeatherAPI(config['api_key'])
-    data_processor = DataProcessor()
-    db_handler = DBHandler(config['database'])
-    alert_manager = AlertManager(config['alert_thresholds'])
+    weather_api = WeatherAPI(config['api_key'], config.get('api'))
+    data_processor = ColumnarDataProcessor() if config['data_processing'].get('columnar') else DataProcessor()
+    db_handler = create_storage(config['database'])
+    alert_state = config.get('alert_state', {})
+    alert_manager = AlertManager(config['alert_thresholds'], config.get('alert_rules'),
+                                 state_path=alert_state.get('path'),
+                                 snapshot_interval=alert_state.get('snapshot_interval', 300),
+                                 dispatch=config.get('alert_dispatch'),
+                                 suppression=config.get('alert_suppression'))
     visualizer = Visualizer()
 
     update_interval = config['data_processing']['update_interval']
+    # Latest forecast summary per city, kept so unchanged cities still appear in visualizations
+    forecast_summaries = {}
+    # Daily summaries of the last week keyed by (city, date), updated on every commit
+    daily_summaries = {}
+    summaries_lock = threading.Lock()
 
-    while True:
-        try:
-            logger.info("Starting data update cycle")
-            
-            # Fetch current weather data
-            raw_data = weather_api.get_weather_data(config['cities'])
-            processed_data = data_processor.process(raw_data)
-            db_handler.store_weather_data(processed_data)
-            
-            daily_summary = data_processor.calculate_daily_summary(processed_data)
+    aggregator_settings = config['data_processing'].get('aggregator', {})
+    aggregator = None
+    if aggregator_settings.get('enabled', False):
+        aggregator = StreamingAggregator(
+            aggregator_settings.get('checkpoint_path', 'data/aggregator_checkpoint.json'),
+            percentiles=aggregator_settings.get('percentiles', []),
+            retention_days=aggregator_settings.get('retention_days', 7),
+            dedupe_window=aggregator_settings.get('dedupe_window', 288)
+        )
+
+    def on_weather_commit(readings):
+        if aggregator is not None:
+            # Update the running statistics of the touched days instead of re-reading their readings;
+            # only days missing from the checkpoint are read back once
+            aggregator.seed_missing_days(db_handler, readings)
+            daily_summary = aggregator.add_many(readings)
             db_handler.store_daily_summary(daily_summary)
-            
-            # Fetch and process forecast data
-            forecast_data = weather_api.get_forecast_data(config['cities'])
+            aggregator.prune()
+            aggregator.checkpoint()
+        else:
+            # Recompute the touched days from all stored readings, falling back to this batch only
+            daily_summary = db_handler.refresh_daily_summaries(readings)
+            if daily_summary is None:
+                daily_summary = data_processor.calculate_daily_summary(readings)
+                db_handler.store_daily_summary(daily_summary)
+        cutoff = datetime.now() - timedelta(days=7)
+        with summaries_lock:
+            for summary in daily_summary:
+                daily_summaries[(summary['city'], summary['date'])] = summary
+            for key in [key for key in daily_summaries if key[1] < cutoff]:
+                del daily_summaries[key]
+
+    write_behind = config['database'].get('write_behind', {})
+    write_buffer = None
+    if write_behind.get('enabled', False):
+        write_buffer = WriteBehindBuffer(
+            db_handler,
+            max_batch=write_behind.get('max_batch', 500),
+            max_delay=write_behind.get('max_delay', 30),
+            spill_path=write_behind.get('spill_path', 'data/ingest_spill.jsonl'),
+            on_commit=on_weather_commit
+        )
+        write_buffer.start()
+
+    def store_readings(readings):
+        if write_buffer:
+            write_buffer.add_readings(readings)
+        elif db_handler.store_weather_data(readings) is not None:
+            on_weather_commit(readings)
+
+    def finish_cycle(processed_data):
+        # Fetch and process forecast data, skipping cities whose forecast has not changed
+        forecast_data = weather_api.get_forecast_data(config['cities'], only_changed=True)
+        if weather_api.unchanged_forecasts:
+            logger.info(f"Skipped {len(weather_api.unchanged_forecasts)} unchanged forecasts this cycle")
+        if forecast_data:
             processed_forecast = data_processor.process_forecast(forecast_data)
             forecast_summary = data_processor.summarize_forecast(processed_forecast)
-            db_handler.store_forecast_summary(forecast_summary)
-            
-            alerts = alert_manager.check_thresholds(processed_data)
-            if alerts:
-                alert_manager.send_alerts(alerts)
-            
-            visualizer.update_visualizations(daily_summary, forecast_summary, alerts)
-
-            logger.info(f"Data update completed at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            
-            time.sleep(update_interval)
-
-        except Exception as e:
-            logger.error(f"Error in main loop: {str(e)}")
-            time.sleep(60)  # Wait a minute before retrying
+            if write_buffer:
+                write_buffer.add_forecast_summaries(forecast_summary)
+            else:
+                db_handler.store_forecast_summary(forecast_summary)
+            forecast_summaries.update(forecast_summary)
+
+        air_quality = weather_api.get_air_quality_data(config['cities']) if alert_manager.uses_air_quality else None
+        alerts = alert_manager.check_thresholds(processed_data, air_quality)
+        if alerts:
+            alert_manager.send_alerts(alerts)
+        alert_manager.save_state()
+
+        with summaries_lock:
+            recent_summaries = list(daily_summaries.values())
+        visualizer.update_visualizations(recent_summaries, forecast_summaries, alerts)
+
+        if write_buffer:
+            logger.info(f"Write-behind buffer: {write_buffer.metrics()}")
+        if alert_manager.dispatcher:
+            logger.info(f"Alert dispatch: {alert_manager.dispatcher.metrics()}")
+
+        logger.info(f"Data update completed at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    pipeline_settings = config.get('pipeline', {})
+    if pipeline_settings.get('mode', 'sequential') == 'async':
+        # Writes through the buffer stay synchronous; motor only replaces direct writes
+        async_writer = None
+        if pipeline_settings.get('db_driver', 'sync') == 'motor' and not write_buffer:
+            async_writer = create_async_writer(config['database'])
+        pipeline = AsyncIngestPipeline(weather_api, data_processor, config['cities'], store_readings,
+                                       finish_cycle, pipeline_settings, async_writer, on_weather_commit)
+        try:
+            asyncio.run(pipeline.run(update_interval))
+        finally:
+            if write_buffer:
+                write_buffer.close()
+            alert_manager.close()
+        return
+
+    try:
+        while True:
+            try:
+                logger.info("Starting data update cycle")
+
+                # Fetch current weather data
+                raw_data = weather_api.get_weather_data(config['cities'])
+                processed_data = data_processor.process_batch(raw_data)
+                store_readings(processed_data)
+                finish_cycle(processed_data)
+
+                time.sleep(update_interval)
+
+            except Exception as e:
+                logger.error(f"Error in main loop: {str(e)}")
+                time.sleep(60)  # Wait a minute before retrying
+    finally:
+        # Commit (or spill) buffered writes, deliver queued notifications and keep the streaks on shutdown
+        if write_buffer:
+            write_buffer.close()
+        alert_manager.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
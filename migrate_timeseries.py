@@ -0,0 +1,34 @@
+import sys
+from src.database.db_handler import DBHandler
+from src.utils.config_loader import load_config
+from dotenv import load_dotenv
+
+load_dotenv()  # Load environment variables from .env file
+
+def main():
+    """Move the existing weather_data collection to MongoDB time-series storage"""
+    drop_legacy = '--drop-legacy' in sys.argv
+
+    try:
+        config = load_config()
+    except Exception as e:
+        print(f"Error loading configuration: {e}")
+        return
+
+    # Enable time-series storage for this run regardless of the config flag
+    database_config = dict(config['database'])
+    database_config['timeseries'] = dict(database_config.get('timeseries') or {}, enabled=True)
+
+    db_handler = DBHandler(database_config)
+    try:
+        copied = db_handler.migrate_weather_data_to_timeseries(drop_legacy=drop_legacy)
+        print(f"Copied {copied} documents into the time-series weather_data collection")
+        if copied and not drop_legacy:
+            print("The original data is kept in weather_data_legacy; rerun with --drop-legacy to remove it")
+    except Exception as e:
+        print(f"Migration failed: {e}")
+    finally:
+        db_handler.close()
+
+if __name__ == "__main__":
+    main()
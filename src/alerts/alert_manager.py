@@ -1,16 +1,26 @@
-from datetime import datetime, timedelta
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import json
 import os
+import time
+from src.alerts.dispatcher import EmailSink, create_dispatcher, describe_alert
+from src.alerts.rule_engine import AlertRule, RuleEngine, rules_from_thresholds
 from src.utils.logger import logger
 
 class AlertManager:
-    def __init__(self, thresholds):
+    def __init__(self, thresholds, rules=None, max_gap_seconds=600, state_path=None, snapshot_interval=300,
+                 dispatch=None, suppression=None):
         self.high_temp_threshold = thresholds['high_temperature']
         self.low_temp_threshold = thresholds['low_temperature']
         self.consecutive_updates = thresholds['consecutive_updates']
-        self.alert_history = {}
+        # The legacy temperature thresholds plus any declarative rules from config['alert_rules']
+        self.rules = rules_from_thresholds(thresholds) + [AlertRule.from_config(rule) for rule in rules or []]
+        self.rule_engine = RuleEngine(self.rules, max_gap_seconds=max_gap_seconds, suppression=suppression)
+        # Air quality is only fetched for the checks when a rule needs it
+        self.uses_air_quality = any(rule.field.startswith('aqi') for rule in self.rules)
+        # Streak state is snapshotted to state_path so sustained alerts survive restarts
+        self.state_path = state_path
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = time.monotonic()
+        self.load_state()
         
         # Email configuration - should be set via environment variables
         self.email_enabled = os.environ.get('ENABLE_EMAIL_ALERTS', 'false').lower() == 'true'
@@ -24,98 +34,62 @@ class AlertManager:
         if self.email_enabled and (not self.smtp_username or not self.smtp_password):
             logger.warning("Email alerts enabled but SMTP credentials not configured properly")
 
-    def check_thresholds(self, weather_data):
-        alerts = []
-        for data in weather_data:
-            city = data['city']
-            temp = data['temperature']
-            timestamp = data['timestamp']
+        # Notifications are delivered by a background dispatcher (config['alert_dispatch'])
+        email_sink = None
+        if self.email_enabled:
+            email_sink = EmailSink(self.smtp_server, self.smtp_port, self.from_email, self.to_emails,
+                                   self.smtp_username, self.smtp_password)
+        self.dispatcher = create_dispatcher(dispatch or {}, email_sink)
 
-            if city not in self.alert_history:
-                self.alert_history[city] = {'high': [], 'low': []}
+    def check_thresholds(self, weather_data, air_quality=None):
+        """Evaluate every alert rule over a batch of readings (and optional {city: AQI data})"""
+        return self.rule_engine.evaluate(weather_data, air_quality)
 
-            # Check high temperature
-            if temp > self.high_temp_threshold:
-                self.alert_history[city]['high'].append(timestamp)
-                if len(self.alert_history[city]['high']) >= self.consecutive_updates:
-                    if self._check_consecutive(self.alert_history[city]['high']):
-                        alerts.append({
-                            'city': city,
-                            'type': 'high_temperature',
-                            'temperature': temp,
-                            'timestamp': timestamp
-                        })
-                        self.alert_history[city]['high'] = []
-            else:
-                self.alert_history[city]['high'] = []
-
-            # Check low temperature
-            if temp < self.low_temp_threshold:
-                self.alert_history[city]['low'].append(timestamp)
-                if len(self.alert_history[city]['low']) >= self.consecutive_updates:
-                    if self._check_consecutive(self.alert_history[city]['low']):
-                        alerts.append({
-                            'city': city,
-                            'type': 'low_temperature',
-                            'temperature': temp,
-                            'timestamp': timestamp
-                        })
-                        self.alert_history[city]['low'] = []
-            else:
-                self.alert_history[city]['low'] = []
+    def load_state(self):
+        """Restore the rule engine's streaks from the snapshot, starting fresh if it is missing or unreadable"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.rule_engine.restore(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Failed to load alert state from {self.state_path}: {str(e)}")
+            return
+        logger.info(f"Restored alert state of {len(self.rule_engine.city_index)} cities from {self.state_path}")
 
-        return alerts
+    def save_state(self, force=False):
+        """Snapshot the streaks to disk once snapshot_interval seconds passed since the last snapshot"""
+        if not self.state_path:
+            return
+        if not force and time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return
+        try:
+            directory = os.path.dirname(self.state_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            # Write to a temporary file first so a crash never leaves a truncated snapshot
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.rule_engine.state(), f)
+            os.replace(tmp_path, self.state_path)
+            self._last_snapshot = time.monotonic()
+        except OSError as e:
+            logger.error(f"Failed to write alert state to {self.state_path}: {str(e)}")
 
-    def _check_consecutive(self, timestamps):
-        if len(timestamps) < self.consecutive_updates:
-            return False
-        
-        for i in range(1, len(timestamps)):
-            if timestamps[i] - timestamps[i-1] > timedelta(minutes=10):  # Assuming updates every 5 minutes
-                return False
-        return True
+    describe = staticmethod(describe_alert)
 
     def send_alerts(self, alerts):
         # Always log the alerts
         for alert in alerts:
-            alert_msg = f"ALERT: {alert['type']} alert for {alert['city']}: {alert['temperature']}°C at {alert['timestamp']}"
+            alert_msg = f"ALERT: {self.describe(alert)}"
             logger.warning(alert_msg)
-        
-        # Send email alerts if enabled
-        if self.email_enabled and alerts and self.to_emails:
-            try:
-                self._send_email_alert(alerts)
-            except Exception as e:
-                logger.error(f"Failed to send email alerts: {str(e)}")
-    
-    def _send_email_alert(self, alerts):
-        """Send email notifications for alerts"""
-        if not self.email_enabled or not alerts:
-            return
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = self.from_email
-        msg['To'] = ', '.join(self.to_emails)
-        msg['Subject'] = f"Weather Alert: {len(alerts)} new weather condition alerts"
-        
-        # Build email body
-        body = "The following weather alerts have been triggered:\n\n"
-        for alert in alerts:
-            body += f"- {alert['city']}: {alert['type']} alert at {alert['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}, temperature: {alert['temperature']}°C\n"
-        
-        body += "\n\nThis is an automated message from your Weather Monitoring System."
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        try:
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-            server.send_message(msg)
-            server.quit()
-            logger.info(f"Email alert sent to {', '.join(self.to_emails)}")
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            raise
\ No newline at end of file
+
+        # Notifications are only queued here, so a slow mail server never delays the update cycle
+        if self.dispatcher and alerts:
+            self.dispatcher.submit(alerts)
+
+    def close(self):
+        """Deliver pending notifications and snapshot the alert state"""
+        if self.dispatcher:
+            self.dispatcher.close()
+        self.save_state(force=True)
@@ -0,0 +1,394 @@
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import requests
+from src.api.rate_limiter import TokenBucket
+from src.utils.logger import logger
+
+# Wakes the worker when the dispatcher is closed
+_STOP = object()
+
+
+def describe_alert(alert: Dict[str, Any]) -> str:
+    """One-line description of an alert for logs and notifications"""
+    if alert.get('field', 'temperature') == 'temperature' and alert.get('condition', 'value') == 'value':
+        reading = f"{alert['temperature']}°C"
+    else:
+        change = 'change of ' if alert.get('condition') == 'rate_of_change' else ''
+        reading = f"{alert['field']} {change}{alert['value']}"
+    # Repeats of an alert that stayed raised carry their escalation level
+    level = f" (level {alert['level']})" if alert.get('level', 1) > 1 else ''
+    return f"{alert['type']} alert{level} for {alert['city']}: {reading} at {alert['timestamp']}"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class AlertSink(ABC):
+    """A notification channel used by AlertDispatcher.
+
+    A sink delivers a list of alerts (one digest) to one of its
+    ``recipients``; rate limits and digests are kept per (sink, recipient).
+    ``send`` raises on failure so the dispatcher can retry the digest.
+    """
+
+    name = 'sink'
+
+    @property
+    @abstractmethod
+    def recipients(self) -> List[str]:
+        """The addresses, URLs or paths this sink delivers to"""
+
+    @abstractmethod
+    def send(self, recipient: str, alerts: List[Dict[str, Any]]):
+        """Deliver alerts to one recipient"""
+
+    def close(self):
+        """Release connections held by the sink"""
+
+
+class EmailSink(AlertSink):
+    """Sends digests over one SMTP connection that is kept open between sends.
+
+    The connection (and STARTTLS/login) is only set up again when the server
+    dropped it, e.g. after its idle timeout.
+    """
+
+    name = 'email'
+
+    def __init__(self, host: str, port: int, from_email: str, to_emails: Iterable[str],
+                 username: str = '', password: str = '', starttls: bool = True, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.from_email = from_email
+        self.to_emails = [email.strip() for email in to_emails if email.strip()]
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._server: Optional[smtplib.SMTP] = None
+
+    @property
+    def recipients(self) -> List[str]:
+        return self.to_emails
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        return server
+
+    def _message(self, recipient: str, alerts: List[Dict[str, Any]]) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = recipient
+        msg['Subject'] = f"Weather Alert: {len(alerts)} new weather condition alerts"
+        body = "The following weather alerts have been triggered:\n\n"
+        for alert in alerts:
+            body += f"- {describe_alert(alert)}\n"
+        body += "\n\nThis is an automated message from your Weather Monitoring System."
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def send(self, recipient: str, alerts: List[Dict[str, Any]]):
+        msg = self._message(recipient, alerts)
+        if self._server is not None:
+            try:
+                self._server.send_message(msg)
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # The server closed the idle connection; reconnect once below
+                self._discard()
+        self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._discard()
+            raise
+
+    def _discard(self):
+        if self._server is not None:
+            try:
+                self._server.close()
+            finally:
+                self._server = None
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard()
+
+
+class WebhookSink(AlertSink):
+    """POSTs digests as JSON to one or more URLs over a pooled requests.Session"""
+
+    name = 'webhook'
+
+    def __init__(self, urls: Iterable[str], timeout: float = 10.0, session: Optional[requests.Session] = None):
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    @property
+    def recipients(self) -> List[str]:
+        return self.urls
+
+    def send(self, recipient: str, alerts: List[Dict[str, Any]]):
+        body = json.dumps({'alerts': alerts, 'summary': [describe_alert(alert) for alert in alerts]},
+                          default=_json_default)
+        response = self.session.post(recipient, data=body, headers={'Content-Type': 'application/json'},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class FileSink(AlertSink):
+    """Appends every alert of a digest to a JSON-lines file"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def recipients(self) -> List[str]:
+        return [self.path]
+
+    def send(self, recipient: str, alerts: List[Dict[str, Any]]):
+        directory = os.path.dirname(recipient)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(recipient, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, default=_json_default) + '\n')
+
+
+class AlertDispatcher:
+    """Delivers alerts to the sinks from a background thread.
+
+    ``submit`` only puts the alerts on a bounded queue (dropping them if it
+    is full), so a slow or hung notification channel never stalls the update
+    cycle. Alerts for a recipient are coalesced into one digest for
+    ``digest_window`` seconds after the first of them arrived, and each
+    recipient gets its own token bucket of ``rate`` digests per second; a
+    recipient over its limit keeps collecting alerts into the next digest.
+    Failed digests are retried after ``retry_delay`` seconds, and at most
+    ``max_pending`` alerts are held per recipient.
+    """
+
+    def __init__(self, sinks: Iterable[AlertSink], queue_size: int = 100, digest_window: float = 0.0,
+                 rate: Optional[float] = None, burst: float = 1, retry_delay: float = 30.0,
+                 max_pending: int = 1000):
+        self.sinks = list(sinks)
+        self.digest_window = digest_window
+        self.retry_delay = retry_delay
+        self.max_pending = max_pending
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._targets: List[Tuple[AlertSink, str]] = [(sink, recipient) for sink in self.sinks
+                                                      for recipient in sink.recipients]
+        self._buckets = {target: TokenBucket(rate, burst) for target in self._targets}
+        # Alerts waiting per (sink, recipient) and the time their digest is due
+        self._pending: Dict[Tuple[AlertSink, str], List[Dict[str, Any]]] = {target: [] for target in self._targets}
+        self._due: Dict[Tuple[AlertSink, str], float] = {}
+        self._thread: Optional[threading.Thread] = None
+        # Set when close() gave up waiting for the worker, which then stops after its current send
+        self._abandoned = threading.Event()
+        self._closed = False
+
+        self.submitted_alerts = 0
+        self.dropped_alerts = 0
+        self.sent_digests = 0
+        self.sent_alerts = 0
+        self.failed_sends = 0
+
+    def start(self):
+        """Start the background delivery thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='alert-dispatch', daemon=True)
+            self._thread.start()
+
+    def submit(self, alerts: List[Dict[str, Any]]) -> bool:
+        """Queue alerts for delivery without blocking; return False if the queue is full"""
+        if not alerts or not self._targets:
+            return True
+        try:
+            self._queue.put_nowait(list(alerts))
+        except queue.Full:
+            self.dropped_alerts += len(alerts)
+            logger.warning(f"Alert dispatch queue full, dropped {len(alerts)} alerts")
+            return False
+        self.submitted_alerts += len(alerts)
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._wait_time())
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._finish()
+                self._queue.task_done()
+                return
+            if item is not None:
+                self._enqueue(item)
+            self._deliver(force=False)
+            if item is not None:
+                self._queue.task_done()
+
+    def _wait_time(self) -> float:
+        if not self._due:
+            return 1.0
+        return min(1.0, max(0.0, min(self._due.values()) - time.monotonic()))
+
+    def _enqueue(self, alerts: List[Dict[str, Any]]):
+        now = time.monotonic()
+        for target in self._targets:
+            pending = self._pending[target]
+            pending.extend(alerts)
+            if len(pending) > self.max_pending:
+                dropped = len(pending) - self.max_pending
+                del pending[:dropped]
+                self.dropped_alerts += dropped
+            self._due.setdefault(target, now + self.digest_window)
+
+    def _deliver(self, force: bool):
+        now = time.monotonic()
+        for target, due in list(self._due.items()):
+            if self._abandoned.is_set():
+                return
+            if not force and due > now:
+                continue
+            if not force and not self._buckets[target].try_acquire():
+                # Over the recipient's rate limit: keep collecting and look again in a second
+                self._due[target] = now + 1.0
+                continue
+            sink, recipient = target
+            alerts = self._pending[target]
+            try:
+                sink.send(recipient, alerts)
+            except Exception as e:
+                self.failed_sends += 1
+                self._due[target] = now + self.retry_delay
+                logger.error(f"Failed to send {len(alerts)} alerts via {sink.name} to {recipient}: {str(e)}")
+                continue
+            self._pending[target] = []
+            del self._due[target]
+            self.sent_digests += 1
+            self.sent_alerts += len(alerts)
+            logger.info(f"Sent {len(alerts)} alerts via {sink.name} to {recipient}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted alert was delivered; return False if it took longer than timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks or any(self._pending.values()):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _finish(self):
+        """Send every pending digest regardless of window and rate, then close the sinks"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._enqueue(item)
+            self._queue.task_done()
+        self._deliver(force=True)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"Failed to close {sink.name} alert sink: {str(e)}")
+
+    def close(self, timeout: float = 10.0):
+        """Let the worker send every pending digest regardless of window and rate, then close the sinks.
+
+        If the worker is still busy after ``timeout`` seconds (e.g. on a hung
+        sink) it is told to stop after its current send, and the alerts it
+        has not delivered are logged as dropped rather than sent from this
+        thread at the same time.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self._finish()
+            return
+
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            self._abandoned.set()
+            with self._queue.mutex:
+                queued = sum(len(item) for item in self._queue.queue if item is not _STOP)
+            undelivered = queued + sum(len(pending) for pending in self._pending.values())
+            self.dropped_alerts += undelivered
+            logger.error(f"Alert dispatcher did not finish within {timeout}s, "
+                         f"dropping {undelivered} undelivered alerts")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'pending_alerts': sum(len(pending) for pending in self._pending.values()),
+            'submitted_alerts': self.submitted_alerts,
+            'dropped_alerts': self.dropped_alerts,
+            'sent_digests': self.sent_digests,
+            'sent_alerts': self.sent_alerts,
+            'failed_sends': self.failed_sends
+        }
+
+
+def create_dispatcher(settings: Dict[str, Any], email_sink: Optional[EmailSink] = None) -> Optional[AlertDispatcher]:
+    """Build a started dispatcher from the alert_dispatch config section, or None without any sink"""
+    sinks: List[AlertSink] = [email_sink] if email_sink else []
+    if settings.get('webhooks'):
+        sinks.append(WebhookSink(settings['webhooks'], timeout=settings.get('timeout', 10)))
+    if settings.get('file'):
+        sinks.append(FileSink(settings['file']))
+    if not sinks:
+        return None
+    rate_limit = settings.get('rate_limit', {})
+    per_minute = rate_limit.get('per_minute')
+    dispatcher = AlertDispatcher(
+        sinks,
+        queue_size=settings.get('queue_size', 100),
+        digest_window=settings.get('digest_window', 0),
+        rate=per_minute / 60 if per_minute else None,
+        burst=rate_limit.get('burst', 1),
+        retry_delay=settings.get('retry_delay', 30)
+    )
+    dispatcher.start()
+    return dispatcher
@@ -0,0 +1,305 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.alerts.suppression import create_suppression
+from src.data_processing.reading import NUMERIC_FIELDS, ReadingBatch
+
+OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+CONDITIONS = ('value', 'rate_of_change')
+# Naive timestamps are compared as seconds from this epoch
+_EPOCH = datetime(1970, 1, 1)
+
+
+class AlertRule:
+    """One declarative alert condition.
+
+    ``field`` is a reading field (temperature, feels_like, humidity,
+    wind_speed) or an air quality value written as ``aqi`` or
+    ``aqi.<component>`` (e.g. ``aqi.pm2_5``). With ``condition:
+    rate_of_change`` the change since the city's previous update is compared
+    instead of the value. The rule fires once the comparison has held for
+    ``sustained`` consecutive updates, optionally only for ``cities``. With
+    suppression enabled, ``cooldown`` overrides the default repeat interval
+    and ``clear_threshold`` is the value the alert has to cross back before
+    it can fire again.
+    """
+
+    __slots__ = ('name', 'field', 'op', 'threshold', 'condition', 'sustained', 'cities', 'cooldown',
+                 'clear_threshold')
+
+    def __init__(self, name: str, field: str, op: str, threshold: float, condition: str = 'value',
+                 sustained: int = 1, cities: Optional[Iterable[str]] = None, cooldown: Optional[float] = None,
+                 clear_threshold: Optional[float] = None):
+        if op not in OPERATORS:
+            raise ValueError(f"Alert rule {name}: unknown operator {op!r}")
+        if condition not in CONDITIONS:
+            raise ValueError(f"Alert rule {name}: unknown condition {condition!r}")
+        if field not in NUMERIC_FIELDS and field != 'aqi' and not field.startswith('aqi.'):
+            raise ValueError(f"Alert rule {name}: unknown field {field!r}")
+        if int(sustained) < 1:
+            raise ValueError(f"Alert rule {name}: sustained must be at least 1")
+        if clear_threshold is not None:
+            # The clear threshold has to lie on the non-breaching side of the threshold
+            if op in ('==', '!=') or (op in ('>', '>=') and clear_threshold > threshold) or \
+                    (op in ('<', '<=') and clear_threshold < threshold):
+                raise ValueError(f"Alert rule {name}: clear_threshold {clear_threshold} does not bound "
+                                 f"'{op} {threshold}' from the other side")
+        self.name = name
+        self.field = field
+        self.op = op
+        self.threshold = float(threshold)
+        self.condition = condition
+        self.sustained = int(sustained)
+        self.cities = frozenset(cities) if cities else None
+        self.cooldown = None if cooldown is None else float(cooldown)
+        self.clear_threshold = None if clear_threshold is None else float(clear_threshold)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'AlertRule':
+        try:
+            return cls(config['name'], config['field'], config.get('op', '>'), config['threshold'],
+                       config.get('condition', 'value'), config.get('sustained', 1), config.get('cities'),
+                       config.get('cooldown'), config.get('clear_threshold'))
+        except KeyError as e:
+            raise ValueError(f"Alert rule {config.get('name', config)} is missing {e}") from None
+
+    def __repr__(self):
+        return f"AlertRule({self.name!r}, {self.field!r}, {self.op!r}, {self.threshold!r})"
+
+
+def rules_from_thresholds(thresholds: Dict[str, Any]) -> List[AlertRule]:
+    """Translate the legacy alert_thresholds section into the two temperature rules"""
+    consecutive = thresholds.get('consecutive_updates', 1)
+    # An optional hysteresis margin sets the clear thresholds below/above the alert thresholds
+    hysteresis = thresholds.get('hysteresis')
+    rules = []
+    if 'high_temperature' in thresholds:
+        high = thresholds['high_temperature']
+        rules.append(AlertRule('high_temperature', 'temperature', '>', high, sustained=consecutive,
+                               clear_threshold=None if hysteresis is None else high - hysteresis))
+    if 'low_temperature' in thresholds:
+        low = thresholds['low_temperature']
+        rules.append(AlertRule('low_temperature', 'temperature', '<', low, sustained=consecutive,
+                               clear_threshold=None if hysteresis is None else low + hysteresis))
+    return rules
+
+
+class RuleEngine:
+    """Evaluates compiled alert rules against whole batches of readings.
+
+    Rules are compiled once into arrays (field index, threshold, operator
+    groups, sustained counts), and each batch becomes a fields x cities value
+    matrix, so a check is a handful of NumPy operations over a rules x
+    cities matrix. Streaks are plain per-(rule, city) counters; a streak is
+    broken when the comparison fails or when more than ``max_gap_seconds``
+    passed since the city's previous update. ``suppression`` (the
+    alert_suppression config section) turns on the SuppressionIndex, so an
+    alert that stays raised is not repeated every ``sustained`` updates.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], max_gap_seconds: float = 600,
+                 suppression: Optional[Dict[str, Any]] = None):
+        self.rules = list(rules)
+        self.max_gap_seconds = max_gap_seconds
+        self.suppression = create_suppression(self.rules, OPERATORS, suppression)
+        self.fields = sorted({rule.field for rule in self.rules})
+        field_index = {field: i for i, field in enumerate(self.fields)}
+
+        self._field_idx = np.array([field_index[rule.field] for rule in self.rules], dtype=np.intp)
+        self._thresholds = np.array([rule.threshold for rule in self.rules], dtype=float)
+        self._sustained = np.array([rule.sustained for rule in self.rules], dtype=np.int32)
+        self._rate_idx = np.array([i for i, rule in enumerate(self.rules) if rule.condition == 'rate_of_change'],
+                                  dtype=np.intp)
+        self._op_groups = [
+            (OPERATORS[op], np.array([i for i, rule in enumerate(self.rules) if rule.op == op], dtype=np.intp))
+            for op in OPERATORS if any(rule.op == op for rule in self.rules)
+        ]
+        self._filtered = [i for i, rule in enumerate(self.rules) if rule.cities is not None]
+
+        # Per-city state, grown as new cities appear
+        self.city_index: Dict[str, int] = {}
+        self._streaks = np.zeros((len(self.rules), 0), dtype=np.int32)
+        self._previous = np.zeros((len(self.fields), 0), dtype=float)
+        self._last_seen = np.zeros(0, dtype=float)
+        self._city_mask = np.ones((len(self.rules), 0), dtype=bool)
+
+    def _index_cities(self, cities: List[str]) -> np.ndarray:
+        new = [city for city in dict.fromkeys(cities) if city not in self.city_index]
+        if new:
+            for city in new:
+                self.city_index[city] = len(self.city_index)
+            grow = len(new)
+            self._streaks = np.pad(self._streaks, ((0, 0), (0, grow)))
+            self._previous = np.pad(self._previous, ((0, 0), (0, grow)), constant_values=np.nan)
+            self._last_seen = np.pad(self._last_seen, (0, grow), constant_values=np.nan)
+            mask = np.ones((len(self.rules), grow), dtype=bool)
+            for i in self._filtered:
+                mask[i] = [city in self.rules[i].cities for city in new]
+            self._city_mask = np.concatenate([self._city_mask, mask], axis=1)
+            if self.suppression:
+                self.suppression.grow(grow)
+        return np.array([self.city_index[city] for city in cities], dtype=np.intp)
+
+    def _columns(self, readings, air_quality: Optional[Dict[str, Dict[str, Any]]]):
+        """Return cities, timestamps, a fields x readings value matrix and the readings' temperatures"""
+        if isinstance(readings, ReadingBatch):
+            cities = list(readings.cities)
+            timestamps = readings.timestamps()
+            columns = {field: readings.column(field) for field in NUMERIC_FIELDS}
+        else:
+            readings = list(readings)
+            cities = [reading['city'] for reading in readings]
+            timestamps = [reading['timestamp'] for reading in readings]
+            columns = {field: [reading.get(field, math.nan) for reading in readings]
+                       for field in NUMERIC_FIELDS}
+
+        values = np.full((len(self.fields), len(cities)), np.nan)
+        for i, field in enumerate(self.fields):
+            if field in columns:
+                values[i] = np.asarray(columns[field], dtype=float)
+            elif field.startswith('aqi') and air_quality:
+                values[i] = [self._air_quality_value(air_quality.get(city), field) for city in cities]
+        temperatures = np.asarray(columns['temperature'], dtype=float)
+        return cities, timestamps, values, temperatures
+
+    @staticmethod
+    def _air_quality_value(entry: Optional[Dict[str, Any]], field: str) -> float:
+        if not entry:
+            return math.nan
+        if field == 'aqi':
+            return entry.get('aqi', math.nan)
+        return entry.get('components', {}).get(field.split('.', 1)[1], math.nan)
+
+    def evaluate(self, readings, air_quality: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Check every rule against a batch and return the alerts that fired, in reading order"""
+        if not self.rules:
+            return []
+        cities, timestamps, values, temperatures = self._columns(readings, air_quality)
+        if not cities:
+            return []
+
+        # A batch normally holds one reading per city; later readings of a city go in later rounds
+        rounds: List[List[int]] = []
+        seen: Dict[str, int] = {}
+        for position in sorted(range(len(cities)), key=lambda i: timestamps[i]):
+            occurrence = seen.get(cities[position], 0)
+            seen[cities[position]] = occurrence + 1
+            if occurrence == len(rounds):
+                rounds.append([])
+            rounds[occurrence].append(position)
+
+        city_idx = self._index_cities(cities)
+        seconds = np.array([(timestamp - _EPOCH).total_seconds() for timestamp in timestamps])
+        fired_alerts = []
+        for positions in rounds:
+            positions = np.array(positions, dtype=np.intp)
+            fired, compared, levels = self._evaluate_round(city_idx[positions], seconds[positions],
+                                                           values[:, positions])
+            for rule_i, column in zip(*np.nonzero(fired)):
+                position = int(positions[column])
+                rule = self.rules[rule_i]
+                value = compared[rule_i, column]
+                fired_alerts.append((position, rule_i, {
+                    'city': cities[position],
+                    'type': rule.name,
+                    'field': rule.field,
+                    'condition': rule.condition,
+                    'value': None if math.isnan(value) else float(value),
+                    'threshold': rule.threshold,
+                    'temperature': None if math.isnan(temperatures[position]) else float(temperatures[position]),
+                    'timestamp': timestamps[position],
+                    'level': 1 if levels is None else int(levels[rule_i, column])
+                }))
+        fired_alerts.sort(key=lambda item: item[:2])
+        return [alert for _, _, alert in fired_alerts]
+
+    def _evaluate_round(self, city_idx: np.ndarray, seconds: np.ndarray, values: np.ndarray) -> Tuple:
+        """Update the streaks of one reading per city.
+
+        Returns the matrix of alerts to raise, the compared values and the
+        alerts' escalation levels (None without suppression).
+        """
+        # A gap longer than max_gap_seconds breaks every streak of that city
+        stale = (seconds - self._last_seen[city_idx]) > self.max_gap_seconds
+        streaks = self._streaks[:, city_idx]
+        streaks[:, stale] = 0
+
+        current = values[self._field_idx]
+        if self._rate_idx.size:
+            change = values - self._previous[:, city_idx]
+            # A previous value from before a gap (an outage or restart) is no baseline for a rate
+            change[:, stale] = np.nan
+            current[self._rate_idx] = change[self._field_idx[self._rate_idx]]
+
+        breached = np.zeros(current.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for compare, rule_idx in self._op_groups:
+                breached[rule_idx] = compare(current[rule_idx], self._thresholds[rule_idx, None])
+        if self._filtered:
+            breached &= self._city_mask[:, city_idx]
+
+        # Extend breached streaks, reset the others
+        streaks += 1
+        streaks *= breached
+        fired = streaks >= self._sustained[:, None]
+        # Start a new streak after firing, like the original consecutive-update check
+        streaks[fired] = 0
+        self._streaks[:, city_idx] = streaks
+
+        known = ~np.isnan(values)
+        previous = self._previous[:, city_idx]
+        self._previous[:, city_idx] = np.where(known, values, previous)
+        self._last_seen[city_idx] = seconds
+        if self.suppression:
+            notify, levels = self.suppression.apply(city_idx, seconds, current, breached, fired)
+            return notify, current, levels
+        return fired, current, None
+
+    def state(self) -> Dict[str, Any]:
+        """Return the per-city streak state as JSON-serializable data.
+
+        Streaks are keyed by rule name and city and only non-zero counters are
+        kept, so the snapshot stays small and still applies after rules were
+        added, removed or reordered in the config.
+        """
+        cities = list(self.city_index)
+        streaks = {}
+        for rule_i, column in zip(*np.nonzero(self._streaks)):
+            streaks.setdefault(self.rules[rule_i].name, {})[cities[column]] = int(self._streaks[rule_i, column])
+        return {
+            'cities': cities,
+            'streaks': streaks,
+            'previous': {field: [None if math.isnan(value) else float(value) for value in self._previous[i]]
+                         for i, field in enumerate(self.fields)},
+            'last_seen': [None if math.isnan(value) else float(value) for value in self._last_seen],
+            'suppression': self.suppression.state(cities) if self.suppression else {}
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Load a snapshot from ``state()``; rules, fields and cities it does not know are ignored"""
+        cities = state['cities']
+        city_idx = self._index_cities(cities)
+        last_seen = np.array([np.nan if value is None else value for value in state['last_seen']], dtype=float)
+        self._last_seen[city_idx] = last_seen
+        for i, field in enumerate(self.fields):
+            if field in state['previous']:
+                self._previous[i, city_idx] = [np.nan if value is None else value
+                                               for value in state['previous'][field]]
+        rule_index = {rule.name: i for i, rule in enumerate(self.rules)}
+        for name, counters in state['streaks'].items():
+            if name not in rule_index:
+                continue
+            rule_i = rule_index[name]
+            for city, count in counters.items():
+                # A lowered sustained count fires on the next breach instead of never
+                self._streaks[rule_i, self.city_index[city]] = min(count, self.rules[rule_i].sustained - 1)
+        if self.suppression:
+            self.suppression.restore(state.get('suppression', {}), self.city_index)
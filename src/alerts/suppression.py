@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+class SuppressionIndex:
+    """Tracks which (rule, city) alerts are currently raised, so each is notified once.
+
+    The state is three rules x cities arrays (active flag, escalation level
+    and time of the last notification), so a lookup is an array index and a
+    whole round is checked with a few vectorized operations. A raised alert
+    is repeated only after ``cooldown`` seconds of continued breach, one
+    escalation level higher each time (up to ``max_level``), and is cleared
+    once the value crosses the rule's ``clear_threshold`` (hysteresis) or,
+    without one, stops breaching the rule's threshold.
+    """
+
+    def __init__(self, rules, operators: Dict[str, Any], cooldown: float = 3600, max_level: int = 3):
+        self.rules = list(rules)
+        self.max_level = max_level
+        self._cooldowns = np.array([cooldown if rule.cooldown is None else rule.cooldown for rule in self.rules],
+                                   dtype=float)
+        self._clear_thresholds = np.array([rule.threshold if rule.clear_threshold is None else rule.clear_threshold
+                                           for rule in self.rules], dtype=float)
+        self._op_groups = [
+            (operators[op], np.array([i for i, rule in enumerate(self.rules) if rule.op == op], dtype=np.intp))
+            for op in operators if any(rule.op == op for rule in self.rules)
+        ]
+        self._active = np.zeros((len(self.rules), 0), dtype=bool)
+        self._levels = np.zeros((len(self.rules), 0), dtype=np.int8)
+        self._notified = np.zeros((len(self.rules), 0), dtype=float)
+
+    def grow(self, count: int):
+        """Add columns for ``count`` new cities"""
+        self._active = np.pad(self._active, ((0, 0), (0, count)))
+        self._levels = np.pad(self._levels, ((0, 0), (0, count)))
+        self._notified = np.pad(self._notified, ((0, 0), (0, count)))
+
+    def apply(self, city_idx: np.ndarray, seconds: np.ndarray, current: np.ndarray, breached: np.ndarray,
+              fired: np.ndarray):
+        """Return the (rule, reading) cells to notify and their escalation levels for one round"""
+        active = self._active[:, city_idx]
+        levels = self._levels[:, city_idx]
+        notified = self._notified[:, city_idx]
+
+        # Raised alerts hold until the value is back past the clear threshold; a missing value changes nothing
+        holding = np.zeros(current.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for compare, rule_idx in self._op_groups:
+                holding[rule_idx] = compare(current[rule_idx], self._clear_thresholds[rule_idx, None])
+        cleared = active & ~holding & ~np.isnan(current)
+        active &= ~cleared
+        levels[cleared] = 0
+
+        new = fired & ~active
+        repeat = active & breached & (seconds - notified >= self._cooldowns[:, None])
+        notify = new | repeat
+        levels[new] = 1
+        levels[repeat] = np.minimum(levels[repeat] + 1, self.max_level)
+        active |= new
+        notified = np.where(notify, seconds, notified)
+
+        self._active[:, city_idx] = active
+        self._levels[:, city_idx] = levels
+        self._notified[:, city_idx] = notified
+        return notify, levels
+
+    def state(self, cities: List[str]) -> Dict[str, Dict[str, List[float]]]:
+        """Return {rule name: {city: [level, last notification]}} for every raised alert"""
+        active = {}
+        for rule_i, column in zip(*np.nonzero(self._active)):
+            active.setdefault(self.rules[rule_i].name, {})[cities[column]] = [
+                int(self._levels[rule_i, column]), float(self._notified[rule_i, column])]
+        return active
+
+    def restore(self, active: Dict[str, Dict[str, List[float]]], city_index: Dict[str, int]):
+        rule_index = {rule.name: i for i, rule in enumerate(self.rules)}
+        for name, entries in active.items():
+            if name not in rule_index:
+                continue
+            rule_i = rule_index[name]
+            for city, (level, notified) in entries.items():
+                column = city_index[city]
+                self._active[rule_i, column] = True
+                self._levels[rule_i, column] = min(level, self.max_level)
+                self._notified[rule_i, column] = notified
+
+
+def create_suppression(rules, operators: Dict[str, Any],
+                       settings: Optional[Dict[str, Any]]) -> Optional[SuppressionIndex]:
+    """Build the index from the alert_suppression config section, or None if it is disabled"""
+    if not settings or not settings.get('enabled', False):
+        return None
+    return SuppressionIndex(rules, operators, cooldown=settings.get('cooldown', 3600),
+                            max_level=settings.get('max_level', 3))
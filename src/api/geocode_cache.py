@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+from src.utils.logger import logger
+
+
+class GeocodeCache:
+    """Persistent city -> coordinates (and provider city ID) index.
+
+    Entries are learned from regular weather responses, which already carry
+    ``coord`` and ``id``, and stored as JSON so lookups survive restarts.
+    A ``path`` of None keeps the index in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the index from disk, starting empty if the file is missing or unreadable"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            with self._lock:
+                self._entries = entries
+            logger.info(f"Loaded {len(entries)} geocode entries from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load geocode cache from {self.path}: {str(e)}")
+
+    def get(self, city: str) -> Optional[Tuple[float, float]]:
+        entry = self._entries.get(city)
+        if entry is None:
+            return None
+        return entry['lat'], entry['lon']
+
+    def set(self, city: str, lat: float, lon: float, city_id: Optional[int] = None):
+        """Record a city's coordinates, marking the index dirty only when they change"""
+        entry = {'lat': lat, 'lon': lon}
+        if city_id is not None:
+            entry['id'] = city_id
+        with self._lock:
+            if self._entries.get(city) != entry:
+                self._entries[city] = entry
+                self._dirty = True
+
+    def city_ids(self) -> Dict[str, int]:
+        return {city: entry['id'] for city, entry in self._entries.items() if 'id' in entry}
+
+    def save(self):
+        """Write the index to disk if it changed since the last save"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        tmp_path = None
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file of our own first, so a crash or a concurrent save by another
+            # thread or process (the collector and the dashboard share the file) never leaves a
+            # truncated index
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory or '.',
+                                             prefix=f"{os.path.basename(self.path)}.", suffix='.tmp',
+                                             delete=False) as f:
+                tmp_path = f.name
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._dirty = True
+            logger.error(f"Failed to save geocode cache to {self.path}: {str(e)}")
+
+    def __contains__(self, city: str):
+        return city in self._entries
+
+    def __len__(self):
+        return len(self._entries)
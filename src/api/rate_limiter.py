@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    ``acquire`` blocks until enough tokens are available, so callers from
+    several worker threads share a single request budget.
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        # A rate of None (or <= 0) disables limiting entirely
+        self.rate = rate if rate and rate > 0 else None
+        self.capacity = float(capacity) if capacity else 1.0
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until ``tokens`` tokens can be taken from the bucket"""
+        if self.rate is None:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` tokens if they are available right now; never blocks"""
+        if self.rate is None:
+            return True
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """Bounded in-memory cache for API responses.
+
+    Entries expire after a per-endpoint TTL and the least recently used
+    entries are evicted once either ``max_entries`` or ``max_bytes`` is
+    exceeded. Any object exposing the same ``get``/``set``/``clear``/``stats``
+    methods can be passed to ``WeatherAPI`` instead.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 300,
+                 max_entries: int = 1000, max_bytes: int = 10 * 1024 * 1024):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Approximate the memory cost of a cached value by its JSON length"""
+        return len(json.dumps(value, default=str))
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def _remove(self, cache_key: Tuple[str, str]):
+        _, _, size = self._entries.pop(cache_key)
+        self._bytes -= size
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        cache_key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(cache_key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return value
+
+    def set(self, endpoint: str, key: str, value: Any):
+        """Store a value and evict least recently used entries beyond the bounds"""
+        cache_key = (endpoint, key)
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            self._entries[cache_key] = (value, time.monotonic() + self.ttl_for(endpoint), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self, endpoint: Optional[str] = None):
+        """Drop all entries, or only those belonging to one endpoint"""
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for cache_key in [k for k in self._entries if k[0] == endpoint]:
+                self._remove(cache_key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,25 +1,143 @@
+import hashlib
+import json
 import requests
-from typing import List, Dict, Optional, Any
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Callable, Tuple
+import threading
 import time
 import random
+from src.api.rate_limiter import TokenBucket
+from src.api.response_cache import ResponseCache
+from src.api.geocode_cache import GeocodeCache
 from src.utils.logger import logger
 
+# Returned by _make_request_with_retry when the provider answers 304 Not Modified
+NOT_MODIFIED = object()
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts the requests it sends and the connections its pools open.
+
+    The counters live on the adapter rather than on urllib3's per-host
+    pools, which the PoolManager discards when it evicts a host, so they stay
+    correct for any number of hosts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self._counter_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        def counting(pool_class):
+            class CountingConnectionPool(pool_class):
+                def _new_conn(self):
+                    with adapter._counter_lock:
+                        adapter.connections_opened += 1
+                    return super()._new_conn()
+            return CountingConnectionPool
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting(pool_class) for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        with self._counter_lock:
+            self.requests_sent += 1
+        return super().send(request, *args, **kwargs)
+
+
 class WeatherAPI:
     BASE_URL = "http://api.openweathermap.org/data/2.5/"
     MAX_RETRIES = 3
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, settings: Optional[Dict[str, Any]] = None, cache: Optional[Any] = None):
+        settings = settings or {}
         self.api_key = api_key
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 300  # Cache duration in seconds
 
-    def _make_request_with_retry(self, url: str, params: Dict) -> Optional[Dict]:
-        """Make an API request with exponential backoff retry logic"""
+        # Bounded TTL+LRU response cache, replaceable by any object with the same interface
+        if cache is None:
+            cache_settings = settings.get('cache', {})
+            cache = ResponseCache(
+                ttls=cache_settings.get('ttl'),
+                default_ttl=cache_settings.get('default_ttl', 300),
+                max_entries=cache_settings.get('max_entries', 1000),
+                max_bytes=cache_settings.get('max_bytes', 10 * 1024 * 1024)
+            )
+        self.cache = cache
+
+        # Number of cities fetched concurrently (1 keeps the sequential behaviour)
+        self.max_in_flight = max(1, int(settings.get('max_in_flight', 1)))
+        # Shared request budget across all worker threads, replacing the fixed sleep
+        rate_limit = settings.get('rate_limit', {})
+        self.rate_limiter = TokenBucket(
+            rate_limit.get('requests_per_second', 1.0),
+            rate_limit.get('burst', 1)
+        )
+
+        # Bulk mode: fetch current conditions for many city IDs per request
+        bulk_settings = settings.get('bulk', {})
+        self.bulk_enabled = bulk_settings.get('enabled', False)
+        self.bulk_batch_size = max(1, int(bulk_settings.get('batch_size', 20)))
+        self.bulk_url = bulk_settings.get('url') or f"{self.BASE_URL}group"
+        # Persistent coordinates/ID index, filled as a side effect of current weather responses
+        self.geocode = GeocodeCache(settings.get('geocode_cache_path'))
+        # City name -> provider city ID, learned from regular responses or configured up front
+        self.city_ids: Dict[str, int] = self.geocode.city_ids()
+        self.city_ids.update(bulk_settings.get('city_ids') or {})
+
+        # Pooled keep-alive session shared by the retry path and all fetch methods
+        http_settings = settings.get('http', {})
+        self.session = requests.Session()
+        adapter = CountingHTTPAdapter(
+            pool_connections=http_settings.get('pool_connections', 4),  # Number of hosts kept pooled
+            pool_maxsize=http_settings.get('pool_maxsize', self.max_in_flight),  # Connections per host
+            pool_block=http_settings.get('pool_block', True)  # Never exceed pool_maxsize per host
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+
+        # (endpoint, key) -> ETag/Last-Modified validators, content hash and last payload
+        self._validators: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Cities whose forecast was unchanged in the last get_forecast_data(only_changed=True) call
+        self.unchanged_forecasts: List[str] = []
+
+    def _make_request_with_retry(self, url: str, params: Dict,
+                                 validator_key: Optional[Tuple[str, str]] = None) -> Any:
+        """Make an API request with exponential backoff retry logic.
+
+        When validator_key is given the request is made conditional on the
+        ETag/Last-Modified seen last time, and NOT_MODIFIED is returned on 304.
+        """
+        kwargs = {}
+        validator = self._validators.get(validator_key, {}) if validator_key else {}
+        headers = {}
+        if validator.get('etag'):
+            headers['If-None-Match'] = validator['etag']
+        if validator.get('last_modified'):
+            headers['If-Modified-Since'] = validator['last_modified']
+        if headers:
+            kwargs['headers'] = headers
+
         retry_count = 0
         while retry_count < self.MAX_RETRIES:
             try:
-                response = requests.get(url, params=params, timeout=10)
+                self.rate_limiter.acquire()
+                response = self.session.get(url, params=params, timeout=10, **kwargs)
+                if response.status_code == 304:
+                    return NOT_MODIFIED
                 response.raise_for_status()
+                if validator_key:
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    record = self._validators.setdefault(validator_key, {})
+                    record['etag'] = etag if isinstance(etag, str) else None
+                    record['last_modified'] = last_modified if isinstance(last_modified, str) else None
                 return response.json()
             except requests.RequestException as e:
                 retry_count += 1
@@ -34,188 +152,287 @@ class WeatherAPI:
         
         return None  # This line should not be reached due to the return in the exception handling
 
-    def get_weather_data(self, cities: List[str]) -> List[Dict]:
-        """Get current weather data for multiple cities with caching"""
-        weather_data = []
-        current_time = time.time()
-        
+    def _map_cities(self, fetch: Callable[[Any], Any], cities: List[Any]) -> List[Any]:
+        """Run fetch for every city (or batch of cities), concurrently if configured, keeping input order"""
+        if self.max_in_flight == 1 or len(cities) <= 1:
+            return [fetch(city) for city in cities]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(cities))) as executor:
+            return list(executor.map(fetch, cities))
+
+    def _fetch_current(self, city: str) -> Optional[Dict]:
+        """Fetch current weather for a single city, using the cache when fresh"""
+        # Check cache first
+        cached = self.cache.get('current', city)
+        if cached is not None:
+            logger.info(f"Using cached weather data for {city}")
+            return cached
+
+        params = {
+            "q": city,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+
+        data = self._make_request_with_retry(f"{self.BASE_URL}weather", params)
+
+        if not data:
+            logger.error(f"Failed to retrieve weather data for {city}")
+            return None
+
+        processed_data = self._build_current(city, data)
+        logger.info(f"Successfully retrieved weather data for {city}")
+        return processed_data
+
+    def _build_current(self, city: str, data: Dict) -> Dict:
+        """Convert a raw current-weather payload into the processed dict and cache it"""
+        if "id" in data:
+            self.city_ids[city] = data["id"]
+        if "coord" in data:
+            self.geocode.set(city, data["coord"]["lat"], data["coord"]["lon"], data.get("id"))
+
+        processed_data = {
+            "city": city,
+            "main": data["weather"][0]["main"],
+            "temp": data["main"]["temp"],
+            "feels_like": data["main"]["feels_like"],
+            "humidity": data["main"]["humidity"],
+            "wind_speed": data["wind"]["speed"],
+            "dt": data["dt"]
+        }
+
+        # Save to cache
+        self.cache.set('current', city, processed_data)
+        return processed_data
+
+    def _fetch_group(self, batch: List[str]) -> Dict[str, Dict]:
+        """Fetch current weather for a batch of resolved cities with one group request"""
+        id_to_city = {str(self.city_ids[city]): city for city in batch}
+        params = {
+            "id": ",".join(id_to_city),
+            "appid": self.api_key,
+            "units": "metric"
+        }
+
+        data = self._make_request_with_retry(self.bulk_url, params)
+        if not data:
+            logger.error(f"Failed to retrieve group weather data for {', '.join(batch)}")
+            return {}
+
+        results = {}
+        for item in data.get("list", []):
+            city = id_to_city.get(str(item.get("id")))
+            if city is None:
+                continue
+            try:
+                results[city] = self._build_current(city, item)
+            except (KeyError, IndexError) as e:
+                logger.error(f"Malformed group weather entry for {city}: {str(e)}")
+
+        missing = [city for city in batch if city not in results]
+        if missing:
+            logger.error(f"Group weather response missing data for {', '.join(missing)}")
+        logger.info(f"Retrieved weather data for {len(results)} cities in one group request")
+        return results
+
+    def get_weather_data_bulk(self, cities: List[str]) -> List[Dict]:
+        """Get current weather data using batched group requests where city IDs are known"""
+        results = {}
+        resolved = []
+        unresolved = []
         for city in cities:
-            cache_key = f"current_{city}"
-            # Check cache first
-            if cache_key in self.cache and current_time - self.cache[cache_key]['timestamp'] < self.cache_expiry:
+            cached = self.cache.get('current', city)
+            if cached is not None:
                 logger.info(f"Using cached weather data for {city}")
-                weather_data.append(self.cache[cache_key]['data'])
-                continue
-                
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            
-            data = self._make_request_with_retry(f"{self.BASE_URL}weather", params)
-            
-            if data:
-                processed_data = {
-                    "city": city,
-                    "main": data["weather"][0]["main"],
-                    "temp": data["main"]["temp"],
-                    "feels_like": data["main"]["feels_like"],
-                    "humidity": data["main"]["humidity"],
-                    "wind_speed": data["wind"]["speed"],
-                    "dt": data["dt"]
-                }
-                
-                # Save to cache
-                self.cache[cache_key] = {
-                    'data': processed_data,
-                    'timestamp': current_time
-                }
-                
-                weather_data.append(processed_data)
-                logger.info(f"Successfully retrieved weather data for {city}")
+                results[city] = cached
+            elif city in self.city_ids:
+                resolved.append(city)
             else:
-                logger.error(f"Failed to retrieve weather data for {city}")
-            
-            time.sleep(1)  # To avoid hitting rate limits
-            
-        return weather_data
-
-    def get_forecast_data(self, cities: List[str], days: int = 5) -> Dict[str, List[Dict]]:
-        """Get forecast data for multiple cities with caching"""
+                unresolved.append(city)
+
+        # Cities without a known ID go through the regular endpoint once, which records their ID
+        for city, data in zip(unresolved, self._map_cities(self._fetch_current, unresolved)):
+            if data:
+                results[city] = data
+
+        batches = [resolved[i:i + self.bulk_batch_size] for i in range(0, len(resolved), self.bulk_batch_size)]
+        for batch_results in self._map_cities(self._fetch_group, batches):
+            results.update(batch_results)
+
+        self.geocode.save()
+        return [results[city] for city in cities if city in results]
+
+    def get_weather_data(self, cities: List[str]) -> List[Dict]:
+        """Get current weather data for multiple cities with caching"""
+        if self.bulk_enabled:
+            return self.get_weather_data_bulk(cities)
+
+        results = self._map_cities(self._fetch_current, cities)
+        self.geocode.save()
+        return [data for data in results if data]
+
+    def _fetch_forecast(self, city: str, days: int) -> Optional[Tuple[List[Dict], bool]]:
+        """Fetch the forecast for a single city, returning it with a flag telling if it changed"""
+        cache_key = f"{city}_{days}"
+        validator_key = ('forecast', cache_key)
+        # Check cache first - a cached forecast is by definition one we already returned
+        cached = self.cache.get('forecast', cache_key)
+        if cached is not None:
+            logger.info(f"Using cached forecast data for {city}")
+            return cached, False
+
+        params = {
+            "q": city,
+            "appid": self.api_key,
+            "units": "metric",
+            "cnt": days * 8  # 8 forecasts per day
+        }
+
+        data = self._make_request_with_retry(f"{self.BASE_URL}forecast", params, validator_key)
+
+        if data is NOT_MODIFIED and 'data' in self._validators.get(validator_key, {}):
+            city_forecast = self._validators[validator_key]['data']
+            self.cache.set('forecast', cache_key, city_forecast)
+            logger.info(f"Forecast data for {city} not modified since last request")
+            return city_forecast, False
+
+        if not data or data is NOT_MODIFIED:
+            logger.error(f"Failed to retrieve forecast data for {city}")
+            return None
+
+        city_forecast = [
+            {
+                "dt": item["dt"],
+                "temp": item["main"]["temp"],
+                "main": item["weather"][0]["main"],
+                "humidity": item["main"]["humidity"],
+                "wind_speed": item["wind"]["speed"]
+            } for item in data["list"]
+        ]
+
+        # Fall back to a content hash for providers that send no validators
+        content_hash = hashlib.sha1(json.dumps(city_forecast, sort_keys=True).encode()).hexdigest()
+        record = self._validators.setdefault(validator_key, {})
+        changed = record.get('hash') != content_hash
+        record['hash'] = content_hash
+        record['data'] = city_forecast
+
+        # Save to cache
+        self.cache.set('forecast', cache_key, city_forecast)
+
+        logger.info(f"Successfully retrieved forecast data for {city}")
+        return city_forecast, changed
+
+    def get_forecast_data(self, cities: List[str], days: int = 5, only_changed: bool = False) -> Dict[str, List[Dict]]:
+        """Get forecast data for multiple cities with caching.
+
+        With only_changed=True, cities whose forecast is identical to the one
+        returned previously are left out and listed in unchanged_forecasts.
+        """
+        results = self._map_cities(lambda city: self._fetch_forecast(city, days), cities)
         forecast_data = {}
-        current_time = time.time()
-        
-        for city in cities:
-            cache_key = f"forecast_{city}_{days}"
-            # Check cache first
-            if cache_key in self.cache and current_time - self.cache[cache_key]['timestamp'] < self.cache_expiry:
-                logger.info(f"Using cached forecast data for {city}")
-                forecast_data[city] = self.cache[cache_key]['data']
+        self.unchanged_forecasts = []
+        for city, result in zip(cities, results):
+            if result is None:
+                continue
+            city_forecast, changed = result
+            if only_changed and not changed:
+                self.unchanged_forecasts.append(city)
                 continue
-            
+            forecast_data[city] = city_forecast
+        return forecast_data
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Return how many HTTP connections were opened vs reused by the session"""
+        adapters = [adapter for adapter in set(self.session.adapters.values())
+                    if isinstance(adapter, CountingHTTPAdapter)]
+        sent = sum(adapter.requests_sent for adapter in adapters)
+        opened = sum(adapter.connections_opened for adapter in adapters)
+        return {
+            'requests': sent,
+            'connections_opened': opened,
+            'connections_reused': max(sent - opened, 0)
+        }
+
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+
+    def clear_cache(self, endpoint: Optional[str] = None):
+        """Clear the API cache, optionally only for one endpoint ('current', 'forecast' or 'aqi')"""
+        self.cache.clear(endpoint)
+        if endpoint:
+            logger.info(f"API cache cleared for {endpoint}")
+        else:
+            logger.info("API cache cleared")
+
+    def _fetch_air_quality(self, city: str) -> Optional[Dict[str, Any]]:
+        """Fetch air quality for a single city, resolving its coordinates first"""
+        # Check cache first
+        cached = self.cache.get('aqi', city)
+        if cached is not None:
+            logger.info(f"Using cached AQI data for {city}")
+            return cached
+
+        try:
+            # Get coordinates for the city - from the geocode index or by calling the weather API
+            coordinates = self.geocode.get(city)
+            if coordinates:
+                lat, lon = coordinates
+                logger.info(f"Using stored coordinates for {city}: {lat}, {lon}")
+            else:
+                # Get coordinates from weather API - the response also refreshes the current weather cache
+                weather_params = {
+                    "q": city,
+                    "appid": self.api_key,
+                    "units": "metric"
+                }
+                weather_data = self._make_request_with_retry(f"{self.BASE_URL}weather", weather_params)
+                if not weather_data:
+                    logger.error(f"Failed to retrieve coordinates for {city}")
+                    return None
+
+                self._build_current(city, weather_data)
+                lat = weather_data['coord']['lat']
+                lon = weather_data['coord']['lon']
+                logger.info(f"Retrieved coordinates for {city}: {lat}, {lon}")
+
+            # Now make the air quality API call with coordinates
             params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": days * 8  # 8 forecasts per day
+                "lat": lat,
+                "lon": lon,
+                "appid": self.api_key
             }
-            
-            data = self._make_request_with_retry(f"{self.BASE_URL}forecast", params)
-            
-            if data:
-                city_forecast = [
-                    {
-                        "dt": item["dt"],
-                        "temp": item["main"]["temp"],
-                        "main": item["weather"][0]["main"],
-                        "humidity": item["main"]["humidity"],
-                        "wind_speed": item["wind"]["speed"]
-                    } for item in data["list"]
-                ]
-                
-                # Save to cache
-                self.cache[cache_key] = {
-                    'data': city_forecast,
-                    'timestamp': current_time
+
+            data = self._make_request_with_retry(f"{self.BASE_URL}air_pollution", params)
+
+            if data and 'list' in data and len(data['list']) > 0:
+                aqi_data = {
+                    "aqi": data['list'][0]['main']['aqi'],
+                    "components": {
+                        "co": data['list'][0]['components'].get('co', 0),
+                        "no2": data['list'][0]['components'].get('no2', 0),
+                        "o3": data['list'][0]['components'].get('o3', 0),
+                        "pm2_5": data['list'][0]['components'].get('pm2_5', 0),
+                        "pm10": data['list'][0]['components'].get('pm10', 0)
+                    },
+                    "dt": data['list'][0]['dt']
                 }
-                
-                forecast_data[city] = city_forecast
-                logger.info(f"Successfully retrieved forecast data for {city}")
-            else:
-                logger.error(f"Failed to retrieve forecast data for {city}")
-                
-            time.sleep(1)  # To avoid hitting rate limits
-            
-        return forecast_data
 
-    def clear_cache(self):
-        """Clear the API cache"""
-        self.cache = {}
-        logger.info("API cache cleared")
+                # Save to cache
+                self.cache.set('aqi', city, aqi_data)
+
+                logger.info(f"Successfully retrieved AQI data for {city}")
+                return aqi_data
+
+            logger.error(f"Failed to retrieve AQI data for {city}")
+            return None
+        except Exception as e:
+            logger.error(f"Error retrieving AQI data for {city}: {str(e)}")
+            return None
 
     def get_air_quality_data(self, cities: List[str]) -> Dict[str, Dict[str, Any]]:
         """Get air quality data for multiple cities by first getting coordinates"""
-        air_quality_data = {}
-        current_time = time.time()
-        
-        # City coordinates dictionary (to avoid extra API calls)
-        city_coordinates = {
-            'Delhi': [28.6139, 77.2090],
-            'Mumbai': [19.0760, 72.8777],
-            'Chennai': [13.0827, 80.2707],
-            'Bangalore': [12.9716, 77.5946],
-            'Kolkata': [22.5726, 88.3639],
-            'Hyderabad': [17.3850, 78.4867]
-        }
-        
-        for city in cities:
-            cache_key = f"aqi_{city}"
-            # Check cache first
-            if cache_key in self.cache and current_time - self.cache[cache_key]['timestamp'] < self.cache_expiry:
-                logger.info(f"Using cached AQI data for {city}")
-                air_quality_data[city] = self.cache[cache_key]['data']
-                continue
-            
-            try:
-                # Get coordinates for the city - either from our dictionary or by calling the weather API
-                if city in city_coordinates:
-                    lat, lon = city_coordinates[city]
-                    logger.info(f"Using stored coordinates for {city}: {lat}, {lon}")
-                else:
-                    # Get coordinates from weather API - we need to call the weather API first
-                    weather_params = {
-                        "q": city,
-                        "appid": self.api_key,
-                        "units": "metric"
-                    }
-                    weather_data = self._make_request_with_retry(f"{self.BASE_URL}weather", weather_params)
-                    if not weather_data:
-                        logger.error(f"Failed to retrieve coordinates for {city}")
-                        air_quality_data[city] = None
-                        continue
-                        
-                    lat = weather_data['coord']['lat']
-                    lon = weather_data['coord']['lon']
-                    logger.info(f"Retrieved coordinates for {city}: {lat}, {lon}")
-                
-                # Now make the air quality API call with coordinates
-                params = {
-                    "lat": lat,
-                    "lon": lon,
-                    "appid": self.api_key
-                }
-                
-                data = self._make_request_with_retry(f"{self.BASE_URL}air_pollution", params)
-                
-                if data and 'list' in data and len(data['list']) > 0:
-                    aqi_data = {
-                        "aqi": data['list'][0]['main']['aqi'],
-                        "components": {
-                            "co": data['list'][0]['components'].get('co', 0),
-                            "no2": data['list'][0]['components'].get('no2', 0),
-                            "o3": data['list'][0]['components'].get('o3', 0),
-                            "pm2_5": data['list'][0]['components'].get('pm2_5', 0),
-                            "pm10": data['list'][0]['components'].get('pm10', 0)
-                        },
-                        "dt": data['list'][0]['dt']
-                    }
-                    
-                    # Save to cache
-                    self.cache[cache_key] = {
-                        'data': aqi_data,
-                        'timestamp': current_time
-                    }
-                    
-                    air_quality_data[city] = aqi_data
-                    logger.info(f"Successfully retrieved AQI data for {city}")
-                else:
-                    logger.error(f"Failed to retrieve AQI data for {city}")
-                    air_quality_data[city] = None
-            except Exception as e:
-                logger.error(f"Error retrieving AQI data for {city}: {str(e)}")
-                air_quality_data[city] = None
-            
-            time.sleep(1)  # To avoid hitting rate limits
-        
-        return air_quality_data
\ No newline at end of file
+        results = self._map_cities(self._fetch_air_quality, cities)
+        self.geocode.save()
+        return dict(zip(cities, results))
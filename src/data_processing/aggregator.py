@@ -0,0 +1,363 @@
+import bisect
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from src.utils.logger import logger
+
+# Fields read back from storage to seed a day the aggregator holds no state for
+SEED_FIELDS = {'_id': 0, 'timestamp': 1, 'temperature': 1, 'humidity': 1, 'wind_speed': 1,
+               'weather_condition': 1}
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), min and max of a stream in constant memory"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 until two values were seen)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        stats.count = data['count']
+        stats.mean = data['mean']
+        stats.m2 = data['m2']
+        if stats.count:
+            stats.min = data['min']
+            stats.max = data['max']
+        return stats
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P-square algorithm (Jain & Chlamtac, 1985).
+
+    Five markers are kept whatever the stream length; the estimate is exact
+    until five values were seen.
+    """
+
+    __slots__ = ('p', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value: float):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+            if ((offset >= 1 and self.positions[i + 1] - self.positions[i] > 1)
+                    or (offset <= -1 and self.positions[i - 1] - self.positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                self.positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        n, q = self.positions, self.heights
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def _linear(self, i: int, step: int) -> float:
+        n, q = self.positions, self.heights
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            # Nearest-rank quantile of the values seen so far
+            index = min(len(self.heights) - 1, max(0, math.ceil(self.p * len(self.heights)) - 1))
+            return self.heights[index]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'p': self.p, 'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'P2Quantile':
+        estimator = cls(data['p'])
+        estimator.heights = data['heights']
+        estimator.positions = data['positions']
+        estimator.desired = data['desired']
+        return estimator
+
+
+class DailyAggregate:
+    """Running statistics of one city's readings on one day"""
+
+    __slots__ = ('temperature', 'humidity', 'wind_speed', 'conditions', 'percentiles')
+
+    def __init__(self, percentiles: Iterable[float] = ()):
+        self.temperature = RunningStats()
+        self.humidity = RunningStats()
+        self.wind_speed = RunningStats()
+        self.conditions: Dict[str, int] = {}
+        self.percentiles = [P2Quantile(p) for p in percentiles]
+
+    def add(self, reading: Dict[str, Any]):
+        self.temperature.add(reading['temperature'])
+        self.humidity.add(reading['humidity'])
+        self.wind_speed.add(reading['wind_speed'])
+        condition = reading['weather_condition']
+        self.conditions[condition] = self.conditions.get(condition, 0) + 1
+        for estimator in self.percentiles:
+            estimator.add(reading['temperature'])
+
+    def summary(self, city: str, date: datetime) -> Dict[str, Any]:
+        """Return the day's summary in the same shape as DataProcessor.calculate_daily_summary"""
+        summary = {
+            'city': city,
+            'date': date,
+            'avg_temperature': round(self.temperature.mean, 2),
+            'max_temperature': round(self.temperature.max, 2),
+            'min_temperature': round(self.temperature.min, 2),
+            'avg_humidity': round(self.humidity.mean, 2),
+            'avg_wind_speed': round(self.wind_speed.mean, 2),
+            'dominant_condition': max(self.conditions, key=self.conditions.get),
+            'sample_count': self.temperature.count,
+            'temperature_stddev': round(self.temperature.stddev, 2)
+        }
+        for estimator in self.percentiles:
+            summary[f"temperature_p{round(estimator.p * 100):g}"] = round(estimator.value(), 2)
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'temperature': self.temperature.to_dict(),
+            'humidity': self.humidity.to_dict(),
+            'wind_speed': self.wind_speed.to_dict(),
+            'conditions': self.conditions,
+            'percentiles': [estimator.to_dict() for estimator in self.percentiles]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DailyAggregate':
+        aggregate = cls()
+        aggregate.temperature = RunningStats.from_dict(data['temperature'])
+        aggregate.humidity = RunningStats.from_dict(data['humidity'])
+        aggregate.wind_speed = RunningStats.from_dict(data['wind_speed'])
+        aggregate.conditions = data['conditions']
+        aggregate.percentiles = [P2Quantile.from_dict(estimator) for estimator in data['percentiles']]
+        return aggregate
+
+
+class StreamingAggregator:
+    """Per-(city, day) daily summaries maintained one reading at a time.
+
+    Each day holds fixed-size statistics whatever the number of readings,
+    so summaries never need the day's raw data to be read back. To drop
+    readings replayed after a restart or from the write-behind spill, only
+    the latest ``dedupe_window`` timestamps counted per city are kept: a
+    late reading inside that window is still counted once, while one older
+    than the whole window is skipped unless its day holds no state yet. The
+    state is checkpointed as JSON; a ``checkpoint_path`` of None keeps it in
+    memory only.
+    """
+
+    def __init__(self, checkpoint_path: Optional[str] = None, percentiles: Iterable[float] = (),
+                 retention_days: int = 7, dedupe_window: int = 288):
+        self.checkpoint_path = checkpoint_path
+        self.percentiles = list(percentiles)
+        self.retention_days = retention_days
+        self.dedupe_window = max(1, dedupe_window)
+        self._days: Dict[Tuple[str, datetime], DailyAggregate] = {}
+        # Latest counted timestamps per city, sorted and at most dedupe_window long
+        self._recent: Dict[str, List[datetime]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _day(timestamp: datetime) -> datetime:
+        return datetime.combine(timestamp.date(), datetime.min.time())
+
+    def add(self, reading: Dict[str, Any]) -> bool:
+        """Fold one reading into its day's statistics; return False if it was already counted"""
+        city = reading['city']
+        timestamp = reading['timestamp']
+        key = (city, self._day(timestamp))
+        with self._lock:
+            recent = self._recent.setdefault(city, [])
+            index = bisect.bisect_left(recent, timestamp)
+            if index < len(recent) and recent[index] == timestamp:
+                return False
+            aggregate = self._days.get(key)
+            if index == 0 and len(recent) >= self.dedupe_window:
+                # Too old to tell whether it was counted; only a day without state cannot have it
+                if aggregate is not None:
+                    logger.warning(f"Skipped reading for {city} at {timestamp}: older than the dedupe window")
+                    return False
+            else:
+                recent.insert(index, timestamp)
+                if len(recent) > self.dedupe_window:
+                    del recent[0]
+            if aggregate is None:
+                aggregate = self._days[key] = DailyAggregate(self.percentiles)
+            aggregate.add(reading)
+            self._dirty = True
+            return True
+
+    def add_many(self, readings: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add readings and return the summaries of every (city, day) they touched"""
+        touched = []
+        for reading in sorted(readings, key=lambda r: r['timestamp']):
+            if self.add(reading):
+                key = (reading['city'], self._day(reading['timestamp']))
+                if key not in touched:
+                    touched.append(key)
+        return [self.summary(city, date) for city, date in touched]
+
+    def seed_missing_days(self, storage, readings: Iterable[Dict[str, Any]]) -> int:
+        """Fold the stored readings of every (city, day) in readings that the aggregator holds no state for.
+
+        Without this, a day whose state was lost with the checkpoint would be
+        summarised from the readings seen since startup only, and that summary
+        would overwrite the complete one in storage. The readings themselves
+        are skipped so that add_many still reports their days. Returns the
+        number of stored readings added.
+        """
+        readings = list(readings)
+        batch = {(reading['city'], reading['timestamp']) for reading in readings}
+        missing: Dict[str, Set[datetime]] = {}
+        with self._lock:
+            for city, timestamp in batch:
+                if (city, self._day(timestamp)) not in self._days:
+                    missing.setdefault(city, set()).add(self._day(timestamp))
+
+        added = 0
+        today = self._day(datetime.now())
+        for city, days in missing.items():
+            # One extra day covers storage filtering on UTC while readings carry local time
+            span = (today - min(days)).days + 2
+            try:
+                stored = storage.get_historical_weather_data(city, days=span, projection=SEED_FIELDS)
+            except Exception as e:
+                logger.error(f"Failed to read stored readings to seed the aggregates of {city}: {str(e)}")
+                continue
+            for reading in sorted(stored, key=lambda r: r['timestamp']):
+                if self._day(reading['timestamp']) in days and (city, reading['timestamp']) not in batch:
+                    added += self.add(dict(reading, city=city))
+        if added:
+            logger.info(f"Seeded daily aggregates with {added} stored readings")
+        return added
+
+    def summary(self, city: str, date: datetime) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            aggregate = self._days.get((city, self._day(date)))
+            return aggregate.summary(city, self._day(date)) if aggregate else None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Return the summaries of every day currently held, ordered by city and date"""
+        with self._lock:
+            return [aggregate.summary(city, date) for (city, date), aggregate in sorted(self._days.items())]
+
+    def prune(self, now: Optional[datetime] = None):
+        """Drop days older than retention_days"""
+        cutoff = self._day(now or datetime.now()) - timedelta(days=self.retention_days)
+        with self._lock:
+            for key in [key for key in self._days if key[1] < cutoff]:
+                del self._days[key]
+                self._dirty = True
+
+    def load(self):
+        """Restore the state from the checkpoint, starting empty if it is missing or unreadable"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            days = {}
+            for entry in state['days']:
+                key = (entry['city'], datetime.fromisoformat(entry['date']))
+                days[key] = DailyAggregate.from_dict(entry['aggregate'])
+            recent = {city: sorted(datetime.fromisoformat(value) for value in values)[-self.dedupe_window:]
+                      for city, values in state.get('recent', {}).items()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load aggregator checkpoint from {self.checkpoint_path}: {str(e)}")
+            return
+        with self._lock:
+            self._days = days
+            self._recent = recent
+        logger.info(f"Restored {len(days)} daily aggregates from {self.checkpoint_path}")
+
+    def checkpoint(self):
+        """Write the state to disk if it changed since the last checkpoint"""
+        if not self.checkpoint_path or not self._dirty:
+            return
+        with self._lock:
+            state = {
+                'days': [{'city': city, 'date': date.isoformat(), 'aggregate': aggregate.to_dict()}
+                         for (city, date), aggregate in self._days.items()],
+                'recent': {city: [value.isoformat() for value in recent] for city, recent in self._recent.items()}
+            }
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.checkpoint_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            # Write to a temporary file first so a crash never leaves a truncated checkpoint
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Failed to write aggregator checkpoint to {self.checkpoint_path}: {str(e)}")
+
+    def __len__(self):
+        return len(self._days)
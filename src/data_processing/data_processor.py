@@ -1,6 +1,10 @@
 from datetime import datetime
-from collections import defaultdict
-from typing import List, Dict, Any, Tuple, DefaultDict
+from collections import Counter, defaultdict
+from itertools import repeat
+from typing import List, Dict, Any, Tuple, DefaultDict, Union
+import numpy as np
+import pandas as pd
+from src.data_processing.reading import ReadingBatch
 
 class DataProcessor:
     def process(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -18,6 +22,10 @@ class DataProcessor:
             processed_data.append(processed_item)
         return processed_data
 
+    def process_batch(self, raw_data: List[Dict[str, Any]]) -> ReadingBatch:
+        """Process raw readings into a packed ReadingBatch instead of one dict per reading"""
+        return ReadingBatch.from_raw(raw_data)
+
     def calculate_daily_summary(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         summaries: Dict[Tuple[str, datetime.date], Dict[str, Any]] = {}
         for item in data:
@@ -103,7 +111,151 @@ class DataProcessor:
                     'min_temp': min(data['temps']),
                     'avg_humidity': sum(data['humidity']) / len(data['humidity']),
                     'avg_wind_speed': sum(data['wind_speed']) / len(data['wind_speed']),
-                    'dominant_condition': max(set(data['conditions']), key=data['conditions'].count)
+                    'dominant_condition': Counter(data['conditions']).most_common(1)[0][0]
                 } for date, data in city_summary.items()
             ]
-        return summary
\ No newline at end of file
+        return summary
+
+
+def _local_datetimes(epoch_seconds) -> np.ndarray:
+    """Convert epoch seconds to naive local datetimes exactly like datetime.fromtimestamp.
+
+    Readings of one cycle share a timestamp, so each distinct value is
+    converted once and broadcast back to every row.
+    """
+    unique, inverse = np.unique(np.asarray(epoch_seconds), return_inverse=True)
+    converted = np.array([datetime.fromtimestamp(value) for value in unique.tolist()], dtype='datetime64[us]')
+    return converted[inverse.reshape(-1)]
+
+
+def _categorical(values: List[Any]) -> pd.Categorical:
+    """Dictionary-encode strings: an integer code per row and each distinct value stored once"""
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object))
+
+
+# Processed column -> (raw API key, kind) for ColumnarDataProcessor
+RAW_READING_COLUMNS = {
+    'city': ('city', 'category'),
+    'temperature': ('temp', 'number'),
+    'feels_like': ('feels_like', 'number'),
+    'humidity': ('humidity', 'number'),
+    'wind_speed': ('wind_speed', 'number'),
+    'weather_condition': ('main', 'category'),
+    'timestamp': ('dt', 'epoch')
+}
+RAW_FORECAST_COLUMNS = {name: RAW_READING_COLUMNS[name]
+                        for name in ['timestamp', 'temperature', 'humidity', 'wind_speed', 'weather_condition']}
+
+
+def _processed_columns(raw_columns: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, str]]:
+    """Column spec for records that were already processed (keys renamed, datetimes instead of epochs)"""
+    return {name: (name, 'datetime' if kind == 'epoch' else kind) for name, (_, kind) in raw_columns.items()}
+
+
+class ColumnarDataProcessor(DataProcessor):
+    """DataProcessor that works on typed pandas columns instead of per-record dicts.
+
+    A batch is converted to columns once (strings dictionary-encoded,
+    timestamps as datetime64), the (city, date) summaries are vectorized
+    group-bys, and dicts are only built for the results handed to the
+    storage layer. Outputs match DataProcessor; process_forecast returns one
+    DataFrame per city instead of a list of dicts, and calculate_daily_summary
+    also accepts the DataFrame from to_frame.
+    """
+
+    @staticmethod
+    def _frame(records: List[Dict[str, Any]], columns: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+        data = {}
+        for name, (key, kind) in columns.items():
+            values = [record[key] for record in records]
+            if kind == 'category':
+                data[name] = _categorical(values)
+            elif kind == 'epoch':
+                data[name] = _local_datetimes(values)
+            elif kind == 'datetime':
+                data[name] = np.array(values, dtype='datetime64[us]')
+            else:
+                data[name] = np.asarray(values)
+        return pd.DataFrame(data)
+
+    def to_frame(self, raw_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Convert raw API readings into a DataFrame with the processed column names"""
+        return self._frame(raw_data, RAW_READING_COLUMNS)
+
+    @staticmethod
+    def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Materialize rows as dicts of native Python values (datetime, int, float, str)"""
+        columns = {}
+        for name in frame.columns:
+            column = frame[name]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                categories = column.cat.categories.tolist()
+                columns[name] = [categories[code] for code in column.cat.codes.tolist()]
+            elif pd.api.types.is_datetime64_any_dtype(column):
+                # Convert each distinct timestamp to a datetime once
+                codes, uniques = pd.factorize(column)
+                values = list(pd.DatetimeIndex(uniques).to_pydatetime())
+                columns[name] = [values[code] for code in codes.tolist()]
+            else:
+                columns[name] = column.tolist()
+        names = list(columns)
+        return list(map(dict, map(zip, repeat(names), zip(*columns.values()))))
+
+    def process(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self.to_records(self.to_frame(raw_data))
+
+    @staticmethod
+    def _dominant(frame: pd.DataFrame, keys: List[str], column: str) -> pd.Series:
+        """Most frequent value of column per group, ties going to the value seen first like the dict path"""
+        counts = (frame.assign(_order=np.arange(len(frame)))
+                  .groupby(keys + [column], sort=False, observed=True)['_order'].agg(['size', 'min'])
+                  .reset_index()
+                  .sort_values(['size', 'min'], ascending=[False, True], kind='stable'))
+        return counts.drop_duplicates(keys).set_index(keys)[column]
+
+    def _summarize(self, frame: pd.DataFrame, names: Dict[str, str], decimals: Union[int, None]) -> pd.DataFrame:
+        """Group frame by (city, date) and compute the summary columns named in names"""
+        frame = frame.assign(date=frame['timestamp'].dt.normalize())
+        keys = ['city', 'date']
+        stats = frame.groupby(keys, sort=False, observed=True).agg(**{
+            names['avg']: ('temperature', 'mean'),
+            names['max']: ('temperature', 'max'),
+            names['min']: ('temperature', 'min'),
+            'avg_humidity': ('humidity', 'mean'),
+            'avg_wind_speed': ('wind_speed', 'mean')
+        })
+        if decimals is not None:
+            stats = stats.round(decimals)
+        stats['dominant_condition'] = self._dominant(frame, keys, 'weather_condition')
+        return stats.reset_index()
+
+    def calculate_daily_summary(self, data: Union[pd.DataFrame, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        if not isinstance(data, pd.DataFrame):
+            data = self._frame(data, _processed_columns(RAW_READING_COLUMNS))
+        if data.empty:
+            return []
+        stats = self._summarize(data, {'avg': 'avg_temperature', 'max': 'max_temperature',
+                                       'min': 'min_temperature'}, 2)
+        return self.to_records(stats)
+
+    def process_forecast(self, forecast_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, pd.DataFrame]:
+        return {city: self._frame(forecasts, RAW_FORECAST_COLUMNS) for city, forecasts in forecast_data.items()}
+
+    def summarize_forecast(self, processed_forecast: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        frames = []
+        for city, forecasts in processed_forecast.items():
+            if not isinstance(forecasts, pd.DataFrame):
+                forecasts = self._frame(forecasts, _processed_columns(RAW_FORECAST_COLUMNS))
+            frames.append(forecasts.assign(city=city))
+        summary: Dict[str, List[Dict[str, Any]]] = {city: [] for city in processed_forecast}
+        if not frames:
+            return summary
+        # One group-by over all cities instead of one pass per city
+        frame = pd.concat(frames, ignore_index=True)
+        frame['city'] = _categorical(frame['city'].tolist())
+        frame['weather_condition'] = _categorical(frame['weather_condition'].astype(object).tolist())
+        stats = self._summarize(frame, {'avg': 'avg_temp', 'max': 'max_temp', 'min': 'min_temp'}, None)
+        for record in self.to_records(stats):
+            summary[record.pop('city')].append(record)
+        return summary
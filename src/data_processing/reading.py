@@ -0,0 +1,169 @@
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List
+
+READING_FIELDS = ('city', 'temperature', 'feels_like', 'humidity', 'wind_speed', 'weather_condition', 'timestamp')
+_FIELD_SET = frozenset(READING_FIELDS)
+NUMERIC_FIELDS = ('temperature', 'feels_like', 'humidity', 'wind_speed')
+
+# Timestamps are naive local datetimes throughout the system; batches store them as
+# microseconds from this naive epoch so the conversion round-trips exactly
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class Reading(Mapping):
+    """One processed weather reading as a slotted record.
+
+    City and condition strings are interned, so the thousands of readings of
+    a city share one string object. Readings are read-only mappings with the
+    same keys as the processed dicts, so existing ``reading['temperature']``
+    code keeps working; ``to_dict`` is the conversion used at the storage edge.
+    """
+
+    __slots__ = READING_FIELDS
+
+    def __init__(self, city: str, temperature: float, feels_like: float, humidity: int,
+                 wind_speed: float, weather_condition: str, timestamp: datetime):
+        self.city = sys.intern(city)
+        self.temperature = temperature
+        self.feels_like = feels_like
+        self.humidity = humidity
+        self.wind_speed = wind_speed
+        self.weather_condition = sys.intern(weather_condition)
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_raw(cls, item: Dict[str, Any]) -> 'Reading':
+        """Build a reading from a WeatherAPI current-weather dict"""
+        return cls(item['city'], item['temp'], item['feels_like'], item['humidity'], item['wind_speed'],
+                   item['main'], datetime.fromtimestamp(item['dt']))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Reading':
+        return cls(*(data[field] for field in READING_FIELDS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in READING_FIELDS}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(READING_FIELDS)
+
+    def __len__(self) -> int:
+        return len(READING_FIELDS)
+
+    def __repr__(self) -> str:
+        return f"Reading({', '.join(f'{field}={getattr(self, field)!r}' for field in READING_FIELDS)})"
+
+
+class ReadingBatch(Sequence):
+    """Struct-of-arrays container for many readings.
+
+    Each field is one column: interned strings in lists, numbers in
+    ``array('d')`` except humidity, which the API reports as a whole
+    percentage and is kept as ``array('l')`` so readings keep an int, and
+    timestamps as ``array('q')`` microseconds, i.e. about
+    56 bytes per reading instead of a dict plus its boxed values. Indexing and
+    iteration yield Reading objects built on demand; ``to_records`` turns the
+    batch into plain dicts for the database driver.
+    """
+
+    __slots__ = ('cities', 'conditions', 'temperature', 'feels_like', 'humidity', 'wind_speed', '_timestamps')
+
+    def __init__(self, readings: Iterable[Mapping] = ()):
+        self.cities: List[str] = []
+        self.conditions: List[str] = []
+        self.temperature = array('d')
+        self.feels_like = array('d')
+        self.humidity = array('l')
+        self.wind_speed = array('d')
+        self._timestamps = array('q')
+        self.extend(readings)
+
+    @classmethod
+    def from_raw(cls, raw_data: Iterable[Dict[str, Any]]) -> 'ReadingBatch':
+        """Build a batch straight from WeatherAPI current-weather dicts, one column at a time"""
+        raw_data = list(raw_data)
+        batch = cls()
+        batch.cities = [sys.intern(item['city']) for item in raw_data]
+        batch.conditions = [sys.intern(item['main']) for item in raw_data]
+        batch.temperature = array('d', [item['temp'] for item in raw_data])
+        batch.feels_like = array('d', [item['feels_like'] for item in raw_data])
+        batch.humidity = array('l', [item['humidity'] for item in raw_data])
+        batch.wind_speed = array('d', [item['wind_speed'] for item in raw_data])
+        # Readings of one cycle share a timestamp, so convert each distinct value once
+        micros: Dict[int, int] = {}
+        for item in raw_data:
+            if item['dt'] not in micros:
+                micros[item['dt']] = (datetime.fromtimestamp(item['dt']) - _EPOCH) // _MICROSECOND
+        batch._timestamps = array('q', [micros[item['dt']] for item in raw_data])
+        return batch
+
+    def _append(self, city, temperature, feels_like, humidity, wind_speed, weather_condition, timestamp):
+        self.cities.append(sys.intern(city))
+        self.temperature.append(temperature)
+        self.feels_like.append(feels_like)
+        # Backends with REAL columns return humidity as a float
+        self.humidity.append(int(humidity))
+        self.wind_speed.append(wind_speed)
+        self.conditions.append(sys.intern(weather_condition))
+        self._timestamps.append((timestamp - _EPOCH) // _MICROSECOND)
+
+    def append(self, reading: Mapping):
+        self._append(*(reading[field] for field in READING_FIELDS))
+
+    def extend(self, readings: Iterable[Mapping]):
+        for reading in readings:
+            self.append(reading)
+
+    def timestamps(self) -> List[datetime]:
+        return [_EPOCH + timedelta(microseconds=value) for value in self._timestamps]
+
+    def column(self, field: str) -> Sequence:
+        """Return one field for every reading (a list or an array)"""
+        if field == 'city':
+            return self.cities
+        if field == 'weather_condition':
+            return self.conditions
+        if field == 'timestamp':
+            return self.timestamps()
+        if field in NUMERIC_FIELDS:
+            return getattr(self, field)
+        raise KeyError(field)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadingBatch(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        return Reading(self.cities[index], self.temperature[index], self.feels_like[index], self.humidity[index],
+                       self.wind_speed[index], self.conditions[index],
+                       _EPOCH + timedelta(microseconds=self._timestamps[index]))
+
+    def __iter__(self) -> Iterator[Reading]:
+        for row in zip(self.cities, self.temperature, self.feels_like, self.humidity, self.wind_speed,
+                       self.conditions, self.timestamps()):
+            yield Reading(*row)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize the batch as plain dicts, e.g. for BSON encoding"""
+        return [dict(zip(READING_FIELDS, row))
+                for row in zip(self.cities, self.temperature, self.feels_like, self.humidity, self.wind_speed,
+                               self.conditions, self.timestamps())]
+
+
+def to_documents(data: Iterable[Mapping]) -> List[Dict[str, Any]]:
+    """Convert readings of any representation into mutable dicts for a database driver"""
+    if isinstance(data, ReadingBatch):
+        return data.to_records()
+    return [reading.to_dict() if isinstance(reading, Reading) else reading for reading in data]
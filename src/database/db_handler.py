@@ -1,10 +1,55 @@
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, UpdateOne, errors
 from datetime import datetime, timedelta
+import threading
 import time
 import os
+from urllib.parse import urlsplit
+from src.data_processing.reading import to_documents
+from src.database.storage import StorageBackend
 from src.utils.logger import logger
 
-class DBHandler:
+def latest_operations(data):
+    """Build the latest_weather upserts for the newest reading of each city in data"""
+    newest = {}
+    for reading in data:
+        current = newest.get(reading['city'])
+        if current is None or reading['timestamp'] > current['timestamp']:
+            newest[reading['city']] = reading
+
+    # The timestamp guard leaves newer documents alone; the upsert then hits the unique
+    # city index, and that duplicate key error is expected and ignored
+    return [
+        UpdateOne(
+            {'city': city, 'timestamp': {'$lte': reading['timestamp']}},
+            {'$set': {key: value for key, value in reading.items() if key != '_id'}},
+            upsert=True
+        ) for city, reading in newest.items()
+    ]
+
+
+def mongo_connection_settings(config):
+    """Return the MongoClient keyword arguments and the database name for a database config.
+
+    MONGODB_URI, when set, wins over host and port, and the database named in
+    its path wins over ``config['name']``. Both the pymongo and the motor
+    client are built from these settings, so they share a database and write
+    concern.
+    """
+    options = {
+        'serverSelectionTimeoutMS': 5000,
+        'maxPoolSize': 50,
+        'connectTimeoutMS': 5000,
+        'retryWrites': True,
+        'w': 'majority'
+    }
+    mongodb_uri = os.environ.get('MONGODB_URI')
+    if mongodb_uri:
+        db_name = urlsplit(mongodb_uri).path.lstrip('/') or config['name']
+        return dict(options, host=mongodb_uri), db_name
+    return dict(options, host=config['host'], port=config['port']), config['name']
+
+
+class DBHandler(StorageBackend):
     def __init__(self, config):
         self.config = config
         self.client = None
@@ -12,57 +57,58 @@ class DBHandler:
         self.weather_collection = None
         self.summary_collection = None
         self.forecast_collection = None
+        self.latest_collection = None
+        # Maximum number of operations sent in a single bulk_write call
+        self.bulk_chunk_size = config.get('bulk_chunk_size', 1000)
+        # Documents fetched per round trip when streaming cursor results
+        self.cursor_batch_size = config.get('cursor_batch_size', 1000)
+        # Opt-in time-series storage for weather_data
+        self.timeseries_config = config.get('timeseries', {})
+        self._reconnect_lock = threading.Lock()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
         self._connect()
+        # Optional background health check; 0 relies purely on reconnect-on-failure
+        heartbeat_interval = config.get('heartbeat_interval', 0)
+        if heartbeat_interval:
+            self._start_heartbeat(heartbeat_interval)
         
     def _connect(self, max_retries=3):
         """Establish connection to MongoDB with retry logic"""
         retries = 0
         while retries < max_retries:
             try:
-                # Check for MongoDB URI in environment variables
-                mongodb_uri = os.environ.get('MONGODB_URI')
-                
-                if mongodb_uri:
-                    # Connect using MongoDB URI from environment
-                    self.client = MongoClient(mongodb_uri, 
-                                             serverSelectionTimeoutMS=5000,
-                                             maxPoolSize=50,
-                                             connectTimeoutMS=5000,
-                                             retryWrites=True,
-                                             w='majority')
+                client_options, db_name = mongo_connection_settings(self.config)
+
+                if self.client:
+                    # Release the pool of a previous, broken connection
+                    self.client.close()
+
+                self.client = MongoClient(**client_options)
+                if os.environ.get('MONGODB_URI'):
                     logger.info("Connecting to MongoDB using URI from environment")
                 else:
-                    # Fall back to connection using host and port
-                    self.client = MongoClient(
-                        host=self.config['host'],
-                        port=self.config['port'],
-                        serverSelectionTimeoutMS=5000,
-                        maxPoolSize=50,
-                        connectTimeoutMS=5000,
-                        retryWrites=True,
-                        w='majority'
-                    )
                     logger.info("Connecting to MongoDB using host and port configuration")
-                
+
                 # Test the connection
                 self.client.admin.command('ping')
-                
-                # Get database from URI or use configured name
-                if mongodb_uri:
-                    # Extract database name from URI or use the configured name
-                    db_name = mongodb_uri.split('/')[-1].split('?')[0] or self.config['name']
-                    self.db = self.client[db_name]
-                else:
-                    self.db = self.client[self.config['name']]
-                    
+                self.db = self.client[db_name]
+
+                if self.timeseries_config.get('enabled'):
+                    self._ensure_timeseries_collection()
+
                 self.weather_collection = self.db['weather_data']
                 self.summary_collection = self.db['daily_summaries']
                 self.forecast_collection = self.db['forecast_data']
+                # Materialized newest reading per city, kept up to date by store_weather_data
+                self.latest_collection = self.db['latest_weather']
                 
                 # Create indexes for better query performance
                 self.weather_collection.create_index([("city", 1), ("timestamp", -1)])
                 self.summary_collection.create_index([("city", 1), ("date", -1)])
+                self._ensure_summary_key_index()
                 self.forecast_collection.create_index([("city", 1), ("date", -1)])
+                self.latest_collection.create_index([("city", 1)], unique=True)
                 
                 logger.info("Successfully connected to MongoDB")
                 return
@@ -75,129 +121,450 @@ class DBHandler:
                 
         raise ConnectionError("Failed to connect to MongoDB after multiple attempts")
     
-    def _ensure_connection(self):
-        """Ensure an active MongoDB connection, reconnect if necessary"""
+    def _ensure_summary_key_index(self):
+        """Create the unique (city, date) index that $merge needs to match daily summaries"""
         try:
-            # Check if the connection is still alive
-            self.client.admin.command('ping')
-        except (errors.ConnectionFailure, errors.ServerSelectionTimeoutError, AttributeError):
-            logger.warning("MongoDB connection lost, attempting to reconnect")
+            self.summary_collection.create_index([("city", 1), ("date", 1)], unique=True)
+        except errors.OperationFailure as e:
+            logger.warning(f"Could not create unique daily summary index (duplicate summaries?): {str(e)}")
+
+    def _is_timeseries(self, name='weather_data'):
+        return 'timeseries' in self.db[name].options()
+
+    def _create_timeseries_collection(self, name='weather_data'):
+        """Create a time-series collection bucketed by city with the configured retention"""
+        options = {
+            'timeseries': {
+                'timeField': 'timestamp',
+                'metaField': 'city',
+                'granularity': self.timeseries_config.get('granularity', 'minutes')
+            }
+        }
+        expire_after = self.timeseries_config.get('expire_after_seconds')
+        if expire_after:
+            options['expireAfterSeconds'] = expire_after
+        self.db.create_collection(name, **options)
+        logger.info(f"Created time-series collection {name}")
+
+    def _ensure_timeseries_collection(self):
+        """Create weather_data as a time-series collection unless it already exists"""
+        if not self.db.list_collection_names(filter={'name': 'weather_data'}):
+            try:
+                self._create_timeseries_collection()
+            except errors.OperationFailure as e:
+                logger.error(f"Could not create time-series collection, using a regular one: {str(e)}")
+        elif not self._is_timeseries():
+            logger.warning("weather_data is a regular collection; run migrate_weather_data_to_timeseries() "
+                           "to move it to time-series storage")
+
+    def migrate_weather_data_to_timeseries(self, batch_size=None, drop_legacy=False):
+        """Copy an existing regular weather_data collection into a new time-series collection.
+
+        The old collection is renamed to weather_data_legacy first and copied
+        in _id order with ordered inserts, so running the migration again after
+        an interruption resumes after the last copied document. The legacy
+        collection is only dropped when drop_legacy is True and all of its
+        documents are in the new collection. Returns the number of documents
+        copied by this run.
+        """
+        has_legacy = bool(self.db.list_collection_names(filter={'name': 'weather_data_legacy'}))
+        if self._is_timeseries():
+            if not has_legacy:
+                logger.info("weather_data is already a time-series collection")
+                return 0
+            logger.info("Resuming the copy of weather_data_legacy into time-series storage")
+        elif has_legacy and self.db.list_collection_names(filter={'name': 'weather_data'}):
+            raise RuntimeError("weather_data_legacy already exists; remove it before migrating again")
+        else:
+            if not has_legacy and self.db.list_collection_names(filter={'name': 'weather_data'}):
+                self.db['weather_data'].rename('weather_data_legacy')
+            self._create_timeseries_collection()
+        self.weather_collection = self.db['weather_data']
+        self.weather_collection.create_index([("city", 1), ("timestamp", -1)])
+
+        legacy = self.db['weather_data_legacy']
+        copied = self._copy_legacy_weather_data(legacy, batch_size or self.cursor_batch_size)
+        logger.info(f"Migrated {copied} weather documents to time-series storage")
+
+        legacy_count, migrated_count = self._legacy_copy_counts(legacy)
+        if migrated_count != legacy_count:
+            message = f"Only {migrated_count} of {legacy_count} legacy weather documents are in weather_data"
+            if drop_legacy:
+                raise RuntimeError(f"{message}; keeping weather_data_legacy")
+            logger.error(message)
+        elif drop_legacy:
+            legacy.drop()
+            logger.info("Dropped weather_data_legacy")
+        return copied
+
+    def _legacy_id_range(self, legacy):
+        first = legacy.find_one({}, {'_id': 1}, sort=[('_id', 1)])
+        last = legacy.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        if first is None:
+            return None
+        return {'$gte': first['_id'], '$lte': last['_id']}
+
+    def _copy_legacy_weather_data(self, legacy, batch_size):
+        """Insert the legacy documents after the last one already in weather_data, in _id order"""
+        id_range = self._legacy_id_range(legacy)
+        if id_range is None:
+            return 0
+        # Readings stored since the migration started have newer _ids than every legacy document
+        done = self.weather_collection.find_one({'_id': id_range}, {'_id': 1}, sort=[('_id', -1)])
+        query = {'_id': {'$gt': done['_id']}} if done else {}
+
+        copied = 0
+        batch = []
+        for document in legacy.find(query).sort('_id', 1).batch_size(batch_size):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                # Ordered, so an interrupted batch leaves a prefix and the copy can resume after it
+                self.weather_collection.insert_many(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            self.weather_collection.insert_many(batch)
+            copied += len(batch)
+        return copied
+
+    def _legacy_copy_counts(self, legacy):
+        """Return (documents in weather_data_legacy, documents of those already in weather_data)"""
+        id_range = self._legacy_id_range(legacy)
+        if id_range is None:
+            return 0, 0
+        return legacy.count_documents({}), self.weather_collection.count_documents({'_id': id_range})
+
+    def _reconnect(self):
+        """Re-establish the connection, serialising concurrent reconnect attempts"""
+        with self._reconnect_lock:
             self._connect()
 
+    def _execute(self, operation, retry=True):
+        """Run a database operation, reconnecting and retrying once if the connection dropped.
+
+        The driver's pool already recovers from most transient failures, so
+        there is no health check before each call. Only reads and idempotent
+        upserts are retried: an insert may have been committed before the
+        connection dropped, so with retry=False the error is re-raised after
+        reconnecting and inserts rely on the client's retryWrites instead.
+        """
+        try:
+            return operation()
+        except errors.ConnectionFailure as e:
+            logger.warning(f"MongoDB connection lost ({str(e)}), attempting to reconnect")
+            self._reconnect()
+            if not retry:
+                raise
+            return operation()
+
+    def _start_heartbeat(self, interval):
+        """Ping the server every interval seconds from a daemon thread, reconnecting on failure"""
+        def heartbeat():
+            while not self._heartbeat_stop.wait(interval):
+                try:
+                    self.client.admin.command('ping')
+                except errors.ConnectionFailure as e:
+                    logger.warning(f"MongoDB heartbeat failed ({str(e)}), attempting to reconnect")
+                    try:
+                        self._reconnect()
+                    except ConnectionError as reconnect_error:
+                        logger.error(f"MongoDB heartbeat reconnect failed: {str(reconnect_error)}")
+
+        self._heartbeat_thread = threading.Thread(target=heartbeat, name='mongodb-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+        logger.info(f"Started MongoDB heartbeat every {interval} seconds")
+
     def store_weather_data(self, data):
-        self._ensure_connection()
+        data = to_documents(data)
         try:
-            result = self.weather_collection.insert_many(data)
+            result = self._execute(lambda: self.weather_collection.insert_many(data), retry=False)
             logger.info(f"Stored {len(result.inserted_ids)} weather data points")
+            self._update_latest(data)
             return result.inserted_ids
         except errors.PyMongoError as e:
             logger.error(f"Error storing weather data: {str(e)}")
             return None
 
-    def store_daily_summary(self, summaries):
-        self._ensure_connection()
+    def find_stored_readings(self, readings):
+        timestamps = {}
+        for reading in readings:
+            timestamps.setdefault(reading['city'], []).append(reading['timestamp'])
+        if not timestamps:
+            return set()
+        query = {'$or': [{'city': city, 'timestamp': {'$in': values}} for city, values in timestamps.items()]}
+        documents = self._execute(lambda: list(self.weather_collection.find(query, {'_id': 0, 'city': 1,
+                                                                                    'timestamp': 1})))
+        return {(document['city'], document['timestamp']) for document in documents}
+
+    def _update_latest(self, data):
+        """Upsert the newest reading of each city in data into the latest_weather collection"""
+        operations = latest_operations(data)
+        if not operations:
+            return
         try:
-            result_count = 0
-            for summary in summaries:
-                result = self.summary_collection.update_one(
-                    {'city': summary['city'], 'date': summary['date']},
-                    {'$set': summary},
-                    upsert=True
-                )
-                if result.modified_count or result.upserted_id:
-                    result_count += 1
-            logger.info(f"Stored/updated {result_count} daily summaries")
-            return result_count
+            self._execute(lambda: self.latest_collection.bulk_write(operations, ordered=False))
+        except errors.BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                if write_error.get('code') != 11000:
+                    logger.error(f"Error updating latest weather: {write_error.get('errmsg')}")
         except errors.PyMongoError as e:
-            logger.error(f"Error storing daily summaries: {str(e)}")
-            return 0
+            logger.error(f"Error updating latest weather: {str(e)}")
 
-    def store_forecast_summary(self, forecast_summaries):
-        self._ensure_connection()
+    def rebuild_latest(self):
+        """Rebuild latest_weather from weather_data with one indexed sort + $group pass"""
+        pipeline = [
+            {'$sort': {'city': 1, 'timestamp': -1}},
+            {'$group': {'_id': '$city', 'latest': {'$first': '$$ROOT'}}},
+            {'$replaceRoot': {'newRoot': '$latest'}},
+            {'$project': {'_id': 0}}
+        ]
+        latest = self._execute(lambda: list(self.weather_collection.aggregate(pipeline)))
+        self._update_latest(latest)
+        logger.info(f"Rebuilt latest weather for {len(latest)} cities")
+        return latest
+
+    def get_latest_for_all_cities(self):
+        """Return {city: newest reading} for every city in a single query"""
         try:
-            result_count = 0
-            for city, summaries in forecast_summaries.items():
-                for summary in summaries:
-                    result = self.forecast_collection.update_one(
-                        {'city': city, 'date': summary['date']},
-                        {'$set': summary},
-                        upsert=True
-                    )
-                    if result.modified_count or result.upserted_id:
-                        result_count += 1
-            logger.info(f"Stored/updated {result_count} forecast summaries")
-            return result_count
+            latest = self._execute(lambda: list(self.latest_collection.find({}, {'_id': 0})))
+            if not latest:
+                # Readings stored before latest_weather existed - backfill it once
+                latest = self.rebuild_latest()
+            return {reading['city']: reading for reading in sorted(latest, key=lambda r: r['city'])}
         except errors.PyMongoError as e:
-            logger.error(f"Error storing forecast summaries: {str(e)}")
-            return 0
+            logger.error(f"Error retrieving latest weather for all cities: {str(e)}")
+            return {}
+
+    def _bulk_upsert(self, collection_attr, operations, keys, label):
+        """Run upserts as chunked, unordered bulk writes and report counts and per-document errors"""
+        totals = {'matched': 0, 'modified': 0, 'upserted': 0, 'errors': []}
+        for start in range(0, len(operations), self.bulk_chunk_size):
+            chunk = operations[start:start + self.bulk_chunk_size]
+            try:
+                # Look the collection up on every call so a reconnect picks up the new client
+                details = self._execute(
+                    lambda: getattr(self, collection_attr).bulk_write(chunk, ordered=False)).bulk_api_result
+            except errors.BulkWriteError as e:
+                # Unordered writes keep going past a bad document, so count what did succeed
+                details = e.details
+                for write_error in details.get('writeErrors', []):
+                    index = start + write_error['index']
+                    totals['errors'].append({
+                        'key': keys[index],
+                        'code': write_error.get('code'),
+                        'message': write_error.get('errmsg')
+                    })
+                    logger.error(f"Error storing {label} for {keys[index]}: {write_error.get('errmsg')}")
+            except errors.PyMongoError as e:
+                logger.error(f"Error storing {label} batch of {len(chunk)}: {str(e)}")
+                totals['errors'].extend(
+                    {'key': key, 'code': None, 'message': str(e)} for key in keys[start:start + len(chunk)])
+                continue
+            totals['matched'] += details.get('nMatched', 0)
+            totals['modified'] += details.get('nModified', 0)
+            totals['upserted'] += details.get('nUpserted', 0)
+
+        logger.info(f"Stored/updated {totals['modified'] + totals['upserted']} {label} "
+                    f"(matched={totals['matched']}, modified={totals['modified']}, "
+                    f"upserted={totals['upserted']}, errors={len(totals['errors'])})")
+        return totals
+
+    def store_daily_summary(self, summaries):
+        operations = []
+        keys = []
+        for summary in summaries:
+            operations.append(UpdateOne(
+                {'city': summary['city'], 'date': summary['date']},
+                {'$set': summary},
+                upsert=True
+            ))
+            keys.append((summary['city'], summary['date']))
+        return self._bulk_upsert('summary_collection', operations, keys, 'daily summaries')
+
+    def refresh_daily_summaries(self, readings):
+        """Recompute daily summaries server-side for every (city, day) touched by readings.
+
+        The whole day's readings in weather_data are aggregated with a pipeline
+        and $merge'd into daily_summaries, so each summary reflects all samples
+        of the day rather than just the current batch. Returns the refreshed
+        summaries, or None if the aggregation failed.
+        """
+        touched = {(reading['city'], datetime.combine(reading['timestamp'].date(), datetime.min.time()))
+                   for reading in readings}
+        if not touched:
+            return []
+
+        day_clauses = [
+            {'city': city, 'timestamp': {'$gte': day, '$lt': day + timedelta(days=1)}}
+            for city, day in sorted(touched)
+        ]
+        day_of_reading = {
+            '$dateFromParts': {
+                'year': {'$year': '$timestamp'},
+                'month': {'$month': '$timestamp'},
+                'day': {'$dayOfMonth': '$timestamp'}
+            }
+        }
+        pipeline = [
+            {'$match': {'$or': day_clauses}},
+            # Per (city, day, condition) partial aggregates so the dominant condition can be picked
+            {'$group': {
+                '_id': {'city': '$city', 'date': day_of_reading, 'condition': '$weather_condition'},
+                'count': {'$sum': 1},
+                'temp_sum': {'$sum': '$temperature'},
+                'humidity_sum': {'$sum': '$humidity'},
+                'wind_speed_sum': {'$sum': '$wind_speed'},
+                'max_temp': {'$max': '$temperature'},
+                'min_temp': {'$min': '$temperature'}
+            }},
+            {'$sort': {'count': -1, '_id.condition': 1}},
+            {'$group': {
+                '_id': {'city': '$_id.city', 'date': '$_id.date'},
+                'dominant_condition': {'$first': '$_id.condition'},
+                'count': {'$sum': '$count'},
+                'temp_sum': {'$sum': '$temp_sum'},
+                'humidity_sum': {'$sum': '$humidity_sum'},
+                'wind_speed_sum': {'$sum': '$wind_speed_sum'},
+                'max_temp': {'$max': '$max_temp'},
+                'min_temp': {'$min': '$min_temp'}
+            }},
+            {'$project': {
+                '_id': 0,
+                'city': '$_id.city',
+                'date': '$_id.date',
+                'avg_temperature': {'$round': [{'$divide': ['$temp_sum', '$count']}, 2]},
+                'max_temperature': {'$round': ['$max_temp', 2]},
+                'min_temperature': {'$round': ['$min_temp', 2]},
+                'avg_humidity': {'$round': [{'$divide': ['$humidity_sum', '$count']}, 2]},
+                'avg_wind_speed': {'$round': [{'$divide': ['$wind_speed_sum', '$count']}, 2]},
+                'dominant_condition': 1,
+                'sample_count': '$count'
+            }},
+            {'$merge': {
+                'into': self.summary_collection.name,
+                'on': ['city', 'date'],
+                'whenMatched': 'merge',
+                'whenNotMatched': 'insert'
+            }}
+        ]
+
+        try:
+            self._execute(lambda: list(self.weather_collection.aggregate(pipeline)))
+            summaries = self._execute(lambda: list(self.summary_collection.find(
+                {'$or': [{'city': city, 'date': day} for city, day in sorted(touched)]},
+                {'_id': 0}
+            )))
+            logger.info(f"Refreshed {len(summaries)} daily summaries from the server-side pipeline")
+            return summaries
+        except errors.PyMongoError as e:
+            logger.error(f"Error refreshing daily summaries: {str(e)}")
+            return None
+
+    def store_forecast_summary(self, forecast_summaries):
+        operations = []
+        keys = []
+        for city, summaries in forecast_summaries.items():
+            for summary in summaries:
+                operations.append(UpdateOne(
+                    {'city': city, 'date': summary['date']},
+                    {'$set': summary},
+                    upsert=True
+                ))
+                keys.append((city, summary['date']))
+        return self._bulk_upsert('forecast_collection', operations, keys, 'forecast summaries')
 
     def get_recent_weather_data(self, city, limit=10):
-        self._ensure_connection()
         try:
-            return list(self.weather_collection.find(
+            return self._execute(lambda: list(self.weather_collection.find(
                 {'city': city},
                 sort=[('timestamp', -1)],
                 limit=limit
-            ))
+            )))
         except errors.PyMongoError as e:
             logger.error(f"Error retrieving recent weather data for {city}: {str(e)}")
             return []
 
     def get_daily_summaries(self, city, start_date, end_date):
-        self._ensure_connection()
         try:
-            return list(self.summary_collection.find({
+            return self._execute(lambda: list(self.summary_collection.find({
                 'city': city,
                 'date': {'$gte': start_date, '$lte': end_date}
-            }))
+            })))
         except errors.PyMongoError as e:
             logger.error(f"Error retrieving daily summaries for {city}: {str(e)}")
             return []
 
     def get_forecast_data(self, city, start_date, end_date):
-        self._ensure_connection()
         try:
-            return list(self.forecast_collection.find({
+            return self._execute(lambda: list(self.forecast_collection.find({
                 'city': city,
                 'date': {'$gte': start_date, '$lte': end_date}
-            }))
+            })))
         except errors.PyMongoError as e:
             logger.error(f"Error retrieving forecast data for {city}: {str(e)}")
             return []
 
     def get_cities(self):
-        self._ensure_connection()
         try:
-            return self.weather_collection.distinct('city')
+            return self._execute(lambda: self.weather_collection.distinct('city'))
         except errors.PyMongoError as e:
             logger.error(f"Error retrieving city list: {str(e)}")
             return []
 
-    def get_data_for_alerts(self, city, hours=24):
-        self._ensure_connection()
+    def _stream(self, make_cursor, description):
+        """Yield documents from a cursor one batch at a time instead of materialising a list.
+
+        Only opening the cursor is retried after a dropped connection; a
+        failure while iterating is logged and ends the stream early.
+        """
+        cursor = None
         try:
-            start_time = datetime.utcnow() - timedelta(hours=hours)
-            return list(self.weather_collection.find({
-                'city': city,
-                'timestamp': {'$gte': start_time}
-            }).sort('timestamp', 1))
+            cursor = self._execute(make_cursor)
+            for document in cursor:
+                yield document
         except errors.PyMongoError as e:
-            logger.error(f"Error retrieving alert data for {city}: {str(e)}")
-            return []
-    
-    def get_historical_weather_data(self, city, days=30):
-        self._ensure_connection()
+            logger.error(f"Error streaming {description}: {str(e)}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def _find_weather_since(self, city, start_time, projection, stream, batch_size, description):
+        """Query a city's weather readings since start_time in timestamp order"""
+        query = {
+            'city': city,
+            'timestamp': {'$gte': start_time}
+        }
+        if stream:
+            return self._stream(
+                lambda: self.weather_collection.find(query, projection)
+                .sort('timestamp', 1)
+                .batch_size(batch_size or self.cursor_batch_size),
+                description
+            )
         try:
-            start_date = datetime.utcnow() - timedelta(days=days)
-            return list(self.weather_collection.find({
-                'city': city,
-                'timestamp': {'$gte': start_date}
-            }).sort('timestamp', 1))
+            return self._execute(lambda: list(self.weather_collection.find(query, projection).sort('timestamp', 1)))
         except errors.PyMongoError as e:
-            logger.error(f"Error retrieving historical data for {city}: {str(e)}")
+            logger.error(f"Error retrieving {description}: {str(e)}")
             return []
 
+    def get_data_for_alerts(self, city, hours=24, projection=None, stream=False, batch_size=None):
+        """Return a city's readings from the last hours.
+
+        projection limits the returned fields; stream=True returns a generator
+        that pulls batch_size documents per round trip instead of a list.
+        """
+        start_time = datetime.utcnow() - timedelta(hours=hours)
+        return self._find_weather_since(city, start_time, projection, stream, batch_size,
+                                        f"alert data for {city}")
+
+    def get_historical_weather_data(self, city, days=30, projection=None, stream=False, batch_size=None):
+        """Return a city's readings from the last days, with the same projection/stream options"""
+        start_date = datetime.utcnow() - timedelta(days=days)
+        return self._find_weather_since(city, start_date, projection, stream, batch_size,
+                                        f"historical data for {city}")
+
     def close(self):
+        self._heartbeat_stop.set()
         if self.client:
             try:
                 self.client.close()
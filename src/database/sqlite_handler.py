@@ -0,0 +1,339 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from src.database.storage import StorageBackend
+from src.utils.logger import logger
+
+READING_COLUMNS = ['city', 'timestamp', 'temperature', 'feels_like', 'humidity', 'wind_speed', 'weather_condition']
+DAILY_SUMMARY_COLUMNS = ['city', 'date', 'avg_temperature', 'max_temperature', 'min_temperature',
+                         'avg_humidity', 'avg_wind_speed', 'dominant_condition', 'sample_count']
+FORECAST_COLUMNS = ['city', 'date', 'avg_temp', 'max_temp', 'min_temp', 'avg_humidity', 'avg_wind_speed',
+                    'dominant_condition']
+DATETIME_COLUMNS = {'timestamp', 'date'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_data (
+    id INTEGER PRIMARY KEY,
+    city TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    temperature REAL,
+    feels_like REAL,
+    humidity REAL,
+    wind_speed REAL,
+    weather_condition TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_weather_city_timestamp ON weather_data (city, timestamp);
+
+CREATE TABLE IF NOT EXISTS latest_weather (
+    city TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    temperature REAL,
+    feels_like REAL,
+    humidity REAL,
+    wind_speed REAL,
+    weather_condition TEXT
+);
+
+CREATE TABLE IF NOT EXISTS daily_summaries (
+    city TEXT NOT NULL,
+    date TEXT NOT NULL,
+    avg_temperature REAL,
+    max_temperature REAL,
+    min_temperature REAL,
+    avg_humidity REAL,
+    avg_wind_speed REAL,
+    dominant_condition TEXT,
+    sample_count INTEGER,
+    PRIMARY KEY (city, date)
+);
+
+CREATE TABLE IF NOT EXISTS forecast_data (
+    city TEXT NOT NULL,
+    date TEXT NOT NULL,
+    avg_temp REAL,
+    max_temp REAL,
+    min_temp REAL,
+    avg_humidity REAL,
+    avg_wind_speed REAL,
+    dominant_condition TEXT,
+    PRIMARY KEY (city, date)
+);
+"""
+
+
+def _to_db(value):
+    """Store datetimes as fixed-width ISO strings so they sort chronologically"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='microseconds')
+    return value
+
+
+def _from_db(column, value):
+    if column in DATETIME_COLUMNS and value is not None:
+        return datetime.fromisoformat(value)
+    return value
+
+
+class SQLiteHandler(StorageBackend):
+    """Embedded storage engine for edge nodes and tests that have no MongoDB.
+
+    Uses a single SQLite file in WAL mode so the web dashboard can read while
+    the collector writes. Readings are indexed on (city, timestamp) and
+    range scans only read the columns a caller asks for.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.get('path', 'data/weather_monitoring.db')
+        self.cursor_batch_size = config.get('cursor_batch_size', 1000)
+        self._lock = threading.RLock()
+
+        if self.path != ':memory:':
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        logger.info(f"Connected to SQLite database at {self.path}")
+
+    def _rows_to_dicts(self, columns, rows):
+        return [{column: _from_db(column, value) for column, value in zip(columns, row)} for row in rows]
+
+    @staticmethod
+    def _projected_columns(projection):
+        """Translate a MongoDB-style inclusion projection into the columns to select"""
+        if not projection:
+            return list(READING_COLUMNS)
+        columns = [column for column in READING_COLUMNS if projection.get(column)]
+        return columns or list(READING_COLUMNS)
+
+    def store_weather_data(self, data):
+        rows = [tuple(_to_db(reading.get(column)) for column in READING_COLUMNS) for reading in data]
+        placeholders = ', '.join('?' for _ in READING_COLUMNS)
+        try:
+            with self._lock, self.connection:
+                self.connection.executemany(
+                    f"INSERT INTO weather_data ({', '.join(READING_COLUMNS)}) VALUES ({placeholders})", rows)
+                self._update_latest(rows)
+            logger.info(f"Stored {len(rows)} weather data points")
+            return len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error storing weather data: {str(e)}")
+            return None
+
+    def find_stored_readings(self, readings):
+        stored = set()
+        with self._lock:
+            for reading in readings:
+                if self.connection.execute("SELECT 1 FROM weather_data WHERE city = ? AND timestamp = ?",
+                                           (reading['city'], _to_db(reading['timestamp']))).fetchone():
+                    stored.add((reading['city'], reading['timestamp']))
+        return stored
+
+    def _update_latest(self, rows):
+        """Keep latest_weather pointing at each city's newest reading"""
+        placeholders = ', '.join('?' for _ in READING_COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in READING_COLUMNS[1:])
+        self.connection.executemany(
+            f"INSERT INTO latest_weather ({', '.join(READING_COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (city) DO UPDATE SET {updates} WHERE excluded.timestamp >= latest_weather.timestamp",
+            rows
+        )
+
+    def _upsert(self, table, columns, rows, keys, label):
+        """Upsert rows keyed by (city, date), reporting counts like DBHandler._bulk_upsert"""
+        totals = {'matched': 0, 'modified': 0, 'upserted': 0, 'errors': []}
+        placeholders = ', '.join('?' for _ in columns)
+        statement = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        with self._lock:
+            existing = set()
+            for city, date in keys:
+                if self.connection.execute(f"SELECT 1 FROM {table} WHERE city = ? AND date = ?",
+                                           (city, _to_db(date))).fetchone():
+                    existing.add((city, date))
+            try:
+                with self.connection:
+                    self.connection.executemany(statement, rows)
+                stored = list(keys)
+            except sqlite3.Error:
+                # Retry row by row so a single bad document does not fail the batch
+                stored = []
+                for row, key in zip(rows, keys):
+                    try:
+                        with self.connection:
+                            self.connection.execute(statement, row)
+                        stored.append(key)
+                    except sqlite3.Error as e:
+                        totals['errors'].append({'key': key, 'code': None, 'message': str(e)})
+                        logger.error(f"Error storing {label} for {key}: {str(e)}")
+
+        for key in stored:
+            if key in existing:
+                totals['matched'] += 1
+                totals['modified'] += 1
+            else:
+                totals['upserted'] += 1
+        logger.info(f"Stored/updated {totals['modified'] + totals['upserted']} {label} "
+                    f"(matched={totals['matched']}, modified={totals['modified']}, "
+                    f"upserted={totals['upserted']}, errors={len(totals['errors'])})")
+        return totals
+
+    def store_daily_summary(self, summaries):
+        rows = [tuple(_to_db(summary.get(column)) for column in DAILY_SUMMARY_COLUMNS) for summary in summaries]
+        keys = [(summary['city'], summary['date']) for summary in summaries]
+        return self._upsert('daily_summaries', DAILY_SUMMARY_COLUMNS, rows, keys, 'daily summaries')
+
+    def store_forecast_summary(self, forecast_summaries):
+        rows = []
+        keys = []
+        for city, summaries in forecast_summaries.items():
+            for summary in summaries:
+                record = dict(summary, city=city)
+                rows.append(tuple(_to_db(record.get(column)) for column in FORECAST_COLUMNS))
+                keys.append((city, summary['date']))
+        return self._upsert('forecast_data', FORECAST_COLUMNS, rows, keys, 'forecast summaries')
+
+    def refresh_daily_summaries(self, readings):
+        """Recompute touched (city, day) summaries with a single GROUP BY per day"""
+        touched = sorted({(reading['city'], datetime.combine(reading['timestamp'].date(), datetime.min.time()))
+                          for reading in readings})
+        if not touched:
+            return []
+
+        statement = """
+            INSERT OR REPLACE INTO daily_summaries
+            SELECT city, :day,
+                   ROUND(AVG(temperature), 2), ROUND(MAX(temperature), 2), ROUND(MIN(temperature), 2),
+                   ROUND(AVG(humidity), 2), ROUND(AVG(wind_speed), 2),
+                   (SELECT weather_condition FROM weather_data
+                    WHERE city = :city AND timestamp >= :day AND timestamp < :next_day
+                    GROUP BY weather_condition ORDER BY COUNT(*) DESC, weather_condition LIMIT 1),
+                   COUNT(*)
+            FROM weather_data
+            WHERE city = :city AND timestamp >= :day AND timestamp < :next_day
+            GROUP BY city
+        """
+        params = [{'city': city, 'day': _to_db(day), 'next_day': _to_db(day + timedelta(days=1))}
+                  for city, day in touched]
+        try:
+            with self._lock, self.connection:
+                self.connection.executemany(statement, params)
+                summaries = []
+                for city, day in touched:
+                    rows = self.connection.execute(
+                        f"SELECT {', '.join(DAILY_SUMMARY_COLUMNS)} FROM daily_summaries WHERE city = ? AND date = ?",
+                        (city, _to_db(day))).fetchall()
+                    summaries.extend(self._rows_to_dicts(DAILY_SUMMARY_COLUMNS, rows))
+            logger.info(f"Refreshed {len(summaries)} daily summaries")
+            return summaries
+        except sqlite3.Error as e:
+            logger.error(f"Error refreshing daily summaries: {str(e)}")
+            return None
+
+    def get_recent_weather_data(self, city, limit=10):
+        try:
+            with self._lock:
+                rows = self.connection.execute(
+                    f"SELECT {', '.join(READING_COLUMNS)} FROM weather_data WHERE city = ? "
+                    f"ORDER BY timestamp DESC LIMIT ?", (city, limit)).fetchall()
+            return self._rows_to_dicts(READING_COLUMNS, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving recent weather data for {city}: {str(e)}")
+            return []
+
+    def _get_by_date(self, table, columns, city, start_date, end_date, description):
+        try:
+            with self._lock:
+                rows = self.connection.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} WHERE city = ? AND date >= ? AND date <= ? "
+                    f"ORDER BY date", (city, _to_db(start_date), _to_db(end_date))).fetchall()
+            return self._rows_to_dicts(columns, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving {description} for {city}: {str(e)}")
+            return []
+
+    def get_daily_summaries(self, city, start_date, end_date):
+        return self._get_by_date('daily_summaries', DAILY_SUMMARY_COLUMNS, city, start_date, end_date,
+                                 'daily summaries')
+
+    def get_forecast_data(self, city, start_date, end_date):
+        return self._get_by_date('forecast_data', FORECAST_COLUMNS, city, start_date, end_date, 'forecast data')
+
+    def get_cities(self):
+        try:
+            with self._lock:
+                rows = self.connection.execute("SELECT DISTINCT city FROM weather_data ORDER BY city").fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving city list: {str(e)}")
+            return []
+
+    def _stream(self, statement, params, columns, batch_size, description):
+        """Yield rows batch_size at a time from a dedicated cursor"""
+        try:
+            with self._lock:
+                cursor = self.connection.execute(statement, params)
+                rows = cursor.fetchmany(batch_size)
+            while rows:
+                for document in self._rows_to_dicts(columns, rows):
+                    yield document
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+        except sqlite3.Error as e:
+            logger.error(f"Error streaming {description}: {str(e)}")
+
+    def _find_weather_since(self, city, start_time, projection, stream, batch_size, description):
+        columns = self._projected_columns(projection)
+        statement = (f"SELECT {', '.join(columns)} FROM weather_data "
+                     f"WHERE city = ? AND timestamp >= ? ORDER BY timestamp")
+        params = (city, _to_db(start_time))
+        if stream:
+            return self._stream(statement, params, columns, batch_size or self.cursor_batch_size, description)
+        try:
+            with self._lock:
+                rows = self.connection.execute(statement, params).fetchall()
+            return self._rows_to_dicts(columns, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving {description}: {str(e)}")
+            return []
+
+    def get_data_for_alerts(self, city, hours=24, projection=None, stream=False, batch_size=None):
+        start_time = datetime.utcnow() - timedelta(hours=hours)
+        return self._find_weather_since(city, start_time, projection, stream, batch_size,
+                                        f"alert data for {city}")
+
+    def get_historical_weather_data(self, city, days=30, projection=None, stream=False, batch_size=None):
+        start_date = datetime.utcnow() - timedelta(days=days)
+        return self._find_weather_since(city, start_date, projection, stream, batch_size,
+                                        f"historical data for {city}")
+
+    def get_latest_for_all_cities(self):
+        select_latest = f"SELECT {', '.join(READING_COLUMNS)} FROM latest_weather ORDER BY city"
+        try:
+            with self._lock:
+                rows = self.connection.execute(select_latest).fetchall()
+                if not rows:
+                    # Readings stored before latest_weather existed - backfill it once
+                    with self.connection:
+                        self.connection.execute(
+                            f"INSERT OR REPLACE INTO latest_weather ({', '.join(READING_COLUMNS)}) "
+                            f"SELECT {', '.join('w.' + column for column in READING_COLUMNS)} FROM weather_data w "
+                            f"JOIN (SELECT city, MAX(timestamp) AS newest FROM weather_data GROUP BY city) m "
+                            f"ON w.city = m.city AND w.timestamp = m.newest")
+                    rows = self.connection.execute(select_latest).fetchall()
+            return {reading['city']: reading for reading in self._rows_to_dicts(READING_COLUMNS, rows)}
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving latest weather for all cities: {str(e)}")
+            return {}
+
+    def close(self):
+        try:
+            self.connection.close()
+            logger.info("SQLite connection closed")
+        except sqlite3.Error:
+            pass
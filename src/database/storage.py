@@ -0,0 +1,76 @@
+from abc import ABC, abstractmethod
+from src.utils.logger import logger
+
+
+class StorageBackend(ABC):
+    """Interface shared by the storage engines used for weather data.
+
+    Readings, daily summaries and forecast summaries are plain dicts with the
+    same keys whichever engine stores them, so callers can switch between
+    MongoDB and the embedded SQLite engine through ``database.type``.
+    """
+
+    @abstractmethod
+    def store_weather_data(self, data):
+        """Store processed readings; return a truthy value on success and None on failure"""
+
+    @abstractmethod
+    def find_stored_readings(self, readings):
+        """Return the (city, timestamp) keys of readings that are already stored; raise on failure"""
+
+    @abstractmethod
+    def store_daily_summary(self, summaries):
+        """Upsert daily summaries; return matched/modified/upserted counts and per-document errors"""
+
+    @abstractmethod
+    def store_forecast_summary(self, forecast_summaries):
+        """Upsert {city: [forecast summary]}; return the same counts as store_daily_summary"""
+
+    @abstractmethod
+    def refresh_daily_summaries(self, readings):
+        """Recompute the summaries of every (city, day) in readings from all stored readings"""
+
+    @abstractmethod
+    def get_recent_weather_data(self, city, limit=10):
+        """Return a city's newest readings, newest first"""
+
+    @abstractmethod
+    def get_daily_summaries(self, city, start_date, end_date):
+        """Return a city's daily summaries between two dates"""
+
+    @abstractmethod
+    def get_forecast_data(self, city, start_date, end_date):
+        """Return a city's forecast summaries between two dates"""
+
+    @abstractmethod
+    def get_cities(self):
+        """Return the names of all cities with stored readings"""
+
+    @abstractmethod
+    def get_data_for_alerts(self, city, hours=24, projection=None, stream=False, batch_size=None):
+        """Return a city's readings from the last hours, oldest first"""
+
+    @abstractmethod
+    def get_historical_weather_data(self, city, days=30, projection=None, stream=False, batch_size=None):
+        """Return a city's readings from the last days, oldest first"""
+
+    @abstractmethod
+    def get_latest_for_all_cities(self):
+        """Return {city: newest reading} for every city"""
+
+    @abstractmethod
+    def close(self):
+        """Release the underlying connection"""
+
+
+def create_storage(config):
+    """Create the storage backend selected by config['type'] ('mongodb' or 'sqlite')"""
+    storage_type = config.get('type', 'mongodb')
+    if storage_type == 'mongodb':
+        from src.database.db_handler import DBHandler
+        return DBHandler(config)
+    if storage_type == 'sqlite':
+        from src.database.sqlite_handler import SQLiteHandler
+        return SQLiteHandler(config)
+    logger.error(f"Unknown database type: {storage_type}")
+    raise ValueError(f"Unknown database type: {storage_type}")
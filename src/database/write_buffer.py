@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from src.utils.logger import logger
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return str(value)
+
+
+def _reading_key(city, timestamp):
+    """(city, timestamp) identity of a reading, at the millisecond precision BSON keeps"""
+    return city, timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+
+
+def _decode(document):
+    if len(document) == 1 and '$date' in document:
+        return datetime.fromisoformat(document['$date'])
+    return document
+
+
+class WriteBehindBuffer:
+    """Group-commit buffer between DataProcessor and a storage backend.
+
+    Readings and forecast summaries are queued in memory and written in one
+    batch once ``max_batch`` readings are waiting or ``max_delay`` seconds
+    have passed. When the backend is unavailable the batch is appended to a
+    local JSON-lines spill file, which is replayed before the next
+    successful commit, so nothing is lost while the database is down. A
+    failed insert may still have stored part of its batch, so replayed
+    readings that are already stored are skipped rather than written twice.
+    """
+
+    def __init__(self, storage, max_batch: int = 500, max_delay: float = 30.0,
+                 spill_path: str = 'data/ingest_spill.jsonl',
+                 on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.spill_path = spill_path
+        self.on_commit = on_commit
+
+        self._readings: List[Dict[str, Any]] = []
+        self._forecasts: Dict[str, List[Dict[str, Any]]] = {}
+        self._oldest_enqueued: Optional[float] = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.flush_count = 0
+        self.committed_readings = 0
+        self.spilled_readings = 0
+        self.replayed_readings = 0
+        self.last_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    def start(self):
+        """Start the background thread that flushes on the size or time threshold"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def add_readings(self, readings: List[Dict[str, Any]]):
+        with self._condition:
+            self._readings.extend(readings)
+            if self._oldest_enqueued is None:
+                self._oldest_enqueued = time.monotonic()
+            if len(self._readings) >= self.max_batch:
+                self._condition.notify()
+
+    def add_forecast_summaries(self, forecast_summaries: Dict[str, List[Dict[str, Any]]]):
+        with self._condition:
+            # A newer forecast for a city supersedes one still waiting in the queue
+            self._forecasts.update(forecast_summaries)
+            if self._oldest_enqueued is None:
+                self._oldest_enqueued = time.monotonic()
+
+    def _due(self) -> bool:
+        if len(self._readings) >= self.max_batch:
+            return True
+        return self._oldest_enqueued is not None and time.monotonic() - self._oldest_enqueued >= self.max_delay
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._condition:
+                self._condition.wait(timeout=min(self.max_delay, 1.0))
+                due = self._due()
+            if due:
+                self.flush()
+
+    def flush(self) -> bool:
+        """Commit everything queued (after replaying any spill file); return False if it was spilled"""
+        with self._flush_lock:
+            with self._condition:
+                readings, self._readings = self._readings, []
+                forecasts, self._forecasts = self._forecasts, {}
+                self._oldest_enqueued = None
+            if not readings and not forecasts and not self._has_spill():
+                return True
+
+            start = time.monotonic()
+            # Replay older spilled data first so readings are committed in order
+            if self._has_spill() and not self._replay_spill():
+                self._spill(readings, forecasts)
+                return False
+
+            failed_readings, failed_forecasts = self._commit(readings, forecasts)
+            self._spill(failed_readings, failed_forecasts)
+
+            self.last_flush_latency = time.monotonic() - start
+            self._total_flush_latency += self.last_flush_latency
+            self.flush_count += 1
+            return not failed_readings and not failed_forecasts
+
+    def _commit(self, readings, forecasts, replay=False):
+        """Store a batch and return the (readings, forecasts) that could not be stored"""
+        try:
+            new_readings = readings
+            if readings and replay:
+                stored = {_reading_key(city, timestamp)
+                          for city, timestamp in self.storage.find_stored_readings(readings)}
+                new_readings = [reading for reading in readings
+                                if _reading_key(reading['city'], reading['timestamp']) not in stored]
+                if len(new_readings) < len(readings):
+                    logger.info(f"Skipped {len(readings) - len(new_readings)} spilled readings that were "
+                                f"already stored")
+            if new_readings and self.storage.store_weather_data(new_readings) is None:
+                return readings, forecasts
+        except Exception as e:
+            logger.error(f"Write-behind commit of readings failed: {str(e)}")
+            return readings, forecasts
+
+        if readings:
+            self.committed_readings += len(readings)
+            if self.on_commit:
+                try:
+                    self.on_commit(readings)
+                except Exception as e:
+                    logger.error(f"Write-behind commit callback failed: {str(e)}")
+
+        try:
+            if forecasts:
+                result = self.storage.store_forecast_summary(forecasts)
+                if result and result.get('errors'):
+                    # Keep only the summaries that failed; the rest of the bulk write was stored
+                    failed = {tuple(error['key']) for error in result['errors']}
+                    failed_forecasts = {}
+                    for city, summaries in forecasts.items():
+                        remaining = [summary for summary in summaries if (city, summary['date']) in failed]
+                        if remaining:
+                            failed_forecasts[city] = remaining
+                    return [], failed_forecasts
+        except Exception as e:
+            logger.error(f"Write-behind commit of forecast summaries failed: {str(e)}")
+            return [], forecasts
+        return [], {}
+
+    def _has_spill(self) -> bool:
+        return bool(self.spill_path) and os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) > 0
+
+    def _spill(self, readings, forecasts):
+        """Append an uncommitted batch to the local spill file"""
+        if not readings and not forecasts:
+            return
+        directory = os.path.dirname(self.spill_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for reading in readings:
+                record = {key: value for key, value in reading.items() if key != '_id'}
+                f.write(json.dumps({'kind': 'reading', 'data': record}, default=_encode) + '\n')
+            if forecasts:
+                f.write(json.dumps({'kind': 'forecast', 'data': forecasts}, default=_encode) + '\n')
+        self.spilled_readings += len(readings)
+        logger.warning(f"Database unavailable, spilled {len(readings)} readings to {self.spill_path}")
+
+    def _replay_spill(self) -> bool:
+        """Commit the spill file in max_batch chunks and remove it once everything is stored"""
+        readings = []
+        forecasts = {}
+        with open(self.spill_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line, object_hook=_decode)
+                if entry['kind'] == 'reading':
+                    readings.append(entry['data'])
+                else:
+                    forecasts.update(entry['data'])
+
+        for start in range(0, max(len(readings), 1), self.max_batch):
+            chunk_forecasts = forecasts if start == 0 else {}
+            failed_readings, failed_forecasts = self._commit(readings[start:start + self.max_batch], chunk_forecasts,
+                                                             replay=True)
+            if failed_readings or failed_forecasts:
+                # Keep only what has not been committed yet
+                self._rewrite_spill(failed_readings + readings[start + self.max_batch:], failed_forecasts)
+                return False
+        os.remove(self.spill_path)
+        self.replayed_readings += len(readings)
+        logger.info(f"Replayed {len(readings)} spilled readings after reconnect")
+        return True
+
+    def _rewrite_spill(self, readings, forecasts):
+        tmp_path = f"{self.spill_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for reading in readings:
+                f.write(json.dumps({'kind': 'reading', 'data': reading}, default=_encode) + '\n')
+            if forecasts:
+                f.write(json.dumps({'kind': 'forecast', 'data': forecasts}, default=_encode) + '\n')
+        os.replace(tmp_path, self.spill_path)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            depth = len(self._readings)
+        return {
+            'queue_depth': depth,
+            'flushes': self.flush_count,
+            'committed_readings': self.committed_readings,
+            'spilled_readings': self.spilled_readings,
+            'replayed_readings': self.replayed_readings,
+            'spill_pending': self._has_spill(),
+            'last_flush_latency_ms': round(self.last_flush_latency * 1000, 2),
+            'avg_flush_latency_ms': round(self._total_flush_latency / self.flush_count * 1000, 2)
+            if self.flush_count else 0.0
+        }
+
+    def close(self):
+        """Stop the background thread and flush whatever is still queued"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.logger import logger
+
+
+class BatchPredictor:
+    """Hourly predicted temperature curves for every city, cached per ingest cycle.
+
+    Each city's next ``horizon_hours`` hours are scored with one model call
+    on a feature matrix: the hour/day/month columns depend only on the base
+    hour and are built once for all cities, while the reading's humidity,
+    wind speed and condition are held constant, as in the single-point
+    prediction. A curve is reused until the city's latest reading (i.e. the
+    next ingest cycle) or its model changes.
+    """
+
+    def __init__(self, registry, horizon_hours: int = 48):
+        self.registry = registry
+        self.horizon_hours = horizon_hours
+        self._time_features: Dict[datetime, Tuple[List[datetime], np.ndarray]] = {}
+        # city -> (latest reading timestamp, predictor the curve came from, curve)
+        self._curves: Dict[str, Tuple[datetime, Any, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def time_features(self, base: datetime) -> Tuple[List[datetime], np.ndarray]:
+        """Return the horizon times after ``base`` and their (horizon_hours, 3) hour/day_of_week/month matrix"""
+        base = base.replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            cached = self._time_features.get(base)
+        if cached is not None:
+            return cached
+        times = [base + timedelta(hours=hour) for hour in range(1, self.horizon_hours + 1)]
+        features = np.array([(time.hour, time.weekday(), time.month) for time in times], dtype=float)
+        with self._lock:
+            # Readings of one cycle share a base hour, so only the newest few are worth keeping
+            if len(self._time_features) >= 8:
+                self._time_features.pop(min(self._time_features))
+            self._time_features[base] = (times, features)
+        return times, features
+
+    def curve(self, city: str, reading: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return {'times', 'temperatures'} for one city, or None if it has no model or usable reading"""
+        predictor = self.registry.get(city)
+        timestamp = reading.get('timestamp')
+        if predictor is None or not isinstance(timestamp, datetime):
+            return None
+        with self._lock:
+            cached = self._curves.get(city)
+            if cached is not None and cached[0] == timestamp and cached[1] is predictor:
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        try:
+            times, features = self.time_features(timestamp)
+            temperatures = predictor.predict_many(features, reading['humidity'], reading['wind_speed'],
+                                                  reading['weather_condition'])
+        except Exception as e:
+            logger.error(f"Batch prediction failed for {city}: {str(e)}")
+            return None
+        curve = {
+            'times': times,
+            'temperatures': [round(float(value), 1) for value in temperatures]
+        }
+        with self._lock:
+            self._curves[city] = (timestamp, predictor, curve)
+        return curve
+
+    def curves(self, latest_readings: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Return the curves of every city in {city: latest reading} that has a model"""
+        curves = {}
+        for city, reading in latest_readings.items():
+            curve = self.curve(city, reading)
+            if curve is not None:
+                curves[city] = curve
+        return curves
+
+    @staticmethod
+    def at(curve: Dict[str, Any], hours: int) -> Optional[float]:
+        """The predicted temperature ``hours`` after the curve's base hour"""
+        if 1 <= hours <= len(curve['temperatures']):
+            return curve['temperatures'][hours - 1]
+        return None
+
+    @staticmethod
+    def chart_data(curves: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Curves as JSON-ready chart series: hours-ahead labels and one temperature list per city"""
+        length = max((len(curve['temperatures']) for curve in curves.values()), default=0)
+        return {
+            'labels': [f"+{hour}h" for hour in range(1, length + 1)],
+            'series': {city: curve['temperatures'] for city, curve in curves.items()}
+        }
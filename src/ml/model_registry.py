@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from src.ml.weather_predictor import WeatherPredictor
+from src.utils.logger import logger
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded WeatherPredictor models.
+
+    Each city's model is loaded from disk once and kept in an LRU of at most
+    ``max_models`` entries. Every lookup compares the model file's mtime and
+    size with those of the loaded copy, so a retrained model replaces the
+    cached one on the next request without a restart.
+    """
+
+    def __init__(self, model_dir: str = 'models', max_models: int = 32):
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self._models: "OrderedDict[str, Tuple[WeatherPredictor, Tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.total_load_time = 0.0
+
+    def _signature(self, predictor: WeatherPredictor) -> Optional[Tuple]:
+        """(mtime, size) of the model file, which holds the model and its encoder, or None if it is missing"""
+        try:
+            stat = os.stat(predictor.model_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, city: str) -> Optional[WeatherPredictor]:
+        """Return the city's fitted predictor, loading or reloading it if needed; None if no model is saved"""
+        predictor = WeatherPredictor(city, self.model_dir)
+        signature = self._signature(predictor)
+        with self._lock:
+            entry = self._models.get(city)
+            if signature is None:
+                # The model was removed; forget the cached copy as well
+                if entry is not None:
+                    del self._models[city]
+                return None
+            if entry is not None and entry[1] == signature:
+                self._models.move_to_end(city)
+                self.hits += 1
+                return entry[0]
+
+        start = time.perf_counter()
+        try:
+            predictor.load_model()
+        except Exception as e:
+            # The files may be mid-replacement; keep serving the previous copy until the next lookup
+            logger.warning(f"Could not load model for {city}: {str(e)}")
+            return entry[0] if entry is not None else None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.total_load_time += elapsed
+            if entry is not None:
+                self.reloads += 1
+                logger.info(f"Reloaded changed model for {city} in {elapsed * 1000:.1f} ms")
+            else:
+                self.loads += 1
+            self._store(city, predictor, signature)
+        return predictor
+
+    def put(self, city: str, predictor: WeatherPredictor):
+        """Register a predictor that was just trained and saved in this process"""
+        signature = self._signature(predictor)
+        if signature is None:
+            return
+        with self._lock:
+            self._store(city, predictor, signature)
+
+    def _store(self, city: str, predictor: WeatherPredictor, signature: Tuple):
+        self._models[city] = (predictor, signature)
+        self._models.move_to_end(city)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, city: Optional[str] = None):
+        """Drop one city's model, or every model, from the cache"""
+        with self._lock:
+            if city is None:
+                self._models.clear()
+            else:
+                self._models.pop(city, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'models': len(self._models),
+                'hits': self.hits,
+                'loads': self.loads,
+                'reloads': self.reloads,
+                'evictions': self.evictions,
+                'total_load_time': round(self.total_load_time, 3)
+            }
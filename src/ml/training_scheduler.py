@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from src.ml.weather_predictor import WeatherPredictor
+from src.utils.logger import logger
+
+# Fields read from storage to train the predictor
+TRAINING_FIELDS = {'_id': 0, 'timestamp': 1, 'temperature': 1, 'humidity': 1, 'wind_speed': 1,
+                   'weather_condition': 1}
+
+
+def train_city(city: str, data: List[Dict[str, Any]], model_dir: str) -> Dict[str, Any]:
+    """Train and save one city's model; runs in a worker process and returns its training metrics"""
+    start = time.perf_counter()
+    predictor = WeatherPredictor(city, model_dir)
+    predictor.train_model(data)
+    return {
+        'city': city,
+        'samples': len(data),
+        'training_time': round(time.perf_counter() - start, 3),
+        'model_bytes': os.path.getsize(predictor.model_path),
+        'trained_at': datetime.now().isoformat()
+    }
+
+
+class TrainingScheduler:
+    """Retrains the per-city prediction models outside the web process.
+
+    A city is retrained when it has no model yet, when its model is older
+    than ``interval`` seconds, or when ``min_new_samples`` readings were
+    stored since the model file was written. Due cities are trained in
+    parallel in a process pool; WeatherPredictor.save_model renames each
+    finished model (with its encoder) into place in one step, so the
+    dashboard's ModelRegistry only ever sees complete models and reloads them
+    by mtime. Per-city training time, sample count and
+    model size are kept in ``metrics`` and written to ``metrics_path``.
+    """
+
+    def __init__(self, storage, cities: Iterable[str], model_dir: str = 'models', interval: float = 86400,
+                 min_new_samples: int = 288, history_days: int = 7, min_samples: int = 8,
+                 max_workers: Optional[int] = None, metrics_path: Optional[str] = 'models/training_metrics.json'):
+        self.storage = storage
+        self.cities = list(cities)
+        self.model_dir = model_dir
+        self.interval = interval
+        self.min_new_samples = min_new_samples
+        self.history_days = history_days
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.metrics_path = metrics_path
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self._load_metrics()
+
+    def _load_metrics(self):
+        if not self.metrics_path or not os.path.exists(self.metrics_path):
+            return
+        try:
+            with open(self.metrics_path, 'r', encoding='utf-8') as f:
+                self.metrics = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load training metrics from {self.metrics_path}: {str(e)}")
+
+    def _save_metrics(self):
+        if not self.metrics_path:
+            return
+        try:
+            directory = os.path.dirname(self.metrics_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f"{self.metrics_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics, f, indent=2)
+            os.replace(tmp_path, self.metrics_path)
+        except OSError as e:
+            logger.error(f"Failed to write training metrics to {self.metrics_path}: {str(e)}")
+
+    def due_reason(self, city: str, data: List[Dict[str, Any]], now: Optional[float] = None) -> Optional[str]:
+        """Return why the city's model should be retrained now, or None if it is current"""
+        if len(data) < self.min_samples:
+            return None
+        model_path = WeatherPredictor(city, self.model_dir).model_path
+        if not os.path.exists(model_path):
+            return 'no model'
+        trained_at = os.path.getmtime(model_path)
+        if (now or time.time()) - trained_at >= self.interval:
+            return 'interval'
+        trained_at = datetime.fromtimestamp(trained_at)
+        new_samples = sum(1 for reading in data if reading['timestamp'] > trained_at)
+        if new_samples >= self.min_new_samples:
+            return f"{new_samples} new readings"
+        return None
+
+    def run_once(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Train every due city in parallel and return the metrics of the models that were written"""
+        jobs = {}
+        for city in self.cities:
+            try:
+                data = self.storage.get_historical_weather_data(city, days=self.history_days,
+                                                                projection=TRAINING_FIELDS)
+            except Exception as e:
+                logger.error(f"Failed to read training data for {city}: {str(e)}")
+                continue
+            reason = self.due_reason(city, data, now)
+            if reason:
+                logger.info(f"Retraining model for {city} ({reason}, {len(data)} readings)")
+                jobs[city] = data
+        if not jobs:
+            return []
+
+        results = []
+        workers = min(len(jobs), self.max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(train_city, city, data, self.model_dir): city for city, data in jobs.items()}
+            for future in as_completed(futures):
+                city = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Training failed for {city}: {str(e)}")
+                    continue
+                logger.info(f"Trained model for {city} on {result['samples']} readings in "
+                            f"{result['training_time']}s ({result['model_bytes'] / 1024:.0f} KB)")
+                self.metrics[city] = result
+                results.append(result)
+        self._save_metrics()
+        return results
+
+    def run(self, check_interval: float = 300):
+        """Check for due cities every check_interval seconds, forever"""
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error in training scheduler: {str(e)}")
+            time.sleep(check_interval)
@@ -3,15 +3,22 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 import joblib
+import numpy as np
 import os
 
+# Model inputs, in training order
+FEATURE_COLUMNS = ['hour', 'day_of_week', 'month', 'humidity', 'wind_speed', 'weather_condition']
+
 class WeatherPredictor:
-    def __init__(self, city):
+    def __init__(self, city, model_dir='models'):
         self.city = city
         self.model = None
         self.le = LabelEncoder()
-        self.model_path = f'models/{city}_weather_model.joblib'
-        self.le_path = f'models/{city}_label_encoder.joblib'
+        self.model_dir = model_dir
+        # The model and its label encoder are saved together, so they are always replaced as a pair
+        self.model_path = os.path.join(model_dir, f'{city}_weather_model.joblib')
+        # Encoder file written next to the model by older versions
+        self.le_path = os.path.join(model_dir, f'{city}_label_encoder.joblib')
         self.is_fitted = False
 
     def prepare_data(self, data):
@@ -26,7 +33,7 @@ class WeatherPredictor:
 
     def train_model(self, data):
         df = self.prepare_data(data)
-        X = df[['hour', 'day_of_week', 'month', 'humidity', 'wind_speed', 'weather_condition']]
+        X = df[FEATURE_COLUMNS]
         y = df['temperature']
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         self.model = RandomForestRegressor(n_estimators=100, random_state=42)
@@ -35,6 +42,13 @@ class WeatherPredictor:
         self.is_fitted = True
 
     def predict(self, hour, day_of_week, month, humidity, wind_speed, weather_condition):
+        return self.predict_many(np.array([[hour, day_of_week, month]]), humidity, wind_speed, weather_condition)[0]
+
+    def predict_many(self, time_features, humidity, wind_speed, weather_condition):
+        """Predict one temperature per row of an (n, 3) hour/day_of_week/month matrix in a single model call.
+
+        humidity, wind_speed and weather_condition apply to every row.
+        """
         if not self.is_fitted:
             self.load_model()
         try:
@@ -45,20 +59,35 @@ class WeatherPredictor:
         
         if self.model is None:
             raise ValueError("Model not trained or loaded. Please train the model first.")
-        
-        prediction = self.model.predict([[hour, day_of_week, month, humidity, wind_speed, weather_condition_encoded]])
-        return prediction[0]
+
+        time_features = np.asarray(time_features, dtype=float)
+        features = np.empty((len(time_features), len(FEATURE_COLUMNS)))
+        features[:, :3] = time_features
+        features[:, 3:] = (humidity, wind_speed, weather_condition_encoded)
+        # Named columns, as in training
+        return self.model.predict(pd.DataFrame(features, columns=FEATURE_COLUMNS))
 
     def save_model(self):
-        if not os.path.exists('models'):
-            os.makedirs('models')
-        joblib.dump(self.model, self.model_path)
-        joblib.dump(self.le, self.le_path)
+        if not os.path.exists(self.model_dir):
+            os.makedirs(self.model_dir)
+        # Write a temporary file and rename it into place, so a reader never loads a half-written
+        # model or a model next to the encoder of another one
+        tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+        joblib.dump({'model': self.model, 'label_encoder': self.le}, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        if os.path.exists(self.le_path):
+            os.remove(self.le_path)
 
     def load_model(self):
-        if os.path.exists(self.model_path) and os.path.exists(self.le_path):
-            self.model = joblib.load(self.model_path)
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"No trained model found for {self.city}")
+        saved = joblib.load(self.model_path)
+        if isinstance(saved, dict):
+            self.model = saved['model']
+            self.le = saved['label_encoder']
+        elif os.path.exists(self.le_path):
+            self.model = saved
             self.le = joblib.load(self.le_path)
-            self.is_fitted = True
         else:
-            raise FileNotFoundError(f"No trained model found for {self.city}")
\ No newline at end of file
+            raise FileNotFoundError(f"No label encoder found for {self.city}")
+        self.is_fitted = True
\ No newline at end of file
@@ -0,0 +1,279 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from pymongo import errors
+from src.data_processing.reading import to_documents
+from src.database.db_handler import latest_operations, mongo_connection_settings
+from src.utils.logger import logger
+
+try:
+    import aiohttp
+except ImportError:  # Optional: the thread-pool fetcher is used instead
+    aiohttp = None
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # Optional: writes go through the synchronous storage backend instead
+    AsyncIOMotorClient = None
+
+# Marks the end of a cycle on the stage queues
+_DONE = object()
+
+
+def next_tick(anchor: float, interval: float, now: float) -> float:
+    """Return the first tick anchor + k * interval that is later than now"""
+    elapsed = max(0.0, now - anchor)
+    return anchor + (int(elapsed // interval) + 1) * interval
+
+
+class AsyncWeatherFetcher:
+    """aiohttp client for current conditions that shares WeatherAPI's cache, rate limit and geocode index"""
+
+    def __init__(self, weather_api, timeout: float = 10):
+        self.weather_api = weather_api
+        self.timeout = timeout
+        self._session = None
+
+    async def fetch_current(self, city: str) -> Optional[Dict]:
+        api = self.weather_api
+        cached = api.cache.get('current', city)
+        if cached is not None:
+            logger.info(f"Using cached weather data for {city}")
+            return cached
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                                  connector=aiohttp.TCPConnector(limit=api.max_in_flight))
+        params = {"q": city, "appid": api.api_key, "units": "metric"}
+        loop = asyncio.get_running_loop()
+        for retry_count in range(1, api.MAX_RETRIES + 1):
+            try:
+                # The token bucket blocks, so wait for it off the event loop
+                await loop.run_in_executor(None, api.rate_limiter.acquire)
+                async with self._session.get(f"{api.BASE_URL}weather", params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+                logger.info(f"Successfully retrieved weather data for {city}")
+                return api._build_current(city, data)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if retry_count == api.MAX_RETRIES:
+                    logger.error(f"Failed to retrieve weather data for {city} after {api.MAX_RETRIES} retries: {str(e)}")
+                    return None
+                wait_time = (2 ** retry_count) + random.uniform(0, 1)
+                logger.warning(f"Request failed: {str(e)}. Retrying in {wait_time:.2f} seconds...")
+                await asyncio.sleep(wait_time)
+        return None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncMongoWriter:
+    """Stores readings through motor, mirroring DBHandler.store_weather_data"""
+
+    def __init__(self, config):
+        # Same server, database and write concern as DBHandler
+        client_options, db_name = mongo_connection_settings(config)
+        self.client = AsyncIOMotorClient(**client_options)
+        self.db = self.client[db_name]
+        self.collection = self.db['weather_data']
+        self.latest_collection = self.db['latest_weather']
+
+    async def store_weather_data(self, data):
+        data = to_documents(data)
+        try:
+            result = await self.collection.insert_many(data)
+        except errors.PyMongoError as e:
+            logger.error(f"Error storing weather data: {str(e)}")
+            return None
+
+        try:
+            await self.latest_collection.bulk_write(latest_operations(data), ordered=False)
+        except errors.BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                if write_error.get('code') != 11000:
+                    logger.error(f"Error updating latest weather: {write_error.get('errmsg')}")
+        except errors.PyMongoError as e:
+            logger.error(f"Error updating latest weather: {str(e)}")
+        return result.inserted_ids
+
+    def close(self):
+        self.client.close()
+
+
+def create_async_writer(config):
+    """Return an AsyncMongoWriter for a MongoDB config, or None when motor cannot be used"""
+    if config.get('type', 'mongodb') != 'mongodb':
+        logger.warning("The motor driver only applies to MongoDB storage, using the synchronous backend")
+        return None
+    if AsyncIOMotorClient is None:
+        logger.warning("motor is not installed, using the synchronous storage backend")
+        return None
+    return AsyncMongoWriter(config)
+
+
+class AsyncIngestPipeline:
+    """Overlapping fetch -> process -> store stages for the main ingestion loop.
+
+    Stages are joined by bounded asyncio queues, so while city N+1 is being
+    fetched city N is processed and city N-1 is written; a full queue makes
+    the stage before it wait. Cycles start on fixed wall-clock ticks, and
+    ticks missed by an overrunning cycle are skipped instead of queued up.
+    """
+
+    def __init__(self, weather_api, data_processor, cities: List[str],
+                 store: Callable[[List[Dict[str, Any]]], Any],
+                 finish_cycle: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+                 settings: Optional[Dict[str, Any]] = None, async_writer=None,
+                 on_commit: Optional[Callable[[List[Dict[str, Any]]], Any]] = None):
+        settings = settings or {}
+        self.weather_api = weather_api
+        self.data_processor = data_processor
+        self.cities = cities
+        self.store = store
+        self.finish_cycle = finish_cycle
+        self.async_writer = async_writer
+        self.on_commit = on_commit
+        self.queue_size = max(1, int(settings.get('queue_size', 10)))
+
+        self.fetcher = None
+        if settings.get('http_client', 'requests') == 'aiohttp':
+            if aiohttp is None:
+                logger.warning("aiohttp is not installed, fetching with the thread pool instead")
+            else:
+                self.fetcher = AsyncWeatherFetcher(weather_api)
+
+        self._fetch_executor = ThreadPoolExecutor(max_workers=weather_api.max_in_flight,
+                                                  thread_name_prefix='pipeline-fetch')
+        # A single writer thread keeps commits in the order they were queued
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-db')
+        self.last_cycle_duration = 0.0
+        self.skipped_ticks = 0
+
+    async def _fetch_one(self, city: str) -> Optional[Dict]:
+        if self.fetcher is not None:
+            return await self.fetcher.fetch_current(city)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._fetch_executor, self.weather_api._fetch_current, city)
+
+    async def _fetch_stage(self, raw_queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        if self.weather_api.bulk_enabled:
+            # Group requests already cover many cities each, so fetch them in one go
+            for data in await loop.run_in_executor(self._fetch_executor, self.weather_api.get_weather_data,
+                                                   self.cities):
+                await raw_queue.put(data)
+        else:
+            semaphore = asyncio.Semaphore(self.weather_api.max_in_flight)
+
+            async def fetch(city):
+                # Holding the semaphore while the queue is full stops new fetches (back-pressure)
+                async with semaphore:
+                    data = await self._fetch_one(city)
+                    if data:
+                        await raw_queue.put(data)
+
+            await asyncio.gather(*(fetch(city) for city in self.cities))
+            await loop.run_in_executor(self._fetch_executor, self.weather_api.geocode.save)
+        await raw_queue.put(_DONE)
+
+    async def _process_stage(self, raw_queue: asyncio.Queue, processed_queue: asyncio.Queue):
+        while True:
+            item = await raw_queue.get()
+            if item is _DONE:
+                await processed_queue.put(_DONE)
+                return
+            try:
+                for reading in self.data_processor.process([item]):
+                    await processed_queue.put(reading)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Error processing weather data for {item.get('city')}: {str(e)}")
+
+    async def _write_stage(self, processed_queue: asyncio.Queue, readings: List[Dict[str, Any]]):
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch = []
+            item = await processed_queue.get()
+            # Commit everything that queued up while the previous write was in flight
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+                if processed_queue.empty():
+                    break
+                item = processed_queue.get_nowait()
+            if not batch:
+                continue
+
+            if self.async_writer is not None:
+                if await self.async_writer.store_weather_data(batch) is not None and self.on_commit:
+                    await loop.run_in_executor(self._db_executor, self.on_commit, batch)
+            else:
+                await loop.run_in_executor(self._db_executor, self.store, batch)
+            readings.extend(batch)
+
+    async def run_cycle(self) -> List[Dict[str, Any]]:
+        """Run one ingestion cycle and return the readings it stored"""
+        start = time.monotonic()
+        raw_queue = asyncio.Queue(maxsize=self.queue_size)
+        processed_queue = asyncio.Queue(maxsize=self.queue_size)
+        readings: List[Dict[str, Any]] = []
+        stages = [
+            asyncio.ensure_future(self._fetch_stage(raw_queue)),
+            asyncio.ensure_future(self._process_stage(raw_queue, processed_queue)),
+            asyncio.ensure_future(self._write_stage(processed_queue, readings))
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # When one stage fails the others would wait on their queues forever; stop them with the cycle
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+        if self.finish_cycle:
+            # Forecasts, alerts and visualizations, after the cycle's writes have been queued
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._db_executor, self.finish_cycle, readings)
+        self.last_cycle_duration = time.monotonic() - start
+        return readings
+
+    async def run(self, interval: float, cycles: Optional[int] = None):
+        """Run cycles on fixed wall-clock ticks, interval seconds apart (forever unless cycles is given)"""
+        anchor = time.time()
+        tick = anchor
+        completed = 0
+        try:
+            while cycles is None or completed < cycles:
+                delay = tick - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                logger.info("Starting data update cycle")
+                try:
+                    readings = await self.run_cycle()
+                    logger.info(f"Stored {len(readings)} readings in {self.last_cycle_duration:.2f}s")
+                except Exception as e:
+                    logger.error(f"Error in pipeline cycle: {str(e)}")
+                completed += 1
+
+                following = next_tick(anchor, interval, time.time())
+                skipped = int(round((following - tick) / interval)) - 1
+                if skipped > 0:
+                    self.skipped_ticks += skipped
+                    logger.warning(f"Cycle overran the update interval, skipping {skipped} tick(s)")
+                tick = following
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self.fetcher is not None:
+            await self.fetcher.close()
+        if self.async_writer is not None:
+            self.async_writer.close()
+        self._fetch_executor.shutdown(wait=False)
+        self._db_executor.shutdown(wait=True)
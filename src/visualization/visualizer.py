@@ -122,6 +122,8 @@ class Visualizer:
     def plot_alerts(self, alerts):
         plt.figure(figsize=(12, 6))
         
+        # Rules on other fields may fire for readings without a temperature
+        alerts = [alert for alert in alerts if alert.get('temperature') is not None]
         cities = set(alert['city'] for alert in alerts)
         for city in cities:
             city_alerts = [alert for alert in alerts if alert['city'] == city]
@@ -16,7 +16,7 @@ def test_system():
     
     # Test 1: System Setup
     logger.info("Test 1: System Setup")
-    weather_api = WeatherAPI(config['api_key'])
+    weather_api = WeatherAPI(config['api_key'], config.get('api'))
     assert weather_api is not None, "Failed to initialize WeatherAPI"
     
     # Test 2: Current Weather Data Retrieval
@@ -0,0 +1,131 @@
+import os
+import random
+import statistics
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.data_processing.aggregator import P2Quantile, RunningStats, StreamingAggregator
+from src.data_processing.data_processor import DataProcessor
+
+class TestStreamingAggregator(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.checkpoint_path = os.path.join(self.tmp_dir.name, 'aggregator.json')
+        start = datetime(2026, 10, 17, 0, 0)
+        self.readings = [{
+            'city': city,
+            'temperature': round(random.uniform(10, 40), 2),
+            'feels_like': 20.0,
+            'humidity': random.randint(20, 95),
+            'wind_speed': round(random.uniform(0, 12), 2),
+            'weather_condition': random.choice(['Clear', 'Clouds', 'Rain']),
+            'timestamp': start + timedelta(minutes=30 * i)
+        } for i in range(96) for city in ['Delhi', 'Mumbai']]
+
+    def test_running_stats_match_statistics(self):
+        values = [random.uniform(-10, 40) for _ in range(500)]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        self.assertEqual(stats.count, 500)
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.variance, statistics.variance(values))
+        self.assertEqual((stats.min, stats.max), (min(values), max(values)))
+
+    def test_p2_quantile_estimate(self):
+        values = [random.gauss(25, 5) for _ in range(5000)]
+        estimator = P2Quantile(0.9)
+        for value in values:
+            estimator.add(value)
+        exact = sorted(values)[int(0.9 * len(values))]
+        self.assertAlmostEqual(estimator.value(), exact, delta=0.5)
+
+    def test_summaries_match_batch_path(self):
+        aggregator = StreamingAggregator()
+        for reading in self.readings:
+            aggregator.add(reading)
+
+        expected = {(s['city'], s['date']): s for s in DataProcessor().calculate_daily_summary(self.readings)}
+        summaries = aggregator.summaries()
+        self.assertEqual(len(summaries), len(expected))
+        for summary in summaries:
+            batch = expected[(summary['city'], summary['date'])]
+            for key in ['avg_temperature', 'max_temperature', 'min_temperature', 'avg_humidity', 'avg_wind_speed']:
+                self.assertAlmostEqual(summary[key], batch[key], places=2)
+            self.assertEqual(summary['dominant_condition'], batch['dominant_condition'])
+            self.assertEqual(summary['sample_count'], 48)
+
+    def test_checkpoint_survives_restart(self):
+        aggregator = StreamingAggregator(self.checkpoint_path, percentiles=[0.5])
+        aggregator.add_many(self.readings[:100])
+        aggregator.checkpoint()
+
+        restored = StreamingAggregator(self.checkpoint_path, percentiles=[0.5])
+        # Readings already counted before the restart are ignored when replayed
+        touched = restored.add_many(self.readings[90:])
+        self.assertEqual({s['city'] for s in touched}, {'Delhi', 'Mumbai'})
+
+        uninterrupted = StreamingAggregator(percentiles=[0.5])
+        uninterrupted.add_many(self.readings)
+        self.assertEqual(restored.summaries(), uninterrupted.summaries())
+        self.assertIn('temperature_p50', restored.summaries()[0])
+
+    def test_late_readings_count_and_replays_do_not(self):
+        aggregator = StreamingAggregator(self.checkpoint_path)
+        late = self.readings[:10]
+        aggregator.add_many(self.readings[10:100])
+        # Out-of-order readings within the dedupe window (e.g. replayed from the spill) are still counted once
+        aggregator.add_many(late)
+        aggregator.checkpoint()
+        restored = StreamingAggregator(self.checkpoint_path)
+        self.assertEqual(restored.add_many(late + self.readings[90:100]), [])
+        restored.add_many(self.readings[100:])
+
+        uninterrupted = StreamingAggregator()
+        uninterrupted.add_many(self.readings)
+        self.assertEqual(restored.summaries(), uninterrupted.summaries())
+
+    def test_dedupe_state_is_bounded(self):
+        aggregator = StreamingAggregator(self.checkpoint_path, dedupe_window=20)
+        aggregator.add_many(self.readings)
+        aggregator.checkpoint()
+        restored = StreamingAggregator(self.checkpoint_path, dedupe_window=20)
+        self.assertEqual({city: len(recent) for city, recent in restored._recent.items()},
+                         {'Delhi': 20, 'Mumbai': 20})
+        # Replays older than the window are skipped on days that already hold state
+        self.assertEqual(restored.add_many(self.readings), [])
+        self.assertEqual(restored.summaries(), aggregator.summaries())
+
+    def test_lost_checkpoint_is_seeded_from_storage(self):
+        # The batch was committed before the aggregator sees it, so storage already holds it
+        storage = MagicMock()
+        storage.get_historical_weather_data.side_effect = lambda city, **kwargs: [
+            {key: value for key, value in reading.items() if key not in ('city', 'feels_like')}
+            for reading in self.readings if reading['city'] == city]
+
+        aggregator = StreamingAggregator(self.checkpoint_path)
+        batch = self.readings[150:]
+        # Only the batch's day is seeded, with the 54 stored readings before the batch
+        self.assertEqual(aggregator.seed_missing_days(storage, batch), 54)
+        touched = aggregator.add_many(batch)
+        self.assertEqual({(s['city'], s['date']) for s in touched},
+                         {('Delhi', datetime(2026, 10, 18)), ('Mumbai', datetime(2026, 10, 18))})
+        self.assertEqual({s['sample_count'] for s in touched}, {48})
+
+        # Days the aggregator already holds are not read back again
+        storage.get_historical_weather_data.reset_mock()
+        aggregator.seed_missing_days(storage, batch)
+        storage.get_historical_weather_data.assert_not_called()
+
+    def test_prune_drops_old_days(self):
+        aggregator = StreamingAggregator(retention_days=1)
+        aggregator.add_many(self.readings)
+        self.assertEqual(len(aggregator), 4)
+        aggregator.prune(now=datetime(2026, 10, 19, 12, 0))
+        self.assertEqual({s['date'] for s in aggregator.summaries()}, {datetime(2026, 10, 18)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import email
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from src.alerts.dispatcher import AlertDispatcher, AlertSink, EmailSink, FileSink
+
+class LocalSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: records every message and the connection it came in on"""
+
+    def handle(self):
+        self.server.connections += 1
+        connection = self.server.connections
+        self.wfile.write(b'220 localhost test server\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith('DATA'):
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                data = []
+                for data_line in iter(self.rfile.readline, b'.\r\n'):
+                    data.append(data_line.decode())
+                self.server.messages.append((connection, ''.join(data)))
+                self.wfile.write(b'250 OK\r\n')
+            elif command.startswith('QUIT'):
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            elif command.startswith('EHLO'):
+                self.wfile.write(b'250 localhost\r\n')
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), LocalSMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+class RecordingSink(AlertSink):
+    name = 'recording'
+
+    def __init__(self, failures=0, block=None):
+        self.sent = []
+        self.failures = failures
+        self.block = block
+
+    @property
+    def recipients(self):
+        return ['ops']
+
+    def send(self, recipient, alerts):
+        if self.block:
+            self.block.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('down')
+        self.sent.append(list(alerts))
+
+class TestAlertDispatcher(unittest.TestCase):
+    def _alerts(self, *cities):
+        return [{'city': city, 'type': 'high_temperature', 'temperature': 36.0,
+                 'timestamp': datetime(2026, 10, 18, 12, 0)} for city in cities]
+
+    def _dispatcher(self, sinks, **kwargs):
+        dispatcher = AlertDispatcher(sinks, **kwargs)
+        dispatcher.start()
+        self.addCleanup(dispatcher.close, 1)
+        return dispatcher
+
+    def test_email_reuses_smtp_connection(self):
+        server = LocalSMTPServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        sink = EmailSink('127.0.0.1', server.server_address[1], 'alerts@example.com',
+                         ['ops@example.com', 'oncall@example.com'], starttls=False)
+        dispatcher = self._dispatcher([sink])
+
+        dispatcher.submit(self._alerts('Delhi'))
+        self.assertTrue(dispatcher.flush(5))
+        dispatcher.submit(self._alerts('Mumbai'))
+        self.assertTrue(dispatcher.flush(5))
+
+        self.assertEqual(len(server.messages), 4)
+        self.assertEqual(sink.connections_opened, 1)
+        self.assertEqual({connection for connection, _ in server.messages}, {1})
+        message = email.message_from_string(server.messages[-1][1])
+        self.assertEqual(message['To'], 'oncall@example.com')
+        body = message.get_payload()[0].get_payload(decode=True).decode()
+        self.assertIn('high_temperature alert for Mumbai: 36.0°C', body)
+
+        # A connection dropped by the server is replaced on the next send
+        sink._server.sock.shutdown(socket.SHUT_RDWR)
+        dispatcher.submit(self._alerts('Chennai'))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(sink.connections_opened, 2)
+        self.assertEqual(len(server.messages), 6)
+
+    def test_digest_window_coalesces_alerts(self):
+        sink = RecordingSink()
+        dispatcher = self._dispatcher([sink], digest_window=0.2)
+        for city in ('Delhi', 'Mumbai', 'Chennai'):
+            dispatcher.submit(self._alerts(city))
+        time.sleep(0.05)
+        self.assertEqual(sink.sent, [])
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual([[alert['city'] for alert in digest] for digest in sink.sent],
+                         [['Delhi', 'Mumbai', 'Chennai']])
+
+    def test_rate_limited_recipient_collects_next_digest(self):
+        sink = RecordingSink()
+        dispatcher = self._dispatcher([sink], rate=1 / 60, burst=1)
+        dispatcher.submit(self._alerts('Delhi'))
+        self.assertTrue(dispatcher.flush(5))
+        dispatcher.submit(self._alerts('Mumbai'))
+        dispatcher.submit(self._alerts('Chennai'))
+        self.assertFalse(dispatcher.flush(0.2))
+        self.assertEqual(dispatcher.metrics()['pending_alerts'], 2)
+
+        # Closing delivers what is still pending regardless of the limit
+        dispatcher.close(1)
+        self.assertEqual([len(digest) for digest in sink.sent], [1, 2])
+
+    def test_slow_sink_never_blocks_submit(self):
+        release = threading.Event()
+        sink = RecordingSink(block=release)
+        dispatcher = self._dispatcher([sink], queue_size=2)
+        start = time.monotonic()
+        results = [dispatcher.submit(self._alerts(f"City{i}")) for i in range(5)]
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertFalse(all(results))
+        self.assertGreater(dispatcher.metrics()['dropped_alerts'], 0)
+        release.set()
+        self.assertTrue(dispatcher.flush(5))
+
+    def test_close_timeout_never_delivers_from_two_threads(self):
+        release = threading.Event()
+        sink = RecordingSink(block=release)
+        dispatcher = AlertDispatcher([sink])
+        dispatcher.start()
+        worker = dispatcher._thread
+        dispatcher.submit(self._alerts('Delhi'))
+        time.sleep(0.05)  # the worker is now blocked in send
+        dispatcher.submit(self._alerts('Mumbai'))
+
+        start = time.monotonic()
+        dispatcher.close(0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(dispatcher.metrics()['dropped_alerts'], 2)
+
+        # The worker finishes its own send and stops; nothing was sent twice or by the closing thread
+        release.set()
+        worker.join(5)
+        self.assertFalse(worker.is_alive())
+        self.assertEqual([[alert['city'] for alert in digest] for digest in sink.sent], [['Delhi']])
+
+    def test_failed_digest_is_retried_and_file_sink(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, 'alerts', 'alerts.jsonl')
+        flaky = RecordingSink(failures=1)
+        dispatcher = self._dispatcher([flaky, FileSink(path)], retry_delay=0.05)
+        dispatcher.submit(self._alerts('Delhi', 'Mumbai'))
+        self.assertTrue(dispatcher.flush(5))
+
+        self.assertEqual(len(flaky.sent), 1)
+        metrics = dispatcher.metrics()
+        self.assertEqual(metrics['failed_sends'], 1)
+        self.assertEqual(metrics['sent_digests'], 2)
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
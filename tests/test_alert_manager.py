@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from src.alerts.alert_manager import AlertManager
+from src.alerts.rule_engine import AlertRule, RuleEngine
+from src.data_processing.reading import ReadingBatch
+
+class TestAlertManager(unittest.TestCase):
+    def setUp(self):
+        self.thresholds = {'high_temperature': 35, 'low_temperature': 10, 'consecutive_updates': 2}
+        self.start = datetime(2026, 10, 18, 12, 0)
+
+    def _reading(self, city, temperature, minutes, **fields):
+        reading = {'city': city, 'temperature': temperature, 'feels_like': temperature, 'humidity': 50,
+                   'wind_speed': 3.0, 'weather_condition': 'Clear',
+                   'timestamp': self.start + timedelta(minutes=minutes)}
+        reading.update(fields)
+        return reading
+
+    def test_consecutive_high_temperature(self):
+        manager = AlertManager(self.thresholds)
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 36, 0)]), [])
+        alerts = manager.check_thresholds([self._reading('Delhi', 37, 5)])
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(alerts[0]['type'], 'high_temperature')
+        self.assertEqual(alerts[0]['temperature'], 37)
+        # The streak starts over after firing
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 37, 10)]), [])
+
+    def test_streak_broken_by_normal_reading_or_gap(self):
+        manager = AlertManager(self.thresholds)
+        manager.check_thresholds([self._reading('Delhi', 5, 0)])
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 20, 5)]), [])
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 5, 10)]), [])
+        # More than ten minutes since the previous update
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 5, 30)]), [])
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 5, 35)])[0]['type'], 'low_temperature')
+
+    def test_declarative_rules(self):
+        rules = [
+            {'name': 'strong_wind', 'field': 'wind_speed', 'op': '>', 'threshold': 15},
+            {'name': 'temperature_jump', 'field': 'temperature', 'condition': 'rate_of_change',
+             'op': '>', 'threshold': 5},
+            {'name': 'poor_air', 'field': 'aqi.pm2_5', 'op': '>', 'threshold': 55, 'cities': ['Delhi']}
+        ]
+        manager = AlertManager(self.thresholds, rules)
+        self.assertTrue(manager.uses_air_quality)
+        air_quality = {city: {'aqi': 4, 'components': {'pm2_5': 80.0}} for city in ['Delhi', 'Mumbai']}
+
+        first = manager.check_thresholds([self._reading('Delhi', 20, 0), self._reading('Mumbai', 20, 0)],
+                                         air_quality)
+        self.assertEqual([(a['city'], a['type']) for a in first], [('Delhi', 'poor_air')])
+
+        second = manager.check_thresholds([self._reading('Delhi', 27, 5), self._reading('Mumbai', 21, 5,
+                                                                                          wind_speed=20.0)])
+        self.assertEqual([(a['city'], a['type']) for a in second],
+                         [('Delhi', 'temperature_jump'), ('Mumbai', 'strong_wind')])
+        self.assertEqual(second[0]['value'], 7.0)
+        self.assertIn('temperature change of 7.0', manager.describe(second[0]))
+
+    def test_rate_of_change_ignores_stale_previous_value(self):
+        rules = [{'name': 'temperature_jump', 'field': 'temperature', 'condition': 'rate_of_change',
+                  'op': '>', 'threshold': 5}]
+        manager = AlertManager(self.thresholds, rules)
+        manager.check_thresholds([self._reading('Delhi', 20, 0)])
+        # Three hours later the reading only becomes the new baseline
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 28, 180)]), [])
+        alerts = manager.check_thresholds([self._reading('Delhi', 34, 185)])
+        self.assertEqual([(a['type'], a['value']) for a in alerts], [('temperature_jump', 6.0)])
+
+    def test_streaks_survive_restart(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        state_path = os.path.join(tmp_dir.name, 'alert_state.json')
+        rules = [{'name': 'temperature_jump', 'field': 'temperature', 'condition': 'rate_of_change',
+                  'op': '>', 'threshold': 5}]
+        manager = AlertManager(self.thresholds, rules, state_path=state_path)
+        manager.check_thresholds([self._reading('Delhi', 36, 0), self._reading('Mumbai', 20, 0)])
+        manager.save_state()
+        self.assertFalse(os.path.exists(state_path))  # snapshot_interval has not passed yet
+        manager.save_state(force=True)
+
+        # consecutive_updates was raised between the runs; restored streaks still count towards it
+        restarted = AlertManager(dict(self.thresholds, consecutive_updates=3), rules, state_path=state_path)
+        self.assertEqual(restarted.check_thresholds([self._reading('Delhi', 37, 5)]), [])
+        alerts = restarted.check_thresholds([self._reading('Delhi', 37, 10), self._reading('Mumbai', 27, 10)])
+        self.assertEqual([(a['city'], a['type']) for a in alerts],
+                         [('Delhi', 'high_temperature'), ('Mumbai', 'temperature_jump')])
+
+    def test_unreadable_state_starts_fresh(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        state_path = os.path.join(tmp_dir.name, 'alert_state.json')
+        with open(state_path, 'w') as f:
+            f.write('{"cities": [')
+        manager = AlertManager(self.thresholds, state_path=state_path)
+        self.assertEqual(manager.rule_engine.city_index, {})
+
+    def test_batch_with_repeated_cities(self):
+        engine = RuleEngine([AlertRule('hot', 'temperature', '>', 35, sustained=2)])
+        batch = ReadingBatch([self._reading('Delhi', 36, 0), self._reading('Mumbai', 36, 0),
+                              self._reading('Delhi', 36, 5)])
+        alerts = engine.evaluate(batch)
+        self.assertEqual([(a['city'], a['timestamp']) for a in alerts], [('Delhi', self.start + timedelta(minutes=5))])
+
+    def test_invalid_rules(self):
+        with self.assertRaises(ValueError):
+            AlertRule.from_config({'name': 'bad', 'field': 'pressure', 'threshold': 1})
+        with self.assertRaises(ValueError):
+            AlertRule.from_config({'name': 'bad', 'field': 'humidity', 'op': '=>', 'threshold': 1})
+        with self.assertRaises(ValueError):
+            AlertRule.from_config({'name': 'bad', 'field': 'humidity'})
+        with self.assertRaises(ValueError):
+            AlertRule.from_config({'name': 'bad', 'field': 'humidity', 'threshold': 90, 'clear_threshold': 95})
+
+    def test_suppression_cooldown_escalation_and_hysteresis(self):
+        manager = AlertManager(dict(self.thresholds, hysteresis=1), suppression={
+            'enabled': True, 'cooldown': 1200, 'max_level': 2})
+        fired = {}
+        for minutes in range(0, 50, 5):
+            for alert in manager.check_thresholds([self._reading('Delhi', 36, minutes)]):
+                fired[minutes] = alert['level']
+        # Raised once, then repeated after each 20 minute cooldown up to the highest level
+        self.assertEqual(fired, {5: 1, 25: 2, 45: 2})
+        self.assertIn('(level 2)', manager.describe(manager.check_thresholds([self._reading('Delhi', 36, 65)])[0]))
+
+        # 34.5°C is inside the hysteresis band, so the alert stays raised and nothing fires
+        for minutes in (70, 75):
+            self.assertEqual(manager.check_thresholds([self._reading('Delhi', 34.5, minutes)]), [])
+        self.assertEqual(manager.check_thresholds([self._reading('Delhi', 36, 80)]), [])
+        # Below the clear threshold the alert clears and can be raised again
+        manager.check_thresholds([self._reading('Delhi', 33.5, 85)])
+        manager.check_thresholds([self._reading('Delhi', 36, 90)])
+        alerts = manager.check_thresholds([self._reading('Delhi', 36, 95)])
+        self.assertEqual([alert['level'] for alert in alerts], [1])
+
+    def test_suppressed_alerts_stay_flat_across_restart(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        state_path = os.path.join(tmp_dir.name, 'alert_state.json')
+        suppression = {'enabled': True, 'cooldown': 86400}
+        cities = [f'City{i}' for i in range(500)]
+        manager = AlertManager(self.thresholds, state_path=state_path, suppression=suppression)
+        counts = [len(manager.check_thresholds([self._reading(city, 40, minutes) for city in cities]))
+                  for minutes in range(0, 60, 5)]
+        self.assertEqual(counts, [0, 500] + [0] * 10)
+        manager.save_state(force=True)
+
+        restarted = AlertManager(self.thresholds, state_path=state_path, suppression=suppression)
+        for minutes in range(60, 90, 5):
+            self.assertEqual(restarted.check_thresholds([self._reading(city, 40, minutes) for city in cities]), [])
+
+    def test_many_rules_and_cities(self):
+        rules = [AlertRule(f'rule{i}', 'humidity', '>', i % 100, sustained=1 + i % 3) for i in range(1000)]
+        engine = RuleEngine(rules)
+        readings = [self._reading(f'City{i}', 20, 0, humidity=i % 100) for i in range(1000)]
+        engine.evaluate(readings)
+        self.assertEqual(engine._streaks.shape, (1000, 1000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from src.api.weather_api import WeatherAPI
+from src.data_processing.data_processor import DataProcessor
+from src.pipeline.async_pipeline import AsyncIngestPipeline, create_async_writer, next_tick
+
+class TestAsyncPipeline(unittest.TestCase):
+    def setUp(self):
+        self.weather_api = WeatherAPI('test_key', {'max_in_flight': 2, 'rate_limit': {'requests_per_second': 0}})
+        self.addCleanup(self.weather_api.close)
+        self.cities = ['Delhi', 'Mumbai', 'Chennai', 'Kolkata']
+        self.stored = []
+
+    def _fake_fetch(self, city):
+        time.sleep(0.01)
+        return {'city': city, 'main': 'Clear', 'temp': 25.0, 'feels_like': 26.0,
+                'humidity': 60, 'wind_speed': 3.0, 'dt': 1697800000}
+
+    def _pipeline(self, **kwargs):
+        return AsyncIngestPipeline(self.weather_api, DataProcessor(), self.cities, self.stored.append, **kwargs)
+
+    def test_next_tick_is_fixed_rate(self):
+        self.assertEqual(next_tick(100.0, 10.0, 100.0), 110.0)
+        self.assertEqual(next_tick(100.0, 10.0, 104.5), 110.0)
+        # An overrun skips to the next tick on the original grid instead of drifting
+        self.assertEqual(next_tick(100.0, 10.0, 125.0), 130.0)
+
+    def test_cycle_stores_every_city(self):
+        finished = []
+        pipeline = self._pipeline(finish_cycle=finished.append, settings={'queue_size': 1})
+        with patch.object(self.weather_api, '_fetch_current', side_effect=self._fake_fetch):
+            readings = asyncio.run(pipeline.run_cycle())
+        asyncio.run(pipeline.close())
+
+        self.assertEqual(sorted(r['city'] for r in readings), sorted(self.cities))
+        self.assertEqual(sum(len(batch) for batch in self.stored), len(self.cities))
+        self.assertEqual(finished, [readings])
+
+    def test_writes_overlap_fetches(self):
+        events = []
+        lock = threading.Lock()
+
+        def fetch(city):
+            with lock:
+                events.append(('fetch', city))
+            return self._fake_fetch(city)
+
+        def store(batch):
+            with lock:
+                events.append(('store', len(batch)))
+
+        self.weather_api.max_in_flight = 1
+        pipeline = AsyncIngestPipeline(self.weather_api, DataProcessor(), self.cities, store,
+                                       settings={'queue_size': 1})
+        with patch.object(self.weather_api, '_fetch_current', side_effect=fetch):
+            asyncio.run(pipeline.run(interval=60, cycles=1))
+
+        kinds = [kind for kind, _ in events]
+        # The first write happens before the last city has been fetched
+        self.assertLess(kinds.index('store'), len(kinds) - 1 - kinds[::-1].index('fetch'))
+
+    def test_run_schedules_cycles_on_ticks(self):
+        pipeline = self._pipeline()
+        with patch.object(self.weather_api, '_fetch_current', side_effect=self._fake_fetch):
+            start = time.monotonic()
+            asyncio.run(pipeline.run(interval=0.2, cycles=2))
+            elapsed = time.monotonic() - start
+        # The second cycle starts 0.2s after the first, whatever the first cycle took
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(pipeline.skipped_ticks, 0)
+
+    def test_motor_writer_needs_mongodb(self):
+        self.assertIsNone(create_async_writer({'type': 'sqlite'}))
+        with patch('src.pipeline.async_pipeline.AsyncIOMotorClient', None):
+            self.assertIsNone(create_async_writer({'type': 'mongodb'}))
+
+    def test_async_writer_commit_callback(self):
+        writer = MagicMock()
+
+        async def store_weather_data(batch):
+            return ['id'] * len(batch)
+
+        writer.store_weather_data = store_weather_data
+        committed = []
+        pipeline = self._pipeline(async_writer=writer, on_commit=committed.extend)
+        with patch.object(self.weather_api, '_fetch_current', side_effect=self._fake_fetch):
+            asyncio.run(pipeline.run(interval=60, cycles=1))
+        self.assertEqual(len(committed), len(self.cities))
+        self.assertEqual(self.stored, [])
+        writer.close.assert_called_once()
+
+    def test_failed_store_does_not_leak_stages(self):
+        failures = [ConnectionError('down')]
+
+        def store(batch):
+            if failures:
+                raise failures.pop()
+            self.stored.append(batch)
+
+        pipeline = AsyncIngestPipeline(self.weather_api, DataProcessor(), self.cities, store,
+                                       settings={'queue_size': 1})
+
+        async def two_cycles():
+            with self.assertRaises(ConnectionError):
+                await pipeline.run_cycle()
+            # The fetch and process stages of the failed cycle were stopped, not left waiting
+            self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+            return await pipeline.run_cycle()
+
+        with patch.object(self.weather_api, '_fetch_current', side_effect=self._fake_fetch):
+            readings = asyncio.run(two_cycles())
+        asyncio.run(pipeline.close())
+        self.assertEqual(sorted(r['city'] for r in readings), sorted(self.cities))
+
+    def test_motor_writer_uses_database_from_uri(self):
+        client = MagicMock()
+        with patch('src.pipeline.async_pipeline.AsyncIOMotorClient', client), \
+                patch.dict('os.environ', {'MONGODB_URI': 'mongodb://db.example.com:27017/weather_prod?authSource=admin'}):
+            create_async_writer({'type': 'mongodb', 'name': 'weather_db'})
+        self.assertEqual(client.call_args.kwargs['host'], 'mongodb://db.example.com:27017/weather_prod?authSource=admin')
+        self.assertEqual(client.call_args.kwargs['w'], 'majority')
+        client.return_value.__getitem__.assert_called_once_with('weather_prod')
+
+if __name__ == '__main__':
+    unittest.main()
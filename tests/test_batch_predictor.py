@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from jinja2 import Environment, FileSystemLoader
+from src.ml.batch_predictor import BatchPredictor
+from src.ml.model_registry import ModelRegistry
+from src.ml.weather_predictor import WeatherPredictor
+
+class TestBatchPredictor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        start = datetime(2026, 10, 1)
+        data = [{'timestamp': start + timedelta(hours=i), 'temperature': 20.0 + (i % 24) / 2,
+                 'humidity': 50 + i % 7, 'wind_speed': 2.0 + i % 3,
+                 'weather_condition': 'Clear' if i % 2 else 'Clouds'} for i in range(200)]
+        for city in ('Delhi', 'Mumbai'):
+            WeatherPredictor(city, self.tmp_dir.name).train_model(data)
+        self.registry = ModelRegistry(self.tmp_dir.name)
+        self.batch_predictor = BatchPredictor(self.registry, horizon_hours=48)
+        self.latest = {city: {'city': city, 'temperature': 25.0, 'humidity': 55, 'wind_speed': 3.0,
+                              'weather_condition': 'Clear', 'timestamp': datetime(2026, 10, 18, 9, 40)}
+                       for city in ('Delhi', 'Mumbai', 'Chennai')}
+
+    def test_curves_match_single_point_predictions(self):
+        curves = self.batch_predictor.curves(self.latest)
+        self.assertEqual(sorted(curves), ['Delhi', 'Mumbai'])
+        curve = curves['Delhi']
+        self.assertEqual(len(curve['temperatures']), 48)
+        self.assertEqual(curve['times'][0], datetime(2026, 10, 18, 10, 0))
+        self.assertEqual(curve['times'][23], datetime(2026, 10, 19, 9, 0))
+
+        predictor = self.registry.get('Delhi')
+        for hours in (1, 24, 48):
+            time = curve['times'][hours - 1]
+            expected = predictor.predict(time.hour, time.weekday(), time.month, 55, 3.0, 'Clear')
+            self.assertAlmostEqual(BatchPredictor.at(curve, hours), round(expected, 1))
+        self.assertIsNone(BatchPredictor.at(curve, 49))
+
+    def test_curves_cached_until_next_reading(self):
+        first = self.batch_predictor.curves(self.latest)
+        self.assertIs(self.batch_predictor.curves(self.latest)['Delhi'], first['Delhi'])
+        self.assertEqual(self.batch_predictor.hits, 2)
+
+        self.latest['Delhi'] = dict(self.latest['Delhi'], timestamp=datetime(2026, 10, 18, 9, 45), humidity=90)
+        second = self.batch_predictor.curves(self.latest)
+        self.assertIsNot(second['Delhi'], first['Delhi'])
+        self.assertIs(second['Mumbai'], first['Mumbai'])
+
+    def test_dashboard_renders_prediction_chart(self):
+        curves = self.batch_predictor.curves(self.latest)
+        chart = BatchPredictor.chart_data(curves)
+        self.assertEqual(chart['labels'][0], '+1h')
+        self.assertEqual(len(chart['series']['Mumbai']), 48)
+
+        templates = os.path.join(os.path.dirname(__file__), '..', 'templates')
+        template = Environment(loader=FileSystemLoader(templates)).get_template('dashboard.html')
+        html = template.render(latest_data={}, predictions={}, prediction_errors={}, aqi_data={},
+                               prediction_chart=chart, datetime=datetime)
+        self.assertIn('predictionChart', html)
+        self.assertIn('"+48h"', html)
+
+if __name__ == '__main__':
+    unittest.main()
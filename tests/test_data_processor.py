@@ -0,0 +1,67 @@
+import random
+import unittest
+from datetime import datetime
+from src.data_processing.data_processor import ColumnarDataProcessor, DataProcessor
+
+class TestDataProcessor(unittest.TestCase):
+    def setUp(self):
+        random.seed(7)
+        self.raw_data = [{
+            'city': city,
+            'temp': round(random.uniform(10, 40), 2),
+            'feels_like': round(random.uniform(10, 42), 2),
+            'humidity': random.randint(20, 95),
+            'wind_speed': round(random.uniform(0, 12), 2),
+            'main': random.choice(['Clear', 'Clouds', 'Rain']),
+            'dt': 1697800000 + 3600 * i
+        } for i in range(60) for city in ['Delhi', 'Mumbai', 'Chennai']]
+        self.forecast_data = {
+            city: [{
+                'dt': 1697800000 + 10800 * i,
+                'temp': 20.0 + i % 8,
+                'humidity': 50 + i,
+                'wind_speed': 2.5,
+                'main': ['Clear', 'Rain', 'Rain', 'Clouds'][i % 4]
+            } for i in range(40)]
+            for city in ['Delhi', 'Mumbai']
+        }
+
+    def test_process(self):
+        processed = DataProcessor().process(self.raw_data[:1])
+        self.assertEqual(processed[0]['temperature'], self.raw_data[0]['temp'])
+        self.assertEqual(processed[0]['weather_condition'], self.raw_data[0]['main'])
+        self.assertEqual(processed[0]['timestamp'], datetime.fromtimestamp(self.raw_data[0]['dt']))
+
+    def test_summarize_forecast_dominant_condition(self):
+        processor = DataProcessor()
+        summary = processor.summarize_forecast(processor.process_forecast(self.forecast_data))
+        self.assertEqual(set(summary), {'Delhi', 'Mumbai'})
+        for day in summary['Delhi']:
+            self.assertIn(day['dominant_condition'], {'Clear', 'Rain', 'Clouds'})
+        self.assertTrue(any(day['dominant_condition'] == 'Rain' for day in summary['Delhi']))
+
+    def test_columnar_matches_dict_path(self):
+        dict_processor = DataProcessor()
+        columnar = ColumnarDataProcessor()
+
+        processed = columnar.process(self.raw_data)
+        self.assertEqual(processed, dict_processor.process(self.raw_data))
+        self.assertIsInstance(processed[0]['humidity'], int)
+        self.assertIs(type(processed[0]['timestamp']), datetime)
+
+        self.assertEqual(columnar.calculate_daily_summary(processed),
+                         dict_processor.calculate_daily_summary(processed))
+        self.assertEqual(columnar.calculate_daily_summary(columnar.to_frame(self.raw_data)),
+                         dict_processor.calculate_daily_summary(processed))
+
+        self.assertEqual(columnar.summarize_forecast(columnar.process_forecast(self.forecast_data)),
+                         dict_processor.summarize_forecast(dict_processor.process_forecast(self.forecast_data)))
+
+    def test_columnar_empty_batches(self):
+        columnar = ColumnarDataProcessor()
+        self.assertEqual(columnar.process([]), [])
+        self.assertEqual(columnar.calculate_daily_summary([]), [])
+        self.assertEqual(columnar.summarize_forecast({}), {})
+
+if __name__ == '__main__':
+    unittest.main()
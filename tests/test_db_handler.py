@@ -0,0 +1,275 @@
+import unittest
+import types
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import mongomock
+from pymongo import errors
+from src.database.db_handler import DBHandler
+
+class TestDBHandler(unittest.TestCase):
+    def setUp(self):
+        # Run the handler against an in-memory mongomock client
+        patcher = patch('src.database.db_handler.MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = {'host': 'localhost', 'port': 27017, 'name': 'weather_test', 'bulk_chunk_size': 2}
+        self.db_handler = DBHandler(self.config)
+
+    def _summary(self, city, day, avg):
+        return {
+            'city': city,
+            'date': datetime(2024, 10, day),
+            'avg_temperature': avg,
+            'max_temperature': avg + 2,
+            'min_temperature': avg - 2,
+            'avg_humidity': 60.0,
+            'avg_wind_speed': 3.0,
+            'dominant_condition': 'Clear'
+        }
+
+    def test_store_daily_summary_reports_counts(self):
+        summaries = [self._summary('Delhi', 20, 30.0), self._summary('Delhi', 21, 31.0),
+                     self._summary('Mumbai', 20, 28.0)]
+        result = self.db_handler.store_daily_summary(summaries)
+        self.assertEqual(result['upserted'], 3)
+        self.assertEqual(result['errors'], [])
+
+        # Re-storing one changed and one identical summary matches both but modifies one
+        result = self.db_handler.store_daily_summary([self._summary('Delhi', 20, 32.0),
+                                                      self._summary('Mumbai', 20, 28.0)])
+        self.assertEqual(result, {'matched': 2, 'modified': 1, 'upserted': 0, 'errors': []})
+        self.assertEqual(self.db_handler.summary_collection.count_documents({}), 3)
+        stored = self.db_handler.summary_collection.find_one({'city': 'Delhi', 'date': datetime(2024, 10, 20)})
+        self.assertEqual(stored['avg_temperature'], 32.0)
+
+    def test_store_forecast_summary_chunks_bulk_writes(self):
+        forecasts = {
+            'Delhi': [{'date': datetime(2024, 10, d), 'avg_temp': 30.0 + d} for d in range(20, 25)],
+            'Chennai': [{'date': datetime(2024, 10, 20), 'avg_temp': 29.0}]
+        }
+        collection = self.db_handler.forecast_collection
+        with patch.object(collection, 'bulk_write', wraps=collection.bulk_write) as mock_bulk_write:
+            result = self.db_handler.store_forecast_summary(forecasts)
+
+        # Six upserts with a chunk size of two need three unordered bulk writes
+        self.assertEqual(mock_bulk_write.call_count, 3)
+        self.assertFalse(mock_bulk_write.call_args[1]['ordered'])
+        self.assertEqual(result['upserted'], 6)
+        self.assertEqual(collection.count_documents({'city': 'Delhi'}), 5)
+
+    def test_bulk_write_errors_are_reported_per_document(self):
+        summaries = [self._summary('Delhi', 20, 30.0), self._summary('Mumbai', 20, 28.0)]
+        bulk_error = errors.BulkWriteError({
+            'nMatched': 0, 'nModified': 0, 'nUpserted': 1,
+            'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'}]
+        })
+        with patch.object(self.db_handler.summary_collection, 'bulk_write', side_effect=bulk_error):
+            result = self.db_handler.store_daily_summary(summaries)
+
+        self.assertEqual(result['upserted'], 1)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['errors'][0]['key'], ('Mumbai', datetime(2024, 10, 20)))
+        self.assertEqual(result['errors'][0]['code'], 11000)
+
+    def test_operations_do_not_ping(self):
+        with patch.object(self.db_handler.client.admin, 'command') as mock_command:
+            self.db_handler.store_weather_data([{'city': 'Delhi', 'temperature': 30.0,
+                                                 'timestamp': datetime(2024, 10, 20, 12)}])
+            self.db_handler.get_recent_weather_data('Delhi', limit=1)
+            self.db_handler.get_cities()
+        mock_command.assert_not_called()
+
+    def test_reconnects_and_retries_after_connection_failure(self):
+        self.db_handler.store_weather_data([{'city': 'Delhi', 'temperature': 30.0,
+                                             'timestamp': datetime(2024, 10, 20, 12)}])
+        cursor = self.db_handler.weather_collection.find({'city': 'Delhi'})
+        with patch.object(self.db_handler.weather_collection, 'find',
+                          side_effect=[errors.AutoReconnect('connection reset'), cursor]), \
+                patch.object(self.db_handler, '_connect') as mock_connect:
+            result = self.db_handler.get_recent_weather_data('Delhi')
+
+        mock_connect.assert_called_once()
+        self.assertEqual(len(result), 1)
+
+    def test_inserts_are_not_retried_after_connection_failure(self):
+        insert_many = self.db_handler.weather_collection.insert_many
+
+        def commit_then_drop(documents):
+            # The server committed the batch, but the reply was lost
+            insert_many(documents)
+            raise errors.AutoReconnect('connection reset')
+
+        with patch.object(self.db_handler.weather_collection, 'insert_many',
+                          side_effect=commit_then_drop) as mock_insert, \
+                patch.object(self.db_handler, '_connect') as mock_connect:
+            result = self.db_handler.store_weather_data([{'city': 'Delhi', 'temperature': 30.0,
+                                                          'timestamp': datetime(2024, 10, 20, 12)}])
+
+        self.assertIsNone(result)
+        mock_connect.assert_called_once()
+        mock_insert.assert_called_once()
+        self.assertEqual(self.db_handler.weather_collection.count_documents({'city': 'Delhi'}), 1)
+
+    def test_find_stored_readings(self):
+        now = datetime(2024, 10, 20, 12)
+        self.db_handler.store_weather_data([{'city': 'Delhi', 'temperature': 30.0, 'timestamp': now}])
+        candidates = [{'city': 'Delhi', 'timestamp': now}, {'city': 'Delhi', 'timestamp': now + timedelta(minutes=5)},
+                      {'city': 'Mumbai', 'timestamp': now}]
+        self.assertEqual(self.db_handler.find_stored_readings(candidates), {('Delhi', now)})
+
+    def test_historical_data_projection_and_streaming(self):
+        now = datetime.utcnow()
+        self.db_handler.store_weather_data([
+            {'city': 'Delhi', 'temperature': 20.0 + i, 'humidity': 50, 'wind_speed': 2.0,
+             'weather_condition': 'Clear', 'timestamp': now - timedelta(hours=i)}
+            for i in range(5)
+        ])
+        projection = {'_id': 0, 'timestamp': 1, 'temperature': 1}
+
+        records = self.db_handler.get_historical_weather_data('Delhi', days=1, projection=projection)
+        self.assertEqual(len(records), 5)
+        self.assertEqual(set(records[0]), {'timestamp', 'temperature'})
+
+        stream = self.db_handler.get_historical_weather_data('Delhi', days=1, projection=projection,
+                                                             stream=True, batch_size=2)
+        self.assertIsInstance(stream, types.GeneratorType)
+        temperatures = [record['temperature'] for record in stream]
+        # Oldest first, matching the list mode
+        self.assertEqual(temperatures, [24.0, 23.0, 22.0, 21.0, 20.0])
+
+        alerts = list(self.db_handler.get_data_for_alerts('Delhi', hours=2, projection=projection, stream=True))
+        self.assertEqual(len(alerts), 2)
+
+    def test_timeseries_mode_creates_collection_with_retention(self):
+        config = dict(self.config, name='weather_ts',
+                      timeseries={'enabled': True, 'expire_after_seconds': 86400})
+        with patch.object(mongomock.Database, 'create_collection', autospec=True) as mock_create:
+            DBHandler(config)
+
+        mock_create.assert_called_once()
+        _, name = mock_create.call_args[0]
+        self.assertEqual(name, 'weather_data')
+        self.assertEqual(mock_create.call_args[1], {
+            'timeseries': {'timeField': 'timestamp', 'metaField': 'city', 'granularity': 'minutes'},
+            'expireAfterSeconds': 86400
+        })
+
+    def test_migrate_weather_data_to_timeseries(self):
+        self.db_handler.store_weather_data([
+            {'city': 'Delhi', 'temperature': 20.0 + i, 'timestamp': datetime(2024, 10, 20, i)}
+            for i in range(5)
+        ])
+        db = self.db_handler.db
+        # mongomock has no time-series support, so create a plain collection in its place
+        with patch.object(self.db_handler, '_is_timeseries', return_value=False), \
+                patch.object(self.db_handler, '_create_timeseries_collection',
+                             side_effect=lambda name='weather_data': db.create_collection(name)):
+            copied = self.db_handler.migrate_weather_data_to_timeseries(batch_size=2)
+
+        self.assertEqual(copied, 5)
+        self.assertEqual(self.db_handler.weather_collection.count_documents({'city': 'Delhi'}), 5)
+        self.assertEqual(db['weather_data_legacy'].count_documents({}), 5)
+        self.assertEqual(len(self.db_handler.get_recent_weather_data('Delhi', limit=10)), 5)
+
+    def test_interrupted_migration_resumes_before_dropping_legacy(self):
+        self.db_handler.store_weather_data([
+            {'city': 'Delhi', 'temperature': 20.0 + i, 'timestamp': datetime(2024, 10, 20, i)}
+            for i in range(5)
+        ])
+        db = self.db_handler.db
+        created = []
+
+        def create_collection(name='weather_data'):
+            created.append(name)
+            db.create_collection(name)
+
+        insert_many = mongomock.Collection.insert_many
+        calls = []
+
+        def failing_insert_many(collection, documents, *args, **kwargs):
+            calls.append(len(documents))
+            if len(calls) == 2:
+                raise errors.AutoReconnect('connection reset')
+            return insert_many(collection, documents, *args, **kwargs)
+
+        with patch.object(self.db_handler, '_is_timeseries', side_effect=lambda name='weather_data': bool(created)), \
+                patch.object(self.db_handler, '_create_timeseries_collection', side_effect=create_collection):
+            with patch.object(mongomock.Collection, 'insert_many', failing_insert_many):
+                with self.assertRaises(errors.AutoReconnect):
+                    self.db_handler.migrate_weather_data_to_timeseries(batch_size=2, drop_legacy=True)
+            self.assertEqual(db['weather_data_legacy'].count_documents({}), 5)
+
+            # A gap in the copy is never dropped
+            db['weather_data'].delete_one({'temperature': 20.0})
+            with self.assertRaises(RuntimeError):
+                self.db_handler.migrate_weather_data_to_timeseries(batch_size=2, drop_legacy=True)
+            self.assertEqual(db['weather_data_legacy'].count_documents({}), 5)
+
+            db['weather_data'].insert_one(db['weather_data_legacy'].find_one({'temperature': 20.0}))
+            self.assertEqual(self.db_handler.migrate_weather_data_to_timeseries(batch_size=2, drop_legacy=True), 0)
+
+        self.assertEqual(created, ['weather_data'])
+        self.assertNotIn('weather_data_legacy', db.list_collection_names())
+        temperatures = sorted(reading['temperature'] for reading in db['weather_data'].find())
+        self.assertEqual(temperatures, [20.0, 21.0, 22.0, 23.0, 24.0])
+
+    def test_refresh_daily_summaries_merges_only_touched_days(self):
+        readings = [
+            {'city': 'Delhi', 'temperature': 30.0, 'timestamp': datetime(2024, 10, 20, 9)},
+            {'city': 'Delhi', 'temperature': 32.0, 'timestamp': datetime(2024, 10, 20, 15)},
+            {'city': 'Mumbai', 'temperature': 28.0, 'timestamp': datetime(2024, 10, 21, 1)}
+        ]
+        self.db_handler.store_daily_summary([self._summary('Delhi', 20, 31.0)])
+        with patch.object(self.db_handler.weather_collection, 'aggregate', return_value=iter([])) as mock_aggregate:
+            summaries = self.db_handler.refresh_daily_summaries(readings)
+
+        pipeline = mock_aggregate.call_args[0][0]
+        self.assertEqual(pipeline[0]['$match']['$or'], [
+            {'city': 'Delhi', 'timestamp': {'$gte': datetime(2024, 10, 20), '$lt': datetime(2024, 10, 21)}},
+            {'city': 'Mumbai', 'timestamp': {'$gte': datetime(2024, 10, 21), '$lt': datetime(2024, 10, 22)}}
+        ])
+        self.assertEqual(pipeline[-1]['$merge']['into'], 'daily_summaries')
+        self.assertEqual(pipeline[-1]['$merge']['on'], ['city', 'date'])
+        # Only the summaries for touched days come back
+        self.assertEqual([(s['city'], s['date']) for s in summaries], [('Delhi', datetime(2024, 10, 20))])
+
+    def test_refresh_daily_summaries_returns_none_on_failure(self):
+        with patch.object(self.db_handler.weather_collection, 'aggregate',
+                          side_effect=errors.OperationFailure('$merge not supported')):
+            result = self.db_handler.refresh_daily_summaries([
+                {'city': 'Delhi', 'temperature': 30.0, 'timestamp': datetime(2024, 10, 20, 9)}
+            ])
+        self.assertIsNone(result)
+
+    def test_latest_for_all_cities_tracks_newest_reading(self):
+        self.db_handler.store_weather_data([
+            {'city': 'Delhi', 'temperature': 30.0, 'timestamp': datetime(2024, 10, 20, 12)},
+            {'city': 'Delhi', 'temperature': 31.0, 'timestamp': datetime(2024, 10, 20, 13)},
+            {'city': 'Mumbai', 'temperature': 28.0, 'timestamp': datetime(2024, 10, 20, 12)}
+        ])
+        # An out-of-order older reading must not replace the newer one
+        self.db_handler.store_weather_data([
+            {'city': 'Delhi', 'temperature': 25.0, 'timestamp': datetime(2024, 10, 20, 11)}
+        ])
+
+        with patch.object(self.db_handler.weather_collection, 'find') as mock_find:
+            latest = self.db_handler.get_latest_for_all_cities()
+        mock_find.assert_not_called()
+
+        self.assertEqual(list(latest), ['Delhi', 'Mumbai'])
+        self.assertEqual(latest['Delhi']['temperature'], 31.0)
+        self.assertNotIn('_id', latest['Delhi'])
+
+    def test_latest_for_all_cities_backfills_from_weather_data(self):
+        self.db_handler.weather_collection.insert_many([
+            {'city': 'Chennai', 'temperature': 29.0, 'timestamp': datetime(2024, 10, 20, 12)},
+            {'city': 'Chennai', 'temperature': 33.0, 'timestamp': datetime(2024, 10, 20, 14)}
+        ])
+
+        latest = self.db_handler.get_latest_for_all_cities()
+
+        self.assertEqual(latest['Chennai']['temperature'], 33.0)
+        self.assertEqual(self.db_handler.latest_collection.count_documents({}), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import joblib
+from src.ml.model_registry import ModelRegistry
+from src.ml.weather_predictor import WeatherPredictor
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.model_dir = self.tmp_dir.name
+        self.registry = ModelRegistry(self.model_dir, max_models=2)
+
+    def _train(self, city, offset=0.0):
+        start = datetime(2026, 10, 18)
+        data = [{'timestamp': start + timedelta(hours=i), 'temperature': 20.0 + offset + i % 10,
+                 'humidity': 50 + i % 7, 'wind_speed': 2.0 + i % 3,
+                 'weather_condition': 'Clear' if i % 2 else 'Clouds'} for i in range(40)]
+        predictor = WeatherPredictor(city, self.model_dir)
+        predictor.train_model(data)
+        return predictor
+
+    def test_loads_once_and_serves_from_cache(self):
+        self.assertIsNone(self.registry.get('Delhi'))
+        self._train('Delhi')
+        first = self.registry.get('Delhi')
+        self.assertTrue(first.is_fitted)
+        self.assertIs(self.registry.get('Delhi'), first)
+        stats = self.registry.stats()
+        self.assertEqual((stats['loads'], stats['hits']), (1, 1))
+        self.assertIsInstance(first.predict(12, 0, 10, 55, 2.5, 'Clear'), float)
+
+    def test_reloads_when_model_file_changes(self):
+        self._train('Delhi')
+        first = self.registry.get('Delhi')
+        self._train('Delhi', offset=15.0)
+        # Make sure the rewrite is visible even on filesystems with coarse timestamps
+        stat = os.stat(first.model_path)
+        os.utime(first.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        second = self.registry.get('Delhi')
+        self.assertIsNot(second, first)
+        self.assertEqual(self.registry.stats()['reloads'], 1)
+        self.assertGreater(second.predict(12, 0, 10, 55, 2.5, 'Clear'), first.predict(12, 0, 10, 55, 2.5, 'Clear'))
+
+        os.remove(second.model_path)
+        self.assertIsNone(self.registry.get('Delhi'))
+
+    def test_model_and_encoder_are_one_artifact(self):
+        trained = self._train('Delhi')
+        # One file is renamed into place, so a reload never pairs a new model with an old encoder
+        self.assertEqual(os.listdir(self.model_dir), ['Delhi_weather_model.joblib'])
+
+        # Models saved as separate model and encoder files still load
+        joblib.dump(trained.model, trained.model_path)
+        joblib.dump(trained.le, trained.le_path)
+        legacy = self.registry.get('Delhi')
+        self.assertEqual(list(legacy.le.classes_), ['Clear', 'Clouds'])
+        self._train('Delhi')
+        self.assertFalse(os.path.exists(trained.le_path))
+
+    def test_least_recently_used_model_is_evicted(self):
+        for city in ('Delhi', 'Mumbai', 'Chennai'):
+            self.registry.put(city, self._train(city))
+        self.assertEqual(self.registry.stats()['models'], 2)
+        self.assertEqual(self.registry.stats()['evictions'], 1)
+        self.registry.get('Mumbai')
+        self.registry.get('Delhi')
+        stats = self.registry.stats()
+        self.assertEqual((stats['hits'], stats['loads']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
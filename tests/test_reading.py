@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import mongomock
+from src.alerts.alert_manager import AlertManager
+from src.data_processing.data_processor import DataProcessor
+from src.data_processing.reading import Reading, ReadingBatch, to_documents
+from src.database.storage import create_storage
+
+class TestReading(unittest.TestCase):
+    def setUp(self):
+        start = datetime(2026, 10, 18, 8, 0, 0, 123456)
+        self.raw_data = [{
+            'city': ''.join(['Del', 'hi']) if i % 2 else 'Mumbai',
+            'main': 'Clear',
+            'temp': 36.0 + i,
+            'feels_like': 38.0,
+            'humidity': 40,
+            'wind_speed': 2.5,
+            'dt': int((start + timedelta(minutes=5 * i)).timestamp())
+        } for i in range(6)]
+        self.processed = DataProcessor().process(self.raw_data)
+
+    def test_reading_is_a_read_only_mapping(self):
+        reading = Reading.from_dict(self.processed[0])
+        self.assertEqual(reading['temperature'], 36.0)
+        self.assertEqual(dict(reading), self.processed[0])
+        self.assertEqual(reading.get('missing', 'default'), 'default')
+        self.assertFalse(hasattr(reading, '__dict__'))
+        with self.assertRaises(AttributeError):
+            reading.extra = 1
+
+    def test_strings_are_interned(self):
+        batch = DataProcessor().process_batch(self.raw_data)
+        self.assertIs(batch.cities[1], batch.cities[3])
+        self.assertIs(batch[1].city, 'Delhi')
+
+    def test_batch_round_trip(self):
+        batch = DataProcessor().process_batch(self.raw_data)
+        self.assertEqual(len(batch), 6)
+        self.assertEqual(batch.to_records(), self.processed)
+        self.assertEqual([dict(reading) for reading in batch], self.processed)
+        self.assertEqual(dict(batch[-1]), self.processed[-1])
+        self.assertEqual(batch[2:4].to_records(), self.processed[2:4])
+        self.assertEqual(list(batch.column('temperature')), [r['temperature'] for r in self.processed])
+        # Humidity stays an int, as in the processed dicts
+        self.assertEqual({type(record['humidity']) for record in batch.to_records()}, {int})
+        self.assertIsInstance(ReadingBatch([dict(self.processed[0], humidity=40.0)])[0]['humidity'], int)
+
+        documents = to_documents(batch)
+        documents[0]['_id'] = 'added by the driver'
+        self.assertNotIn('_id', batch[0])
+
+    def test_alerts_match_dict_path(self):
+        thresholds = {'high_temperature': 35, 'low_temperature': 0, 'consecutive_updates': 2}
+        by_dicts = AlertManager(thresholds).check_thresholds(self.processed)
+        by_batch = AlertManager(thresholds).check_thresholds(DataProcessor().process_batch(self.raw_data))
+        self.assertTrue(by_dicts)
+        self.assertEqual(by_batch, by_dicts)
+
+    def test_storage_backends_accept_batches(self):
+        batch = DataProcessor().process_batch(self.raw_data)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        sqlite = create_storage({'type': 'sqlite', 'path': os.path.join(tmp_dir.name, 'weather.db')})
+        self.addCleanup(sqlite.close)
+        with patch('src.database.db_handler.MongoClient', mongomock.MongoClient):
+            mongo = create_storage({'type': 'mongodb', 'host': 'localhost', 'port': 27017, 'name': 'test_db'})
+
+        for handler in (sqlite, mongo):
+            self.assertIsNotNone(handler.store_weather_data(batch))
+            latest = handler.get_latest_for_all_cities()
+            self.assertEqual(latest['Delhi']['temperature'], 41.0)
+            self.assertEqual(latest['Delhi']['timestamp'], self.processed[-1]['timestamp'])
+
+if __name__ == '__main__':
+    unittest.main()
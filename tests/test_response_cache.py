@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import patch
+from src.api.response_cache import ResponseCache
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_counts_hits_and_misses(self):
+        cache = ResponseCache()
+        cache.set("current", "Delhi", {"temp": 30})
+
+        self.assertEqual(cache.get("current", "Delhi"), {"temp": 30})
+        self.assertIsNone(cache.get("current", "Mumbai"))
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    @patch('src.api.response_cache.time.monotonic')
+    def test_per_endpoint_ttl(self, mock_monotonic):
+        mock_monotonic.return_value = 1000.0
+        cache = ResponseCache(ttls={"forecast": 3600}, default_ttl=300)
+        cache.set("current", "Delhi", {"temp": 30})
+        cache.set("forecast", "Delhi_5", [{"temp": 31}])
+
+        mock_monotonic.return_value = 1000.0 + 600
+        self.assertIsNone(cache.get("current", "Delhi"))
+        self.assertEqual(cache.get("forecast", "Delhi_5"), [{"temp": 31}])
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("current", "Delhi", 1)
+        cache.set("current", "Mumbai", 2)
+        # Touch Delhi so Mumbai becomes the least recently used entry
+        cache.get("current", "Delhi")
+        cache.set("current", "Chennai", 3)
+
+        self.assertIsNone(cache.get("current", "Mumbai"))
+        self.assertEqual(cache.get("current", "Delhi"), 1)
+        self.assertEqual(cache.get("current", "Chennai"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_eviction_by_byte_size(self):
+        cache = ResponseCache(max_bytes=50)
+        cache.set("forecast", "a", "x" * 20)
+        cache.set("forecast", "b", "y" * 20)
+        cache.set("forecast", "c", "z" * 20)
+
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 50)
+        self.assertEqual(stats["entries"], 2)
+        self.assertIsNone(cache.get("forecast", "a"))
+
+    def test_oversized_value_is_not_cached(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.set("forecast", "big", "x" * 100)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
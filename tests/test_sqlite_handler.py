@@ -0,0 +1,114 @@
+import os
+import tempfile
+import types
+import unittest
+from datetime import datetime, timedelta
+from src.database.sqlite_handler import SQLiteHandler
+from src.database.storage import StorageBackend, create_storage
+
+class TestSQLiteHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_handler = create_storage({'type': 'sqlite', 'path': os.path.join(self.tmp_dir.name, 'weather.db')})
+        self.addCleanup(self.db_handler.close)
+
+    def _reading(self, city, temperature, timestamp, condition='Clear'):
+        return {
+            'city': city,
+            'temperature': temperature,
+            'feels_like': temperature + 1,
+            'humidity': 60,
+            'wind_speed': 3.0,
+            'weather_condition': condition,
+            'timestamp': timestamp
+        }
+
+    def test_factory_returns_storage_backend(self):
+        self.assertIsInstance(self.db_handler, SQLiteHandler)
+        self.assertIsInstance(self.db_handler, StorageBackend)
+        with self.assertRaises(ValueError):
+            create_storage({'type': 'cassandra'})
+
+    def test_wal_mode_enabled(self):
+        mode = self.db_handler.connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_store_and_query_readings(self):
+        now = datetime.utcnow()
+        self.db_handler.store_weather_data([
+            self._reading('Delhi', 20.0 + i, now - timedelta(hours=i)) for i in range(5)
+        ] + [self._reading('Mumbai', 28.0, now)])
+
+        self.assertEqual(self.db_handler.get_cities(), ['Delhi', 'Mumbai'])
+
+        recent = self.db_handler.get_recent_weather_data('Delhi', limit=2)
+        self.assertEqual([r['temperature'] for r in recent], [20.0, 21.0])
+        self.assertIsInstance(recent[0]['timestamp'], datetime)
+
+        historical = self.db_handler.get_historical_weather_data(
+            'Delhi', days=1, projection={'_id': 0, 'timestamp': 1, 'temperature': 1})
+        self.assertEqual(set(historical[0]), {'timestamp', 'temperature'})
+        self.assertEqual([r['temperature'] for r in historical], [24.0, 23.0, 22.0, 21.0, 20.0])
+
+        stream = self.db_handler.get_data_for_alerts('Delhi', hours=24, stream=True, batch_size=2)
+        self.assertIsInstance(stream, types.GeneratorType)
+        self.assertEqual(len(list(stream)), 5)
+
+    def test_find_stored_readings(self):
+        now = datetime(2026, 10, 18, 12)
+        stored = [self._reading('Delhi', 20.0, now), self._reading('Mumbai', 25.0, now)]
+        self.db_handler.store_weather_data(stored)
+        candidates = stored + [self._reading('Delhi', 21.0, now + timedelta(minutes=5))]
+        self.assertEqual(self.db_handler.find_stored_readings(candidates), {('Delhi', now), ('Mumbai', now)})
+
+    def test_latest_for_all_cities(self):
+        self.db_handler.store_weather_data([
+            self._reading('Delhi', 30.0, datetime(2024, 10, 20, 12)),
+            self._reading('Delhi', 31.0, datetime(2024, 10, 20, 13))
+        ])
+        self.db_handler.store_weather_data([self._reading('Delhi', 25.0, datetime(2024, 10, 20, 11))])
+
+        latest = self.db_handler.get_latest_for_all_cities()
+        self.assertEqual(latest['Delhi']['temperature'], 31.0)
+
+    def test_refresh_daily_summaries_covers_whole_day(self):
+        first = [self._reading('Delhi', 30.0, datetime(2024, 10, 20, 9), 'Haze'),
+                 self._reading('Delhi', 34.0, datetime(2024, 10, 20, 12), 'Clear')]
+        second = [self._reading('Delhi', 32.0, datetime(2024, 10, 20, 15), 'Clear')]
+        self.db_handler.store_weather_data(first)
+        self.db_handler.refresh_daily_summaries(first)
+        self.db_handler.store_weather_data(second)
+
+        summaries = self.db_handler.refresh_daily_summaries(second)
+
+        self.assertEqual(len(summaries), 1)
+        summary = summaries[0]
+        self.assertEqual(summary['date'], datetime(2024, 10, 20))
+        self.assertEqual(summary['avg_temperature'], 32.0)
+        self.assertEqual(summary['max_temperature'], 34.0)
+        self.assertEqual(summary['min_temperature'], 30.0)
+        self.assertEqual(summary['dominant_condition'], 'Clear')
+        self.assertEqual(summary['sample_count'], 3)
+
+    def test_summary_upserts_report_counts(self):
+        summary = {'city': 'Delhi', 'date': datetime(2024, 10, 20), 'avg_temperature': 30.0,
+                   'max_temperature': 32.0, 'min_temperature': 28.0, 'avg_humidity': 60.0,
+                   'avg_wind_speed': 3.0, 'dominant_condition': 'Clear'}
+        self.assertEqual(self.db_handler.store_daily_summary([summary])['upserted'], 1)
+        result = self.db_handler.store_daily_summary([dict(summary, avg_temperature=31.0)])
+        self.assertEqual(result['matched'], 1)
+        self.assertEqual(result['upserted'], 0)
+
+        stored = self.db_handler.get_daily_summaries('Delhi', datetime(2024, 10, 19), datetime(2024, 10, 21))
+        self.assertEqual(stored[0]['avg_temperature'], 31.0)
+
+        forecast = {'Delhi': [{'date': datetime(2024, 10, 22), 'avg_temp': 29.0, 'max_temp': 31.0,
+                               'min_temp': 27.0, 'avg_humidity': 55.0, 'avg_wind_speed': 2.0,
+                               'dominant_condition': 'Rain'}]}
+        self.assertEqual(self.db_handler.store_forecast_summary(forecast)['upserted'], 1)
+        stored = self.db_handler.get_forecast_data('Delhi', datetime(2024, 10, 22), datetime(2024, 10, 23))
+        self.assertEqual(stored[0]['dominant_condition'], 'Rain')
+
+if __name__ == '__main__':
+    unittest.main()
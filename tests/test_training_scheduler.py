@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.ml.model_registry import ModelRegistry
+from src.ml.training_scheduler import TrainingScheduler
+
+class TestTrainingScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.model_dir = self.tmp_dir.name
+        self.history = {city: self._readings(40) for city in ('Delhi', 'Mumbai')}
+        self.storage = MagicMock()
+        self.storage.get_historical_weather_data.side_effect = lambda city, **kwargs: self.history.get(city, [])
+        self.metrics_path = os.path.join(self.model_dir, 'training_metrics.json')
+        self.scheduler = TrainingScheduler(self.storage, ['Delhi', 'Mumbai', 'Chennai'], self.model_dir,
+                                           interval=3600, min_new_samples=10, max_workers=2,
+                                           metrics_path=self.metrics_path)
+
+    def _readings(self, count, start=None):
+        start = start or datetime.now() - timedelta(days=2)
+        return [{'timestamp': start + timedelta(minutes=5 * i), 'temperature': 20.0 + i % 10,
+                 'humidity': 50 + i % 7, 'wind_speed': 2.0 + i % 3,
+                 'weather_condition': 'Clear' if i % 2 else 'Clouds'} for i in range(count)]
+
+    def test_trains_missing_models_in_parallel(self):
+        results = self.scheduler.run_once()
+        # Chennai has no readings, so only the two cities with data are trained
+        self.assertEqual(sorted(result['city'] for result in results), ['Delhi', 'Mumbai'])
+        for result in results:
+            self.assertEqual(result['samples'], 40)
+            self.assertGreater(result['model_bytes'], 0)
+            self.assertGreaterEqual(result['training_time'], 0)
+        self.assertEqual(sorted(os.listdir(self.model_dir)), [
+            'Delhi_weather_model.joblib', 'Mumbai_weather_model.joblib', 'training_metrics.json'])
+        with open(self.metrics_path) as f:
+            self.assertEqual(json.load(f)['Delhi']['samples'], 40)
+
+        registry = ModelRegistry(self.model_dir)
+        self.assertTrue(registry.get('Delhi').is_fitted)
+        # Nothing changed, so nothing is due
+        self.assertEqual(self.scheduler.run_once(), [])
+
+    def test_retrains_on_age_or_new_readings(self):
+        self.scheduler.run_once()
+        self.assertIsNone(self.scheduler.due_reason('Delhi', self.history['Delhi']))
+        self.assertEqual(self.scheduler.due_reason('Delhi', self.history['Delhi'], now=time.time() + 3600),
+                         'interval')
+
+        self.history['Mumbai'] = self.history['Mumbai'] + self._readings(12, start=datetime.now() + timedelta(minutes=1))
+        results = self.scheduler.run_once()
+        self.assertEqual([result['city'] for result in results], ['Mumbai'])
+        self.assertEqual(results[0]['samples'], 52)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,24 @@
 import unittest
 import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 from src.api.weather_api import WeatherAPI
+from src.api.rate_limiter import TokenBucket
+from src.api.geocode_cache import GeocodeCache
 
 class TestWeatherAPI(unittest.TestCase):
     def setUp(self):
         # Set up a test API key
         self.test_api_key = "test_api_key"
-        # Create an instance of WeatherAPI with the test key
-        self.api = WeatherAPI(self.test_api_key)
+        # Create an instance of WeatherAPI with the test key (rate limiting off to keep tests fast)
+        self.api = WeatherAPI(self.test_api_key, {'rate_limit': {'requests_per_second': None}})
         # Test cities
         self.test_cities = ["TestCity1", "TestCity2"]
 
-    @patch('src.api.weather_api.requests.get')
+    @patch('src.api.weather_api.requests.Session.get')
     def test_get_weather_data(self, mock_get):
         # Mock the response from requests.get
         mock_response = MagicMock()
@@ -53,7 +59,7 @@ class TestWeatherAPI(unittest.TestCase):
         self.assertEqual(result[0]["wind_speed"], 4.2)
         self.assertEqual(result[0]["dt"], 1609459200)
 
-    @patch('src.api.weather_api.requests.get')
+    @patch('src.api.weather_api.requests.Session.get')
     def test_get_forecast_data(self, mock_get):
         # Mock the response
         mock_response = MagicMock()
@@ -107,16 +113,274 @@ class TestWeatherAPI(unittest.TestCase):
 
     def test_clear_cache(self):
         # First, add some items to the cache
-        self.api.cache = {
-            "test_key1": {"data": "test_data", "timestamp": 12345},
-            "test_key2": {"data": "test_data2", "timestamp": 67890}
-        }
-        
+        self.api.cache.set("current", "TestCity1", {"temp": 20})
+        self.api.cache.set("forecast", "TestCity1_5", [{"temp": 21}])
+        self.api.cache.set("aqi", "TestCity1", {"aqi": 2})
+
+        # Clearing a single endpoint leaves the others untouched
+        self.api.clear_cache("forecast")
+        self.assertIsNone(self.api.cache.get("forecast", "TestCity1_5"))
+        self.assertEqual(len(self.api.cache), 2)
+
         # Call clear_cache
         self.api.clear_cache()
         
         # Check that the cache is now empty
-        self.assertEqual(self.api.cache, {})
+        self.assertEqual(len(self.api.cache), 0)
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_concurrent_fetch_preserves_order(self, mock_get):
+        def fake_get(url, params, timeout):
+            # Finish the first cities last to make ordering depend on the client
+            city = params["q"]
+            time.sleep(0.05 if city == "City0" else 0)
+            response = MagicMock()
+            response.raise_for_status.return_value = None
+            response.json.return_value = {
+                "weather": [{"main": "Clear"}],
+                "main": {"temp": 20.0, "feels_like": 20.0, "humidity": 50},
+                "wind": {"speed": 1.0},
+                "dt": 1609459200
+            }
+            return response
+        mock_get.side_effect = fake_get
+
+        api = WeatherAPI(self.test_api_key, {
+            'max_in_flight': 4,
+            'rate_limit': {'requests_per_second': None}
+        })
+        cities = [f"City{i}" for i in range(8)]
+        result = api.get_weather_data(cities)
+
+        self.assertEqual([item["city"] for item in result], cities)
+        self.assertEqual(mock_get.call_count, 8)
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_bulk_mode_splits_group_response(self, mock_get):
+        def group_item(city_id, temp):
+            return {
+                "id": city_id,
+                "weather": [{"main": "Clouds"}],
+                "main": {"temp": temp, "feels_like": temp, "humidity": 70},
+                "wind": {"speed": 2.0},
+                "dt": 1609459200
+            }
+
+        def fake_get(url, params, timeout):
+            ids = params["id"].split(",")
+            response = MagicMock()
+            response.raise_for_status.return_value = None
+            # Return entries out of order to check they are mapped back by ID
+            response.json.return_value = {
+                "cnt": len(ids),
+                "list": [group_item(int(city_id), float(city_id)) for city_id in reversed(ids)]
+            }
+            return response
+        mock_get.side_effect = fake_get
+
+        api = WeatherAPI(self.test_api_key, {
+            'rate_limit': {'requests_per_second': None},
+            'bulk': {'enabled': True, 'batch_size': 2, 'city_ids': {'A': 1, 'B': 2, 'C': 3}}
+        })
+        result = api.get_weather_data(['A', 'B', 'C'])
+
+        # Three cities in batches of two cost two group requests
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[0][1]["params"]["id"], "1,2")
+        self.assertEqual(mock_get.call_args_list[0][0][0], "http://api.openweathermap.org/data/2.5/group")
+        self.assertEqual([item["city"] for item in result], ['A', 'B', 'C'])
+        self.assertEqual([item["temp"] for item in result], [1.0, 2.0, 3.0])
+        self.assertEqual(set(result[0]), {"city", "main", "temp", "feels_like", "humidity", "wind_speed", "dt"})
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_bulk_mode_resolves_unknown_city_ids(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            "id": 1273294,
+            "weather": [{"main": "Haze"}],
+            "main": {"temp": 31.0, "feels_like": 33.0, "humidity": 40},
+            "wind": {"speed": 3.1},
+            "dt": 1609459200
+        }
+        mock_get.return_value = mock_response
+
+        api = WeatherAPI(self.test_api_key, {
+            'rate_limit': {'requests_per_second': None},
+            'bulk': {'enabled': True}
+        })
+        result = api.get_weather_data(['Delhi'])
+
+        self.assertEqual(result[0]["temp"], 31.0)
+        self.assertEqual(api.city_ids, {'Delhi': 1273294})
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_air_quality_uses_coordinates_learned_from_weather(self, mock_get):
+        weather_response = MagicMock()
+        weather_response.raise_for_status.return_value = None
+        weather_response.json.return_value = {
+            "id": 42,
+            "coord": {"lat": 12.5, "lon": 77.5},
+            "weather": [{"main": "Clear"}],
+            "main": {"temp": 25.5, "feels_like": 26.0, "humidity": 65},
+            "wind": {"speed": 4.2},
+            "dt": 1609459200
+        }
+        aqi_response = MagicMock()
+        aqi_response.raise_for_status.return_value = None
+        aqi_response.json.return_value = {
+            "list": [{"main": {"aqi": 3}, "components": {"pm2_5": 40.0}, "dt": 1609459200}]
+        }
+        mock_get.side_effect = lambda url, params, timeout: (
+            aqi_response if url.endswith("air_pollution") else weather_response)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "geocode.json")
+            api = WeatherAPI(self.test_api_key, {
+                'rate_limit': {'requests_per_second': None},
+                'geocode_cache_path': path
+            })
+            api.get_weather_data(["TestCity"])
+            self.assertTrue(os.path.exists(path))
+
+            # A fresh client loads the index at startup and skips the coordinate lookup
+            mock_get.reset_mock()
+            api = WeatherAPI(self.test_api_key, {
+                'rate_limit': {'requests_per_second': None},
+                'geocode_cache_path': path
+            })
+            result = api.get_air_quality_data(["TestCity"])
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args[1]["params"]["lat"], 12.5)
+        self.assertEqual(mock_get.call_args[1]["params"]["lon"], 77.5)
+        self.assertEqual(result["TestCity"]["aqi"], 3)
+        self.assertEqual(api.city_ids, {"TestCity": 42})
+
+    def test_concurrent_geocode_saves_never_corrupt_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "geocode.json")
+            # Two caches on one file, as the collector and the dashboard have
+            caches = [GeocodeCache(path), GeocodeCache(path)]
+
+            def writer(cache, offset):
+                for i in range(50):
+                    cache.set(f"City{i}", 10.0 + offset, 70.0 + i)
+                    cache.save()
+
+            threads = [threading.Thread(target=writer, args=(cache, offset))
+                       for offset, cache in enumerate(caches * 2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(GeocodeCache(path)), 50)
+            self.assertEqual(os.listdir(tmp_dir), ["geocode.json"])
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_forecast_only_changed_skips_not_modified(self, mock_get):
+        forecast_payload = {
+            "list": [{
+                "dt": 1609459200,
+                "main": {"temp": 25.5, "humidity": 65},
+                "weather": [{"main": "Clear"}],
+                "wind": {"speed": 4.2}
+            }]
+        }
+        first_response = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+        first_response.raise_for_status.return_value = None
+        first_response.json.return_value = forecast_payload
+        not_modified = MagicMock(status_code=304, headers={})
+        mock_get.side_effect = [first_response, not_modified]
+
+        result = self.api.get_forecast_data(["TestCity"], days=1, only_changed=True)
+        self.assertIn("TestCity", result)
+        self.assertEqual(self.api.unchanged_forecasts, [])
+
+        # Expire the cached copy so the next call reaches the provider
+        self.api.clear_cache("forecast")
+        result = self.api.get_forecast_data(["TestCity"], days=1, only_changed=True)
+
+        self.assertEqual(result, {})
+        self.assertEqual(self.api.unchanged_forecasts, ["TestCity"])
+        self.assertEqual(mock_get.call_args[1]["headers"], {"If-None-Match": '"v1"'})
+
+        # Without only_changed the previous payload is still returned
+        self.assertEqual(self.api.get_forecast_data(["TestCity"], days=1)["TestCity"][0]["temp"], 25.5)
+
+    @patch('src.api.weather_api.requests.Session.get')
+    def test_forecast_content_hash_detects_unchanged_payload(self, mock_get):
+        mock_response = MagicMock(status_code=200, headers={})
+        mock_response.raise_for_status.return_value = None
+        mock_response.json.return_value = {
+            "list": [{
+                "dt": 1609459200,
+                "main": {"temp": 25.5, "humidity": 65},
+                "weather": [{"main": "Clear"}],
+                "wind": {"speed": 4.2}
+            }]
+        }
+        mock_get.return_value = mock_response
+
+        self.api.get_forecast_data(["TestCity"], days=1, only_changed=True)
+        self.api.clear_cache()
+        result = self.api.get_forecast_data(["TestCity"], days=1, only_changed=True)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(result, {})
+        self.assertEqual(self.api.unchanged_forecasts, ["TestCity"])
+
+    def test_requests_share_pooled_session(self):
+        adapter = self.api.session.get_adapter(self.api.BASE_URL)
+        self.assertIs(adapter, self.api.session.get_adapter("https://example.com"))
+        self.assertEqual(adapter._pool_maxsize, self.api.max_in_flight)
+
+        stats = self.api.connection_stats()
+        self.assertEqual(stats, {'requests': 0, 'connections_opened': 0, 'connections_reused': 0})
+
+    def test_connection_stats_count_reuse_across_hosts(self):
+        class KeepAliveHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = b'{}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        port = server.server_address[1]
+
+        api = WeatherAPI(self.test_api_key, {'http': {'pool_connections': 1}})
+        self.addCleanup(api.close)
+        for _ in range(4):
+            api.session.get(f"http://127.0.0.1:{port}/weather", timeout=5).raise_for_status()
+        self.assertEqual(api.connection_stats(), {'requests': 4, 'connections_opened': 1, 'connections_reused': 3})
+
+        # A second host evicts the first host's pool; the counts still include its requests
+        api.session.get(f"http://localhost:{port}/weather", timeout=5).raise_for_status()
+        api.session.get(f"http://127.0.0.1:{port}/weather", timeout=5).raise_for_status()
+        self.assertEqual(api.connection_stats(), {'requests': 6, 'connections_opened': 3, 'connections_reused': 3})
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # Two tokens are available immediately, the other two refill at 20/s
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
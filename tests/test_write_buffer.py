@@ -0,0 +1,160 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+import main
+from src.database.write_buffer import WriteBehindBuffer
+
+class TestWriteBehindBuffer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.spill_path = os.path.join(self.tmp_dir.name, 'spill.jsonl')
+        self.storage = MagicMock()
+        self.storage.store_weather_data.return_value = ['id']
+        self.storage.store_forecast_summary.return_value = {'matched': 0, 'modified': 0, 'upserted': 1, 'errors': []}
+        self.committed = []
+        self.buffer = WriteBehindBuffer(self.storage, max_batch=3, max_delay=60,
+                                        spill_path=self.spill_path, on_commit=self.committed.append)
+
+    def _readings(self, count):
+        now = datetime(2026, 10, 18, 12, 0)
+        return [{'city': 'Delhi', 'temperature': 20.0 + i, 'timestamp': now + timedelta(minutes=i)}
+                for i in range(count)]
+
+    def test_group_commit_on_size_threshold(self):
+        self.buffer.start()
+        self.addCleanup(self.buffer.close)
+        self.buffer.add_readings(self._readings(2))
+        self.assertEqual(self.buffer.metrics()['queue_depth'], 2)
+        self.buffer.add_readings(self._readings(1))
+
+        for _ in range(100):
+            if self.committed:
+                break
+            time.sleep(0.01)
+        self.storage.store_weather_data.assert_called_once()
+        self.assertEqual(len(self.storage.store_weather_data.call_args[0][0]), 3)
+        self.assertEqual(len(self.committed), 1)
+
+    def test_spills_when_database_unavailable(self):
+        self.storage.store_weather_data.return_value = None
+        self.buffer.add_readings(self._readings(2))
+        self.buffer.add_forecast_summaries({'Delhi': [{'city': 'Delhi', 'date': datetime(2026, 10, 19)}]})
+
+        self.assertFalse(self.buffer.flush())
+        self.assertTrue(os.path.exists(self.spill_path))
+        self.storage.store_forecast_summary.assert_not_called()
+        metrics = self.buffer.metrics()
+        self.assertEqual(metrics['spilled_readings'], 2)
+        self.assertTrue(metrics['spill_pending'])
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_replays_spill_in_order_after_reconnect(self):
+        self.storage.store_weather_data.side_effect = ConnectionError('down')
+        self.buffer.add_readings(self._readings(4))
+        self.buffer.flush()
+
+        self.storage.store_weather_data.side_effect = None
+        self.buffer.add_readings(self._readings(1))
+        self.assertTrue(self.buffer.flush())
+
+        self.assertFalse(os.path.exists(self.spill_path))
+        batches = [call[0][0] for call in self.storage.store_weather_data.call_args_list[1:]]
+        # Spilled readings are replayed in max_batch chunks before the new batch
+        self.assertEqual([len(batch) for batch in batches], [3, 1, 1])
+        self.assertIsInstance(batches[0][0]['timestamp'], datetime)
+        self.assertEqual(batches[0][0], self._readings(1)[0])
+        metrics = self.buffer.metrics()
+        self.assertEqual(metrics['replayed_readings'], 4)
+        self.assertEqual(metrics['committed_readings'], 5)
+
+    def test_forecast_failure_does_not_duplicate_readings(self):
+        self.storage.store_forecast_summary.side_effect = ConnectionError('down')
+        self.buffer.add_readings(self._readings(1))
+        self.buffer.add_forecast_summaries({'Delhi': [{'city': 'Delhi', 'date': datetime(2026, 10, 19)}]})
+        self.assertFalse(self.buffer.flush())
+
+        self.storage.store_forecast_summary.side_effect = None
+        self.assertTrue(self.buffer.flush())
+        self.assertEqual(self.storage.store_weather_data.call_count, 1)
+        forecasts = self.storage.store_forecast_summary.call_args[0][0]
+        self.assertEqual(forecasts['Delhi'][0]['date'], datetime(2026, 10, 19))
+
+    def test_replay_skips_readings_stored_by_a_failed_insert(self):
+        stored = []
+
+        def store_weather_data(readings):
+            if not stored:
+                # The connection dropped after the first two documents were inserted
+                stored.extend(readings[:2])
+                return None
+            stored.extend(readings)
+            return ['id'] * len(readings)
+
+        self.storage.store_weather_data.side_effect = store_weather_data
+        self.storage.find_stored_readings.side_effect = lambda readings: {
+            (reading['city'], reading['timestamp']) for reading in stored}
+        self.buffer.add_readings(self._readings(3))
+        self.assertFalse(self.buffer.flush())
+        self.assertTrue(self.buffer.flush())
+
+        self.assertEqual(stored, self._readings(3))
+        # The commit callback still sees the whole replayed chunk
+        self.assertEqual(self.committed, [self._readings(3)])
+
+    def test_failed_forecasts_of_a_partial_bulk_write_are_spilled(self):
+        date = datetime(2026, 10, 19)
+        self.storage.store_forecast_summary.return_value = {
+            'matched': 0, 'modified': 0, 'upserted': 1,
+            'errors': [{'key': ('Mumbai', date), 'code': None, 'message': 'write failed'}]}
+        self.buffer.add_forecast_summaries({'Delhi': [{'city': 'Delhi', 'date': date}],
+                                            'Mumbai': [{'city': 'Mumbai', 'date': date}]})
+        self.assertFalse(self.buffer.flush())
+
+        self.storage.store_forecast_summary.return_value = {'matched': 0, 'modified': 0, 'upserted': 1,
+                                                            'errors': []}
+        self.assertTrue(self.buffer.flush())
+        self.assertEqual(list(self.storage.store_forecast_summary.call_args[0][0]), ['Mumbai'])
+
+    def _run_main_until_interrupted(self, storage):
+        config = {
+            'api_key': 'key',
+            'cities': ['Delhi'],
+            'alert_thresholds': {},
+            'data_processing': {'update_interval': 300},
+            'database': {'write_behind': {'enabled': True, 'max_batch': 500, 'max_delay': 3600,
+                                          'spill_path': self.spill_path}}
+        }
+        weather_api = MagicMock()
+        weather_api.get_forecast_data.return_value = []
+        weather_api.unchanged_forecasts = []
+        data_processor = MagicMock()
+        data_processor.process_batch.return_value = self._readings(2)
+        with patch.object(main, 'load_config', return_value=config), \
+                patch.object(main, 'WeatherAPI', return_value=weather_api), \
+                patch.object(main, 'DataProcessor', return_value=data_processor), \
+                patch.object(main, 'create_storage', return_value=storage), \
+                patch.object(main, 'AlertManager'), \
+                patch.object(main, 'Visualizer'), \
+                patch.object(main.time, 'sleep', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                main.main()
+
+    def test_main_commits_buffered_readings_on_shutdown(self):
+        self.storage.refresh_daily_summaries.return_value = []
+        self._run_main_until_interrupted(self.storage)
+        self.storage.store_weather_data.assert_called_once()
+        self.assertEqual(self.storage.store_weather_data.call_args[0][0], self._readings(2))
+        self.storage.refresh_daily_summaries.assert_called_once()
+
+    def test_main_spills_buffered_readings_on_shutdown(self):
+        self.storage.store_weather_data.return_value = None
+        self._run_main_until_interrupted(self.storage)
+        with open(self.spill_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import argparse
+from dotenv import load_dotenv
+from src.database.storage import create_storage
+from src.ml.training_scheduler import TrainingScheduler
+from src.utils.config_loader import load_config
+
+load_dotenv()  # Load environment variables from .env file
+
+def main():
+    """Train the dashboard's prediction models outside the web process, once or on a schedule"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--once', action='store_true', help='train the due cities once and exit')
+    parser.add_argument('--cities', nargs='+', help='cities to train (default: the configured cities)')
+    parser.add_argument('--workers', type=int, help='training processes (default: ml.training.workers or one per core)')
+    args = parser.parse_args()
+
+    config = load_config()
+    ml_settings = config.get('ml', {})
+    training = ml_settings.get('training', {})
+    storage = create_storage(config['database'])
+    scheduler = TrainingScheduler(
+        storage,
+        args.cities or config['cities'],
+        model_dir=ml_settings.get('model_dir', 'models'),
+        interval=training.get('interval', 86400),
+        min_new_samples=training.get('min_new_samples', 288),
+        history_days=training.get('history_days', 7),
+        min_samples=training.get('min_samples', 8),
+        max_workers=args.workers or training.get('workers'),
+        metrics_path=training.get('metrics_path', 'models/training_metrics.json')
+    )
+    try:
+        if args.once:
+            for result in scheduler.run_once():
+                print(f"{result['city']}: {result['samples']} readings, {result['training_time']}s, "
+                      f"{result['model_bytes'] / 1024:.0f} KB")
+        else:
+            scheduler.run(training.get('check_interval', 300))
+    finally:
+        storage.close()
+
+if __name__ == "__main__":
+    main()